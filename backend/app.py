@@ -1,12 +1,12 @@
 from __future__ import annotations
 import asyncio
-import json
+import logging
 import os
 import random
 import time
 from datetime import datetime
-from typing import Dict, Any, List
-from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, KeysView, List, NamedTuple, Optional
+from collections import Counter
 import builtins
 
 # Load environment variables from .env file
@@ -18,8 +18,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from modules.tts import get_hybrid_provider, TTSJob, get_audio_duration
+from modules.tts_cache import get_or_synth
 from modules.message_filter import get_message_history, should_process_message
-from modules.persistent_data import get_settings, save_settings, get_auth, get_enabled_voices, AUDIO_DIR, PUBLIC_DIR
+from modules.persistent_data import get_settings, get_setting, get_parallel_limit, save_settings, get_auth, get_enabled_voices, get_enabled_voice_by_id, get_voice_display_key, warm_up_connection_pool, AUDIO_DIR, PERSISTENT_AVATARS_DIR
 from modules.avatars import (
     generate_avatar_slot_assignments,
     reserve_avatar_slot,
@@ -37,7 +38,7 @@ from modules.queue_manager import (
     get_parallel_queue_length
 )
 
-from modules import logger
+from modules import logger, dumps_json, loads_json
 # TTS Cancellation System:
 # - Tracks active TTS jobs by username in active_tts_jobs dict
 # - Detects Twitch ban/timeout events via CLEARCHAT IRC messages
@@ -45,7 +46,7 @@ from modules import logger
 # - Provides API endpoints for manual testing and management
 
 # Voice usage tracking for distribution analysis
-voice_usage_stats = defaultdict(int)
+voice_usage_stats: Counter = Counter()
 voice_selection_count = 0
 last_selected_voice_id = None  # Track last voice to prevent consecutive repeats
 
@@ -58,7 +59,6 @@ last_selected_voice_id = None  # Track last voice to prevent consecutive repeats
 # username -> {"task": asyncio.Task, "message": str}
 active_tts_jobs = {}
 total_active_tts_count = 0  # Total count of active TTS jobs (for parallel limiting)
-parallel_message_queue = []  # Queue for messages when parallel limit is reached
 
 def increment_tts_count():
     """Increment the TTS count for parallel limiting"""
@@ -86,25 +86,34 @@ def force_reset_tts_counter():
     logger.warning(f"FORCE RESET: TTS counter {old_count}→0, cleared {old_jobs} active jobs")
 
 # Global TTS control
-tts_enabled = True  # Global flag to control TTS processing
+class TTSState:
+    """
+    Mutable global TTS flags.
+    Kept on an object so routers that import it always see the current value.
+    """
+    __slots__ = ("enabled",)
+    
+    def __init__(self):
+        self.enabled = True  # Global flag to control TTS processing
+
+tts_state = TTSState()
 
 # Message History for Testing and Replay
 # Stores last 100 processed messages with original and filtered text
 from collections import deque
 message_history = deque(maxlen=100)  # Automatically removes oldest when full
 
+# Field order of message_history entries; tags are stored last and kept for replay only.
+# Entries are plain tuples since every chat message is recorded but the history is rarely read.
+MESSAGE_HISTORY_FIELDS = ("timestamp", "username", "original_text", "filtered_text", "event_type", "was_filtered")
+
 def add_to_message_history(username: str, original_text: str, filtered_text: str, 
                            event_type: str = "chat", tags: Dict[str, Any] = None):
     """Add a message to the history for replay testing"""
-    message_history.append({
-        "timestamp": time.time(),
-        "username": username,
-        "original_text": original_text,
-        "filtered_text": filtered_text,
-        "event_type": event_type,
-        "was_filtered": original_text != filtered_text,
-        "tags": tags or {}
-    })
+    message_history.append((
+        time.time(), username, original_text, filtered_text, event_type,
+        original_text != filtered_text, tags
+    ))
 
 # Avatar Slot Management System
 # Manages which avatars are assigned to which slots and tracks their active status
@@ -113,7 +122,7 @@ def add_to_message_history(username: str, original_text: str, filtered_text: str
 def process_parallel_message_queue():
     """Process queued messages if parallel slots become available"""
     queue_manager.process_parallel_message_queue(
-        app_get_settings,
+        get_parallel_limit(),
         process_tts_message,
         active_tts_jobs,
         total_active_tts_count,
@@ -125,13 +134,16 @@ def process_avatar_message_queue():
     """Process queued messages if avatar slots become available"""
     queue_manager.process_avatar_message_queue(process_queued_tts_message)
 
-async def process_queued_tts_message(message_data, target_slot):
+async def process_queued_tts_message(message_data, target_slot, audio_duration=None, retries=0, queued_time=None):
     """Process a TTS message that was queued due to all slots being busy"""
     await queue_manager.process_queued_tts_message(
         message_data, 
         target_slot, 
         hub, 
-        process_avatar_message_queue
+        process_avatar_message_queue,
+        audio_duration,
+        retries,
+        queued_time
     )
     
 logger.info("Initializing FastAPI application")
@@ -150,14 +162,23 @@ import time
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    # Only log important requests, not headers
-    logger.info(f"HTTP Request: {request.method} {request.url}")
+    path = request.url.path
+    debug = logger.isEnabledFor(logging.DEBUG)
+    # Every message fetches its audio file; a missing file already shows up client-side
+    if not debug and path.startswith("/audio/"):
+        return await call_next(request)
     
+    start_time = time.perf_counter()
     response = await call_next(request)
     
-    process_time = time.time() - start_time
-    logger.info(f"Response: {response.status_code} (took {process_time:.2f}s)")
+    # Routine requests (assets, polling) are only logged at debug;
+    # errors are always logged
+    if response.status_code >= 400:
+        process_time = time.perf_counter() - start_time
+        logger.info(f"HTTP {request.method} {path} -> {response.status_code} (took {process_time:.2f}s)")
+    elif debug:
+        process_time = time.perf_counter() - start_time
+        logger.debug(f"HTTP {request.method} {path} -> {response.status_code} (took {process_time:.2f}s)")
     
     return response
 
@@ -177,86 +198,183 @@ app.include_router(voices_router)
 app.include_router(system_router)
 app.include_router(config_backup_router)
 
-# Serve generated audio files under /audio
-# Use AUDIO_DIR from TTS module to ensure consistency
-logger.info(f"=== MOUNTING AUDIO DIRECTORY ===")
-logger.info(f"Audio directory: {AUDIO_DIR}")
-logger.info(f"Audio directory exists: {os.path.isdir(AUDIO_DIR)}")
-if os.path.isdir(AUDIO_DIR):
-    try:
-        files = os.listdir(AUDIO_DIR)
-        logger.info(f"Files in audio directory: {len(files)} files")
-    except Exception as e:
-        logger.error(f"Error listing audio directory: {e}")
-        
-app.mount("/audio", StaticFiles(directory=AUDIO_DIR), name="audio")
-logger.info(f"=== AUDIO MOUNT COMPLETE ===")
-
-
-# Debug: List files in the public directory
-if os.path.isdir(PUBLIC_DIR):
-    logger.info("Files in static directory:")
-    for root, dirs, files in os.walk(PUBLIC_DIR):
-        level = root.replace(PUBLIC_DIR, '').count(os.sep)
-        indent = ' ' * 2 * level
-        logger.info(f"{indent}{os.path.basename(root)}/")
-        subindent = ' ' * 2 * (level + 1)
-        for file in files:
-            logger.info(f"{subindent}{file}")
-else:
-    logger.info("Static files directory not found")
+# Generated audio is served by the /audio/{filename} route in routers/static.py
+# (persistent_data creates AUDIO_DIR and logs its location)
+
+# Serve user-uploaded avatars (URLs are built as /user_avatars/<filename>)
+app.mount("/user_avatars", StaticFiles(directory=PERSISTENT_AVATARS_DIR, check_dir=False), name="user_avatars")
+logger.info(f"User avatars mounted from: {PERSISTENT_AVATARS_DIR}")
+
 
 # ---------- Global State ----------
 twitch_auth_error = None
 youtube_auth_error = None
-# Track if we've attempted a token refresh in this session to prevent infinite retries
-twitch_refresh_attempted = False
+# Track if we've attempted a YouTube token refresh in this session to prevent infinite retries
 youtube_refresh_attempted = False
+# Automatic Twitch token refresh after auth errors: concurrent handlers share the
+# in-flight refresh, and repeated attempts back off exponentially
+twitch_refresh_task: Optional[asyncio.Task] = None
+twitch_refresh_attempts = 0
+twitch_refresh_retry_at = 0.0
+TWITCH_REFRESH_BACKOFF = 30.0
+TWITCH_REFRESH_BACKOFF_MAX = 3600.0
 
 # ---------- WebSocket Hub ----------
+# Seconds a single client may take to accept a message before it is dropped
+HUB_SEND_TIMEOUT = 0.5
+# Messages that may wait for a client before it is considered too slow and dropped
+HUB_CLIENT_QUEUE_SIZE = 64
+# Close code for dropped clients (1013 "try again later"); closing makes the frontend reconnect
+HUB_DROP_CLOSE_CODE = 1013
+# Seconds a scheduled broadcast waits so a burst of updates is sent only once
+BROADCAST_COALESCE_DELAY = 0.1
+
 class Hub:
+    """
+    Fan-out of messages to overlay WebSocket clients.
+    
+    Each client has a bounded queue drained by its own sender task, so broadcasting
+    never waits on a client; clients that fall too far behind are dropped.
+    """
     def __init__(self):
-        self.clients: List[WebSocket] = []
+        # Dicts keep connect/unregister O(1) during reconnect storms
+        self._queues: Dict[WebSocket, asyncio.Queue] = {}
+        self._senders: Dict[WebSocket, asyncio.Task] = {}
+        self._scheduled: Dict[str, asyncio.TimerHandle] = {}
+    @property
+    def clients(self) -> KeysView[WebSocket]:
+        """Connected clients (a live view of the send queues, not a copy)"""
+        return self._queues.keys()
     async def connect(self, ws: WebSocket):
         await ws.accept()
-        self.clients.append(ws)
+        self.register(ws)
+    def register(self, ws: WebSocket):
+        """Start delivering broadcasts to an accepted WebSocket"""
+        send_queue = asyncio.Queue(maxsize=HUB_CLIENT_QUEUE_SIZE)
+        self._queues[ws] = send_queue
+        self._senders[ws] = asyncio.create_task(self._sender(ws, send_queue))
     def unregister(self, ws: WebSocket):
-        if ws in self.clients:
-            self.clients.remove(ws)
+        self._queues.pop(ws, None)
+        sender = self._senders.pop(ws, None)
+        if sender is not None and sender is not asyncio.current_task():
+            sender.cancel()
+    def drop(self, ws: WebSocket):
+        """Unregister a client that can't keep up and close its socket so it reconnects"""
+        self.unregister(ws)
+        asyncio.ensure_future(self._close(ws))
+    async def _close(self, ws: WebSocket):
+        try:
+            await asyncio.wait_for(ws.close(code=HUB_DROP_CLOSE_CODE), timeout=HUB_SEND_TIMEOUT)
+        except Exception as e:
+            logger.debug(f"Failed to close dropped WebSocket client: {e!r}")
     async def broadcast(self, payload: Dict[str, Any]):
-        logger.debug(f"Hub.broadcast called with payload type: {payload.get('type')}")
-        logger.debug(f"Broadcasting to {len(self.clients)} clients")
-        dead = []
-        sent_count = 0
-        for ws in self.clients:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Hub.broadcast called with payload type: {payload.get('type')}")
+        if not self.clients:
+            return
+        await self.broadcast_text(dumps_json(payload))
+    def broadcast_nowait(self, payload: Dict[str, Any]):
+        """Queue a message for every client right away; for sync code that would otherwise create a task"""
+        if self._queues:
+            self.queue_text(dumps_json(payload))
+    async def broadcast_text(self, data: str):
+        """Queue an already serialized message for every client"""
+        self.queue_text(data)
+    def queue_text(self, data: str):
+        """Queue an already serialized message for every client (never waits)"""
+        # Iterate the queues directly (no per-broadcast copy of the client set) and
+        # drop lagging clients once the loop is done
+        lagging = None
+        for ws, send_queue in self._queues.items():
             try:
-                await ws.send_text(json.dumps(payload))
-                sent_count += 1
-                logger.debug(f"Sent message to client {sent_count}/{len(self.clients)}")
-            except Exception as e:
-                logger.warning(f"Failed to send to client: {e}")
-                dead.append(ws)
-        for d in dead:
-            self.unregister(d)
-        logger.debug(f"Broadcast complete: {sent_count} succeeded, {len(dead)} failed")
+                send_queue.put_nowait(data)
+            except asyncio.QueueFull:
+                if lagging is None:
+                    lagging = []
+                lagging.append(ws)
+        if lagging:
+            logger.warning(f"Dropping {len(lagging)} WebSocket client(s) that are not keeping up with broadcasts")
+            for ws in lagging:
+                self.drop(ws)
+    def schedule_broadcast(self, key: str, send: Callable[[], Awaitable[None]]):
+        """
+        Run a broadcast after BROADCAST_COALESCE_DELAY.
+        Scheduling again with the same key before then replaces the pending broadcast.
+        """
+        pending = self._scheduled.pop(key, None)
+        if pending is not None:
+            pending.cancel()
+        loop = asyncio.get_running_loop()
+        self._scheduled[key] = loop.call_later(BROADCAST_COALESCE_DELAY, self._run_scheduled, key, send)
+    def _run_scheduled(self, key: str, send: Callable[[], Awaitable[None]]):
+        self._scheduled.pop(key, None)
+        asyncio.ensure_future(send())
+    def send_to(self, ws: WebSocket, data: str) -> bool:
+        """Queue a serialized message for one client, dropping the client if its queue is full"""
+        send_queue = self._queues.get(ws)
+        if send_queue is None:
+            return False
+        try:
+            send_queue.put_nowait(data)
+            return True
+        except asyncio.QueueFull:
+            logger.warning("Dropping WebSocket client that is not keeping up with broadcasts")
+            self.drop(ws)
+            return False
+    async def _sender(self, ws: WebSocket, send_queue: asyncio.Queue):
+        """Send queued messages to one client until it fails or is unregistered"""
+        try:
+            while True:
+                data = await send_queue.get()
+                if not send_queue.empty():
+                    # Messages queued while the previous send was in flight go out as one
+                    # JSON array frame (unpacked by the frontend) instead of many small frames
+                    batch = [data]
+                    while not send_queue.empty():
+                        batch.append(send_queue.get_nowait())
+                    data = f"[{','.join(batch)}]"
+                await asyncio.wait_for(ws.send_text(data), timeout=HUB_SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Covers timeouts too: a client that can't keep up is dropped
+            logger.warning(f"Failed to send to client: {e!r}")
+            self.drop(ws)
 
 # Use a singleton pattern to prevent hub from being recreated on module reload
 # This is critical for .exe builds where imports can cause module reinitialization
 # We store the hub in builtins which is truly global and survives module reloads
-if not hasattr(builtins, '_chatyapper_hub_instance'):
+hub = getattr(builtins, '_chatyapper_hub_instance', None)
+if hub is None:
     logger.info("Creating new Hub instance (first initialization)")
-    hub = Hub()
-    builtins._chatyapper_hub_instance = hub
+    hub = builtins._chatyapper_hub_instance = Hub()
 else:
-    hub = builtins._chatyapper_hub_instance
     logger.info(f"Hub already exists with {len(hub.clients)} clients (module reload detected)")
 
+# (generation id, serialized slot list); assignments only change when the generation does
+_avatar_slots_json_cache = None
+# (generation id, full avatar_slots_updated message without extra fields)
+_avatar_slots_message_cache = None
+
+PONG_MESSAGE = dumps_json({"type": "pong"})
+# Reply to plain-text connection tests ("hello", "ping", "test")
+TEXT_PONG_MESSAGE = dumps_json({"type": "pong", "message": "ok"})
+
+def build_avatar_slots_message(**extra) -> str:
+    """Serialize an avatar_slots_updated message, encoding the slot list once per generation"""
+    global _avatar_slots_json_cache
+    generation_id = get_avatar_assignments_generation_id()
+    if _avatar_slots_json_cache is None or _avatar_slots_json_cache[0] != generation_id:
+        _avatar_slots_json_cache = (generation_id, dumps_json(get_avatar_slot_assignments()))
+    header = dumps_json({"type": "avatar_slots_updated", "generationId": generation_id, **extra})
+    return f'{header[:-1]},"slots":{_avatar_slots_json_cache[1]}}}'
+
 async def broadcast_avatar_slots():
-    await hub.broadcast({
-        "type": "avatar_slots_updated",
-        "slots": get_avatar_slot_assignments(),
-        "generationId": get_avatar_assignments_generation_id()
-    })
+    global _avatar_slots_message_cache
+    generation_id = get_avatar_assignments_generation_id()
+    if _avatar_slots_message_cache is None or _avatar_slots_message_cache[0] != generation_id:
+        _avatar_slots_message_cache = (generation_id, build_avatar_slots_message())
+    await hub.broadcast_text(_avatar_slots_message_cache[1])
     logger.info("Avatar slot assignments broadcasted to WebSocket clients")
 
 # Initialize avatar slot assignments on startup
@@ -272,45 +390,46 @@ async def ws_endpoint(ws: WebSocket):
         await hub.connect(ws)
         logger.info(f"WebSocket connected successfully. Total clients: {len(hub.clients)}")
         
-        # Reset refresh attempt tracking on new WebSocket connection (indicates page refresh)
-        global twitch_refresh_attempted
-        if twitch_refresh_attempted:
-            logger.info("Resetting token refresh attempt tracking due to new WebSocket connection (page refresh)")
-            twitch_refresh_attempted = False
+        # Reset YouTube refresh attempt tracking on new WebSocket connection (indicates page refresh).
+        # The Twitch backoff is only reset once a token is stored again
+        global youtube_refresh_attempted
+        if youtube_refresh_attempted:
+            logger.info("Resetting YouTube token refresh attempt tracking due to new WebSocket connection (page refresh)")
             youtube_refresh_attempted = False
         
-        # Send a welcome message to confirm connection
+        # Send a welcome message to confirm connection (through the client's queue so
+        # it stays ordered with broadcasts)
         welcome_msg = {
             "type": "connection",
             "message": "WebSocket connected successfully",
             "client_count": len(hub.clients)
         }
-        await ws.send_text(json.dumps(welcome_msg))
+        hub.send_to(ws, dumps_json(welcome_msg))
         logger.info(f"Sent welcome message to WebSocket client {client_info}")
         
         # Send any pending auth error to the new client
         global twitch_auth_error, youtube_auth_error
         if twitch_auth_error:
             logger.info(f"Sending pending Twitch auth error to new client {client_info}")
-            await ws.send_text(json.dumps(twitch_auth_error))
+            hub.send_to(ws, dumps_json(twitch_auth_error))
         if youtube_auth_error:
             logger.info(f"Sending pending YouTube auth error to new client {client_info}")
-            await ws.send_text(json.dumps(youtube_auth_error))
+            hub.send_to(ws, dumps_json(youtube_auth_error))
         
         while True:
             # Handle messages from frontend (avatar slot status updates, etc.)
             message = await ws.receive_text()
-            logger.debug(f"WebSocket received message from {client_info}: {message}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"WebSocket received message from {client_info}: {message}")
             
             try:
-                data = json.loads(message)
-                await handle_websocket_message(data)
-            except json.JSONDecodeError:
+                data = loads_json(message)
+                await handle_websocket_message(data, ws)
+            except ValueError:  # json and orjson decode errors both subclass ValueError
                 # Handle plain text messages (like connection tests)
                 if message.strip().lower() in ['hello', 'ping', 'test']:
                     logger.debug(f"Received connection test message: {message}")
-                    # Optionally send a response
-                    await ws.send_text(json.dumps({"type": "pong", "message": "ok"}))
+                    hub.send_to(ws, TEXT_PONG_MESSAGE)
                 else:
                     logger.warning(f"Invalid JSON received from WebSocket: {message}")
             except Exception as e:
@@ -322,8 +441,8 @@ async def ws_endpoint(ws: WebSocket):
         logger.error(f"WebSocket error from {client_info}: {e}")
         hub.unregister(ws)
 
-async def handle_websocket_message(data: Dict[str, Any]):
-    """Handle incoming WebSocket messages from frontend"""
+async def handle_websocket_message(data: Dict[str, Any], ws: Optional[WebSocket] = None):
+    """Handle incoming WebSocket messages from frontend (ws is the sending client, if known)"""
     message_type = data.get("type", "")
     
     if message_type == "avatar_slot_ended":
@@ -351,23 +470,25 @@ async def handle_websocket_message(data: Dict[str, Any]):
     
     elif message_type == "request_avatar_slots":
         # Frontend requests current avatar slot assignments (for page refresh)
-        slots = get_avatar_slot_assignments()
-        logger.info(f"Frontend requested avatar slots - sending {len(slots)} slots")
-        response = {
-            "type": "avatar_slots_updated",
-            "slots": slots,
-            "generationId": get_avatar_assignments_generation_id(),
-            "activeSlots": list(get_active_avatar_slots().keys()),
-            "queueLength": get_avatar_queue_length()
-        }
-        # Send only to the requesting client (would need to track client in real implementation)
-        # For now, broadcast to all clients
-        await hub.broadcast(response)
-        logger.info(f"Sent avatar slots update to frontend: {len(slots)} slots (gen #{get_avatar_assignments_generation_id()})")
+        response = build_avatar_slots_message(
+            activeSlots=list(get_active_avatar_slots().keys()),
+            queueLength=get_avatar_queue_length()
+        )
+        # Only the requesting client needs the reply; everyone else already got the
+        # broadcast sent when this generation was created
+        if ws is not None:
+            hub.send_to(ws, response)
+        else:
+            await hub.broadcast_text(response)
+        logger.info(f"Sent avatar slots to requesting client: {len(get_avatar_slot_assignments())} slots (gen #{get_avatar_assignments_generation_id()})")
     
     elif message_type == "ping":
-        # Simple ping/pong for connection health
-        await hub.broadcast({"type": "pong"})
+        # Simple ping/pong for connection health; only the client that pinged needs the
+        # pong, broadcasting it made every client's ping reach all N clients
+        if ws is not None:
+            hub.send_to(ws, PONG_MESSAGE)
+        else:
+            await hub.broadcast_text(PONG_MESSAGE)
     
     else:
         logger.info(f"Unknown WebSocket message type: {message_type}")
@@ -379,12 +500,13 @@ def app_get_settings() -> Dict[str, Any]:
     settings = get_settings()
     
     # Initialize global TTS state from settings
-    global tts_enabled
     tts_control = settings.get("ttsControl", {})
-    tts_enabled = tts_control.get("enabled", True)
+    tts_state.enabled = tts_control.get("enabled", True)
     
     return settings
 
+SETTINGS_UPDATED_MESSAGE = {"type": "settings_updated", "message": "Settings updated"}
+
 def app_save_settings(data: Dict[str, Any]):
     """App-specific wrapper for save_settings with TTS and Twitch bot management"""
     # Check if avatar layout settings have changed
@@ -401,7 +523,6 @@ def app_save_settings(data: Dict[str, Any]):
     tts_state_changed = old_tts_enabled != new_tts_enabled
     
     # Update global TTS state and call stop/resume if it changed
-    global tts_enabled
     if tts_state_changed:
         if new_tts_enabled:
             resume_all_tts()
@@ -410,7 +531,7 @@ def app_save_settings(data: Dict[str, Any]):
         logger.info(f"TTS state changed via settings: {'enabled' if new_tts_enabled else 'disabled'}")
     else:
         # Just sync the flag if no change
-        tts_enabled = new_tts_enabled
+        tts_state.enabled = new_tts_enabled
     
     # Check if Twitch settings have changed
     old_twitch_config = old_settings.get("twitch", {})
@@ -431,6 +552,7 @@ def app_save_settings(data: Dict[str, Any]):
     # Use the modules save_settings function but without circular import
     # Save settings first
     save_settings(data)
+    queue_manager.set_max_queue_length(data.get("maxQueuedMessages", queue_manager.MAX_QUEUE_LENGTH))
             
     # Restart Twitch bot only if Twitch settings changed
     if twitch_settings_changed:
@@ -456,32 +578,37 @@ def app_save_settings(data: Dict[str, Any]):
         # Regenerate assignments
         generate_avatar_slot_assignments()
 
-        # Broadcast avatar slots update
-        asyncio.create_task(broadcast_avatar_slots())
+        # Broadcast avatar slots update (coalesced, so a burst of saves sends one update)
+        hub.schedule_broadcast("avatar_slots_updated", broadcast_avatar_slots)
         
     
     # Broadcast refresh message to update Yappers page with new settings
-    asyncio.create_task(hub.broadcast({
-        "type": "settings_updated",
-        "message": "Settings updated"
-    }))
+    hub.schedule_broadcast("settings_updated", lambda: hub.broadcast(SETTINGS_UPDATED_MESSAGE))
+
+async def stop_bot_task(task: Optional[asyncio.Task], name: str) -> bool:
+    """
+    Cancel a chat bot task and wait until it has finished cleaning up.
+    Returns True if a running task was stopped.
+    """
+    if not task or task.done():
+        return False
+    logger.info(f"Stopping existing {name} bot")
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        logger.info(f"{name} bot task cancelled successfully")
+    except Exception as e:
+        # Catch any other errors during cancellation (e.g., twitchio internal errors)
+        logger.warning(f"Error while cancelling {name} bot task: {e}")
+    return True
 
 async def restart_twitch_if_needed(settings: Dict[str, Any]):
     """Restart Twitch bot when settings change"""
     global TwitchTask
     try:
         # Stop existing task if running
-        if TwitchTask and not TwitchTask.done():
-            logger.info("Stopping existing Twitch bot")
-            TwitchTask.cancel()
-            try:
-                await TwitchTask
-            except asyncio.CancelledError:
-                logger.info("Twitch bot task cancelled successfully")
-            except Exception as e:
-                # Catch any other errors during cancellation (e.g., twitchio internal errors)
-                logger.warning(f"Error while cancelling Twitch bot task: {e}")
-            
+        if await stop_bot_task(TwitchTask, "Twitch"):
             # Give TwitchIO's EventSub server more time to fully shut down
             # This prevents CancelledError spam from aiohttp adapter callbacks
             await asyncio.sleep(0.5)
@@ -541,6 +668,78 @@ async def restart_twitch_if_needed(settings: Dict[str, Any]):
 
 
 
+def reset_twitch_refresh_backoff():
+    """Allow the next Twitch auth error to attempt a token refresh right away (called when a token is stored)"""
+    global twitch_refresh_attempts, twitch_refresh_retry_at
+    twitch_refresh_attempts = 0
+    twitch_refresh_retry_at = 0.0
+
+async def refresh_twitch_auth_after_error(context_name: str) -> Optional[bool]:
+    """
+    Refresh the stored Twitch token after an auth error.
+    Concurrent callers share one refresh; failed attempts are spaced with exponential
+    backoff so a token that keeps failing can't cause a refresh loop.
+    
+    Returns:
+        True if a fresh token was stored, False if the refresh failed or was skipped,
+        None if another caller's refresh was already running (that caller handles the result)
+    """
+    global twitch_refresh_task, twitch_refresh_attempts, twitch_refresh_retry_at
+    
+    if twitch_refresh_task is not None and not twitch_refresh_task.done():
+        logger.info(f"Joining in-flight automatic token refresh ({context_name})")
+        await asyncio.shield(twitch_refresh_task)
+        return None
+    
+    now = time.monotonic()
+    if now < twitch_refresh_retry_at:
+        logger.warning(f"Token refresh attempted recently, next automatic retry in {twitch_refresh_retry_at - now:.0f}s ({context_name})")
+        return False
+    
+    # Start the backoff over once the previous window has long passed
+    if now - twitch_refresh_retry_at > TWITCH_REFRESH_BACKOFF_MAX:
+        twitch_refresh_attempts = 0
+    twitch_refresh_retry_at = now + min(TWITCH_REFRESH_BACKOFF_MAX, TWITCH_REFRESH_BACKOFF * 2 ** twitch_refresh_attempts)
+    twitch_refresh_attempts += 1
+    
+    logger.info(f"Attempting automatic token refresh ({context_name})...")
+    twitch_refresh_task = asyncio.create_task(_refresh_twitch_auth(context_name))
+    # Shield so a cancelled caller doesn't cancel the refresh other callers are waiting on
+    return await asyncio.shield(twitch_refresh_task)
+
+async def _refresh_twitch_auth(context_name: str) -> bool:
+    """Refresh the stored Twitch token and verify the account is still valid"""
+    global twitch_auth_error
+    try:
+        # Import here to avoid circular imports
+        from routers.auth import get_auth, refresh_twitch_token, get_twitch_user_info, store_twitch_auth
+        
+        auth = get_auth()
+        if not (auth and auth.refresh_token):
+            logger.warning(f"No refresh token available for automatic refresh ({context_name})")
+            return False
+        
+        logger.info("Refresh token available, attempting refresh...")
+        refreshed_token_data = await refresh_twitch_token(auth.refresh_token)
+        if not refreshed_token_data:
+            logger.error(f"Token refresh failed ({context_name})")
+            return False
+        
+        # Get updated user info to ensure account is still valid
+        user_info = await get_twitch_user_info(refreshed_token_data["access_token"])
+        if not user_info:
+            logger.error(f"Failed to get user info after token refresh ({context_name})")
+            return False
+        
+        # Storing the token also resets the refresh backoff
+        await store_twitch_auth(user_info, refreshed_token_data)
+        # Clear any existing auth error since we have a fresh token
+        twitch_auth_error = None
+        return True
+    except Exception as refresh_error:
+        logger.error(f"Error during automatic token refresh ({context_name}): {refresh_error}")
+        return False
+
 def create_twitch_task_exception_handler(context_name: str):
     """Create a Twitch task exception handler with consistent error handling logic"""
     def handle_twitch_task_exception(task):
@@ -557,64 +756,27 @@ def create_twitch_task_exception_handler(context_name: str):
             logger.info(f"Exception class: {e.__class__.__name__}")
             
             # Check if this is an authentication error
-            error_str = str(e).lower()
-            is_auth_error = (
-                "authentication" in error_str or 
-                "unauthorized" in error_str or 
-                "invalid" in error_str or
-                "access token" in error_str or
-                e.__class__.__name__ == "AuthenticationError"
-            )
+            from modules.twitch_listener import is_twitch_auth_error
+            is_auth_error = is_twitch_auth_error(e)
             
             logger.info(f"Is auth error check: {is_auth_error}")
             
             if is_auth_error:
                 # Attempt automatic token refresh before showing error
                 async def handle_auth_error_with_refresh():
-                    global twitch_refresh_attempted, twitch_auth_error
+                    global twitch_auth_error
                     
                     logger.warning(f"=== AUTHENTICATION ERROR DETECTED IN {context_name.upper()} ===")
                     
-                    # Only attempt refresh once per session to prevent infinite retries
-                    if not twitch_refresh_attempted:
-                        logger.info("Attempting automatic token refresh...")
-                        twitch_refresh_attempted = True
-                        
-                        try:
-                            # Import here to avoid circular imports
-                            from routers.auth import get_auth, refresh_twitch_token, get_twitch_user_info, store_twitch_auth
-                            
-                            auth = get_auth()
-                            if auth and auth.refresh_token:
-                                logger.info("Refresh token available, attempting refresh...")
-                                refreshed_token_data = await refresh_twitch_token(auth.refresh_token)
-                                
-                                if refreshed_token_data:
-                                    # Get updated user info to ensure account is still valid
-                                    user_info = await get_twitch_user_info(refreshed_token_data["access_token"])
-                                    if user_info:
-                                        # Store the refreshed token
-                                        await store_twitch_auth(user_info, refreshed_token_data)
-                                        logger.info("Successfully refreshed token, attempting to restart Twitch bot...")
-                                        
-                                        # Clear any existing auth error since we have a fresh token
-                                        twitch_auth_error = None
-                                        
-                                        # Restart the Twitch bot with new token
-                                        settings = get_settings()
-                                        await restart_twitch_if_needed(settings)
-                                        logger.info("Twitch bot restarted after token refresh")
-                                        return  # Success! Don't show error
-                                    else:
-                                        logger.error("Failed to get user info after token refresh")
-                                else:
-                                    logger.error("Token refresh failed")
-                            else:
-                                logger.warning("No refresh token available for automatic refresh")
-                        except Exception as refresh_error:
-                            logger.error(f"Error during automatic token refresh: {refresh_error}")
-                    else:
-                        logger.warning("Token refresh already attempted in this session, skipping automatic retry")
+                    refreshed = await refresh_twitch_auth_after_error(context_name)
+                    if refreshed is None:
+                        return  # The handler that started the refresh restarts the bot or shows the error
+                    if refreshed:
+                        logger.info("Successfully refreshed token, attempting to restart Twitch bot...")
+                        settings = get_settings()
+                        await restart_twitch_if_needed(settings)
+                        logger.info("Twitch bot restarted after token refresh")
+                        return  # Success! Don't show error
                     
                     # If we reach here, refresh failed or was already attempted - show error
                     logger.info(f"WebSocket clients available: {len(hub.clients)}")
@@ -652,55 +814,18 @@ async def handle_twitch_task_creation_error(create_error: Exception, context_nam
     logger.info(f"ERROR: Failed to create Twitch task during {context_name}: {create_error}")
     
     # Check if the creation error itself is an auth error
-    error_str = str(create_error).lower()
-    is_auth_error = (
-        "authentication" in error_str or 
-        "unauthorized" in error_str or 
-        "invalid" in error_str or
-        "access token" in error_str
-    )
-    
-    if is_auth_error:
+    from modules.twitch_listener import is_twitch_auth_error
+    if is_twitch_auth_error(create_error):
         logger.warning(f"=== AUTHENTICATION ERROR DURING TASK CREATION ({context_name.upper()}) ===")
         
         # Attempt automatic token refresh before showing error
-        global twitch_refresh_attempted, twitch_auth_error
-        
-        # Only attempt refresh once per session to prevent infinite retries
-        if not twitch_refresh_attempted:
-            logger.info("Attempting automatic token refresh during task creation...")
-            twitch_refresh_attempted = True
-            
-            try:
-                # Import here to avoid circular imports
-                from routers.auth import get_auth, refresh_twitch_token, get_twitch_user_info, store_twitch_auth
-                
-                auth = get_auth()
-                if auth and auth.refresh_token:
-                    logger.info("Refresh token available, attempting refresh...")
-                    refreshed_token_data = await refresh_twitch_token(auth.refresh_token)
-                    
-                    if refreshed_token_data:
-                        # Get updated user info to ensure account is still valid
-                        user_info = await get_twitch_user_info(refreshed_token_data["access_token"])
-                        if user_info:
-                            # Store the refreshed token
-                            await store_twitch_auth(user_info, refreshed_token_data)
-                            logger.info("Successfully refreshed token during task creation, will retry bot startup")
-                            
-                            # Clear any existing auth error since we have a fresh token
-                            twitch_auth_error = None
-                            return  # Success! Let the caller retry
-                        else:
-                            logger.error("Failed to get user info after token refresh during task creation")
-                    else:
-                        logger.error("Token refresh failed during task creation")
-                else:
-                    logger.warning("No refresh token available for automatic refresh during task creation")
-            except Exception as refresh_error:
-                logger.error(f"Error during automatic token refresh in task creation: {refresh_error}")
-        else:
-            logger.warning("Token refresh already attempted in this session, showing error for task creation")
+        global twitch_auth_error
+        refreshed = await refresh_twitch_auth_after_error(f"{context_name} task creation")
+        if refreshed is None:
+            return  # The handler that started the refresh shows any error
+        if refreshed:
+            logger.info("Successfully refreshed token during task creation, will retry bot startup")
+            return  # Success! Let the caller retry
         
         # If we reach here, refresh failed or was already attempted - store and broadcast error
         twitch_auth_error = {
@@ -818,19 +943,8 @@ async def restart_youtube_if_needed(settings: Dict[str, Any]):
     """Restart YouTube bot when settings change"""
     global YouTubeTask
     try:
-        # Stop existing task if running
-        if YouTubeTask and not YouTubeTask.done():
-            logger.info("Stopping existing YouTube bot")
-            YouTubeTask.cancel()
-            try:
-                await YouTubeTask
-            except asyncio.CancelledError:
-                logger.info("YouTube bot task cancelled successfully")
-            except Exception as e:
-                logger.warning(f"Error while cancelling YouTube bot task: {e}")
-            
-            # Give YouTube API more time to fully clean up
-            await asyncio.sleep(0.5)
+        # Stop existing task if running (awaiting it already waits for its cleanup)
+        await stop_bot_task(YouTubeTask, "YouTube")
         
         # Start new task if enabled
         if run_youtube_bot and settings.get("youtube", {}).get("enabled"):
@@ -899,6 +1013,12 @@ async def get_youtube_token_for_bot():
 
 # ---------- Message Filtering ----------
 
+def clear_active_tts_job(username_lower: str, task: Optional[asyncio.Task] = None):
+    """Forget a user's active TTS job, unless a newer message from the user has replaced it"""
+    job_info = active_tts_jobs.get(username_lower)
+    if job_info is not None and (task is None or job_info.get("task") is task):
+        del active_tts_jobs[username_lower]
+
 def cancel_user_tts(username: str):
     """
     Cancel any active TTS for a specific user.
@@ -907,12 +1027,11 @@ def cancel_user_tts(username: str):
     logger.info(f"Attempting to cancel TTS for user: {username}")
     
     # Cancel active TTS job if exists
-    if username_lower in active_tts_jobs:
-        job_info = active_tts_jobs[username_lower]
+    job_info = active_tts_jobs.pop(username_lower, None)
+    if job_info is not None:
         if job_info["task"] and not job_info["task"].done():
             job_info["task"].cancel()
             logger.info(f"Cancelled active TTS for user: {username} (message: {job_info['message'][:50]}...)")
-        del active_tts_jobs[username_lower]
         # Note: Counter will be decremented by the cancelled task's exception handler
         
         # Process any queued parallel messages now that a slot is free
@@ -920,19 +1039,20 @@ def cancel_user_tts(username: str):
     else:
         logger.info(f"No active TTS found for user: {username}")
     
-    # Broadcast cancellation to clients with stop command
-    asyncio.create_task(hub.broadcast({
+    # Broadcast cancellation to clients with stop command (queued directly, no task
+    # per call; cancellations in a burst reach clients as one batched frame)
+    hub.broadcast_nowait({
         "type": "tts_cancelled",
         "user": username,
         "message": f"TTS cancelled for {username}",
         "stop_audio": True  # Tell frontend to stop playing audio immediately
-    }))
+    })
 
 def stop_all_tts():
     """
     Stop all TTS jobs
     """
-    global active_tts_jobs, tts_enabled, total_active_tts_count
+    global active_tts_jobs, total_active_tts_count
     
     logger.info(f"Stopping all TTS - {total_active_tts_count} active jobs")
     
@@ -950,40 +1070,36 @@ def stop_all_tts():
     total_active_tts_count = 0
     
     # Disable TTS processing
-    tts_enabled = False
+    tts_state.enabled = False
     
     logger.info(f"All TTS stopped - cancelled {cancelled_count} active jobs")
     
     # Broadcast global stop to clients with immediate stop command
-    asyncio.create_task(hub.broadcast({
+    hub.broadcast_nowait({
         "type": "tts_global_stopped",
         "message": "All TTS stopped",
         "cancelled_count": cancelled_count,
         "stop_all_audio": True  # Tell frontend to stop all playing audio immediately
-    }))
+    })
 
 def resume_all_tts():
     """
     Resume TTS processing (doesn't restore cancelled jobs, just allows new ones)
     """
-    global tts_enabled
-    
-    tts_enabled = True
+    tts_state.enabled = True
     logger.info("TTS processing resumed")
     
     # Broadcast resume to clients
-    asyncio.create_task(hub.broadcast({
+    hub.broadcast_nowait({
         "type": "tts_global_resumed", 
         "message": "TTS processing resumed"
-    }))
+    })
 
 def toggle_tts():
     """
     Toggle TTS on/off and save state to database
     """
-    global tts_enabled
-    
-    if tts_enabled:
+    if tts_state.enabled:
         stop_all_tts()
         new_state = False
     else:
@@ -1002,12 +1118,46 @@ def toggle_tts():
 
 # ---------- TTS Pipeline ----------
 
+def build_play_payload(evt: Dict[str, Any], event_type: str, voice, audio_url: str) -> Dict[str, Any]:
+    """Build the "play" WebSocket payload for a synthesized message"""
+    return {
+        "type": "play",
+        "user": evt.get("user"),
+        "message": evt.get("text"),
+        "eventType": event_type,
+        "voice": {
+            "id": voice.id,
+            "name": voice.name,
+            "provider": voice.provider,
+            "avatar": voice.avatar_image
+        },
+        "audioUrl": audio_url
+    }
+
+class TestVoice(NamedTuple):
+    """Temporary voice used for test events; mirrors the Voice fields the TTS path reads"""
+    id: str
+    name: str
+    provider: str
+    voice_id: str
+    avatar_image: Optional[str] = None
+    enabled: bool = True
+    
+    @classmethod
+    def from_data(cls, data: Dict[str, Any]) -> "TestVoice":
+        return cls(
+            id="test",
+            name=data.get("name", "Test Voice"),
+            provider=data.get("provider", "unknown"),
+            voice_id=data.get("voice_id", ""),
+        )
+
 async def handle_test_voice_event(evt: Dict[str, Any]):
     """Handle test voice events - bypasses parallel limits for testing"""
-    logger.info(f"Handling test voice event: {evt}")
+    logger.debug(f"Handling test voice event: {evt}")
     
     # Check if TTS is globally enabled
-    if not tts_enabled:
+    if not tts_state.enabled:
         logger.info(f"TTS is disabled - skipping test voice message from {evt.get('user', 'unknown')}")
         return
     
@@ -1022,8 +1172,9 @@ async def handle_test_voice_event(evt: Dict[str, Any]):
     task = asyncio.current_task()
     
     # Check if user already has an active job and cancel it
-    if username_lower in active_tts_jobs:
-        old_task = active_tts_jobs[username_lower].get("task")
+    old_job = active_tts_jobs.get(username_lower)
+    if old_job is not None:
+        old_task = old_job.get("task")
         if old_task and not old_task.done():
             old_task.cancel()
             logger.info(f"Cancelled previous TTS for test user {username}")
@@ -1041,18 +1192,8 @@ async def handle_test_voice_event(evt: Dict[str, Any]):
             logger.info("No test voice data provided")
             return
         
-        # Create a temporary voice object for testing
-        class TestVoice:
-            def __init__(self, data):
-                self.id = "test"
-                self.name = data.get("name", "Test Voice")
-                self.provider = data.get("provider", "unknown")
-                self.voice_id = data.get("voice_id", "")
-                self.avatar_image = None
-                self.enabled = True
-        
-        selected_voice = TestVoice(test_voice_data)
-        logger.info(f"Test voice: {selected_voice.name} ({selected_voice.provider})")
+        selected_voice = TestVoice.from_data(test_voice_data)
+        logger.info(f"Test voice event: voice={selected_voice.name} ({selected_voice.provider})")
 
         # Get TTS configuration
         tts_config = settings.get("tts", {})
@@ -1065,54 +1206,40 @@ async def handle_test_voice_event(evt: Dict[str, Any]):
         # Use hybrid provider
         provider = await get_hybrid_provider(
             monster_api_key=monster_api_key if monster_api_key else None,
-            monster_voice_id=selected_voice.voice_id if selected_voice.provider == "monstertts" else None,
-            edge_voice_id=selected_voice.voice_id if selected_voice.provider == "edge" else None,
-            fallback_voices=[selected_voice],
             google_api_key=google_api_key if google_api_key else None,
             polly_config=polly_config if polly_config.get("accessKey") and polly_config.get("secretKey") else None
         )
         
         # Create and process TTS job
-        job = TTSJob(text=evt.get('text', '').strip(), voice=selected_voice.voice_id, audio_format=audio_format)
-        logger.info(f"Test TTS Job: text='{job.text}', voice='{selected_voice.name}' ({selected_voice.provider}:{selected_voice.voice_id})")
-
-        logger.info(f"Starting test TTS synthesis...")
-        path = await provider.synth(job)
-        logger.info(f"Test TTS generated: {path}")
+        # Only retry the selected voice, so a failed test isn't played with a different voice
+        job = TTSJob(text=evt.get('text', '').strip(), voice=selected_voice.voice_id, audio_format=audio_format,
+                     provider=selected_voice.provider, fallback_voices=[selected_voice])
+        logger.debug(f"Test TTS Job: text='{job.text}', voice='{selected_voice.name}' ({selected_voice.provider}:{selected_voice.voice_id})")
+
+        path = await get_or_synth(provider, job, selected_voice.provider)
+        if not path:
+            logger.error(f"Test TTS failed for voice {selected_voice.name} ({selected_voice.provider})")
+            clear_active_tts_job(username_lower, task)
+            return
+        logger.debug(f"Test TTS generated: {path}")
         
         # Broadcast to clients
-        voice_info = {
-            "id": selected_voice.id,
-            "name": selected_voice.name,
-            "provider": selected_voice.provider,
-            "avatar": selected_voice.avatar_image
-        }
-        payload = {
-            "type": "play",
-            "user": evt.get("user"),
-            "message": evt.get("text"),
-            "eventType": evt.get("eventType", "chat"),
-            "voice": voice_info,
-            "audioUrl": f"/audio/{os.path.basename(path)}"
-        }
-        logger.info(f"Broadcasting test voice to {len(hub.clients)} clients")
+        payload = build_play_payload(evt, evt.get("eventType", "chat"), selected_voice, f"/audio/{os.path.basename(path)}")
+        logger.debug(f"Broadcasting test voice to {len(hub.clients)} clients")
         await hub.broadcast(payload)
         
         # Clean up TTS job tracking (test voices don't affect counter)
-        if username_lower in active_tts_jobs:
-            del active_tts_jobs[username_lower]
-        logger.info(f"Test TTS complete. Counter unaffected: {total_active_tts_count}")
+        clear_active_tts_job(username_lower, task)
+        logger.debug(f"Test TTS complete. Counter unaffected: {total_active_tts_count}")
         
     except asyncio.CancelledError:
         logger.info(f"Test TTS cancelled for user: {evt.get('user')}")
-        if username_lower in active_tts_jobs:
-            del active_tts_jobs[username_lower]
+        clear_active_tts_job(username_lower, task)
         logger.info(f"Cleaned up cancelled test job. Counter unaffected: {total_active_tts_count}")
         raise
     except Exception as e:
         logger.error(f"Test TTS error for {username_lower}: {e}", exc_info=True)
-        if username_lower in active_tts_jobs:
-            del active_tts_jobs[username_lower]
+        clear_active_tts_job(username_lower, task)
         logger.info(f"Cleaned up failed test job. Counter unaffected: {total_active_tts_count}")
         # Test voices don't affect parallel limit counter
 
@@ -1124,18 +1251,16 @@ async def check_parallel_limits_and_process(evt: Dict[str, Any], is_test_voice:
     global total_active_tts_count
     
     username = evt.get('user', 'unknown')
-    settings = app_get_settings()
-    parallel_limit = settings.get("parallelMessageLimit", 5)
-    queue_overflow = settings.get("queueOverflowMessages", True)
+    parallel_limit = get_parallel_limit()
     current_active = total_active_tts_count
     
     # Check if we have a limit and if it's exceeded
-    if parallel_limit is not None and isinstance(parallel_limit, (int, float)) and parallel_limit > 0 and current_active >= parallel_limit:
+    if parallel_limit and current_active >= parallel_limit:
         logger.info(f"Parallel limit reached ({current_active}/{parallel_limit}) for {username}")
         
-        if queue_overflow and not is_test_voice:  # Don't queue test voices
+        if get_setting("queueOverflowMessages", True) and not is_test_voice:  # Don't queue test voices
             queue_parallel_message(evt)
-            logger.info(f"Message queued due to parallel limit (queue size: {len(parallel_message_queue)})")
+            logger.info(f"Message queued due to parallel limit (queue size: {get_parallel_queue_length()})")
         else:
             logger.info(f"Message from {username} ignored due to parallel limit")
         return False
@@ -1154,10 +1279,12 @@ async def check_parallel_limits_and_process(evt: Dict[str, Any], is_test_voice:
 
 async def handle_event(evt: Dict[str, Any]):
     """Handle regular chat events with message filtering and parallel limiting"""
-    logger.info(f"Handling event: {evt}")
+    # The full event repr includes tags and user text, so only build it when it will be logged
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Handling event: {evt}")
     
     # Check if TTS is globally enabled
-    if not tts_enabled:
+    if not tts_state.enabled:
         logger.info(f"TTS is disabled - skipping message from {evt.get('user', 'unknown')}")
         return
 
@@ -1184,10 +1311,25 @@ async def handle_event(evt: Dict[str, Any]):
     await check_parallel_limits_and_process(evt_filtered, is_test_voice=False)
     
     if filtered_text != original_text:
-        logger.info(f"Text after filtering: '{filtered_text}'")
+        logger.debug(f"Text after filtering: '{filtered_text}'")
+
+def pick_random_voice(voices: List[Any], avoid_voice_id=None):
+    """
+    Pick a voice uniformly at random, avoiding avoid_voice_id when another voice exists.
+    O(1): no filtered copy of the list and no scan for the avoided voice.
+    """
+    count = len(voices)
+    index = random.randrange(count)
+    if count >= 2 and voices[index].id == avoid_voice_id:
+        # Landed on the avoided voice: move to one of the other count - 1 positions at
+        # random, which keeps every other voice equally likely
+        index = (index + 1 + random.randrange(count - 1)) % count
+    return voices[index]
 
 async def process_tts_message(evt: Dict[str, Any]):
     """Process TTS message with simple audio duration-based limiting"""
+    # Checked once so the per-message debug lines below don't format strings when DEBUG is off
+    debug = logger.isEnabledFor(logging.DEBUG)
     username = evt.get('user', 'unknown')
     username_lower = username.lower()
     
@@ -1239,9 +1381,10 @@ async def process_tts_message(evt: Dict[str, Any]):
     
     # Check if slot has an assigned voice
     if slot_voice_id is not None:
-        selected_voice = next((v for v in enabled_voices if v.id == slot_voice_id), None)
+        selected_voice = get_enabled_voice_by_id(slot_voice_id)
         if selected_voice:
-            logger.info(f"Using slot-assigned voice: {selected_voice.name} ({selected_voice.provider}) for slot {target_slot['id']}")
+            if debug:
+                logger.debug(f"Using slot-assigned voice: {selected_voice.name} ({selected_voice.provider}) for slot {target_slot['id']}")
         else:
             logger.warning(f"Slot {target_slot['id']} has voice_id {slot_voice_id} but voice not found in enabled voices, will select randomly")
     
@@ -1249,46 +1392,37 @@ async def process_tts_message(evt: Dict[str, Any]):
     if not selected_voice and event_type in special:
         vid = special[event_type].get("voiceId")
         # Validate vid is a proper integer/string ID, not a function name or corrupted value
-        if vid and not str(vid).isdigit() and str(vid) not in ["get_by_id", "null", "undefined", ""]:
-            logger.warning(f"Invalid voice ID '{vid}' in special event mapping for {event_type}, will use random voice instead")
+        vid_str = str(vid) if vid else ""
+        if vid_str and not vid_str.isdigit():
+            if vid_str not in ("get_by_id", "null", "undefined"):
+                logger.warning(f"Invalid voice ID '{vid}' in special event mapping for {event_type}, will use random voice instead")
             vid = None
         # Try to find the voice by database ID
         if vid:
-            selected_voice = next((v for v in enabled_voices if str(v.id) == str(vid)), None)
+            selected_voice = get_enabled_voice_by_id(vid)
             if not selected_voice:
                 logger.warning(f"Special event voice ID {vid} for {event_type} not found in enabled voices, will use random voice instead")
-            else:
-                logger.info(f"Special event voice selected: {selected_voice.name} ({selected_voice.provider})")
+            elif debug:
+                logger.debug(f"Special event voice selected: {selected_voice.name} ({selected_voice.provider})")
     
     # If still no voice selected, choose randomly (avoiding last voice if possible)
     if not selected_voice:
         global last_selected_voice_id
         
-        # If we have more than 2 voices, avoid selecting the same voice as last time
-        if len(enabled_voices) >= 2 and last_selected_voice_id is not None:
-            available_voices = [v for v in enabled_voices if v.id != last_selected_voice_id]
-            if available_voices:
-                selected_voice = random.choice(available_voices)
-                logger.info(f"Random voice selected (avoiding last voice): {selected_voice.name} ({selected_voice.provider})")
-            else:
-                # Fallback if filtering didn't work
-                selected_voice = random.choice(enabled_voices)
-                logger.info(f"Random voice selected (fallback): {selected_voice.name} ({selected_voice.provider})")
-        else:
-            # Not enough voices to avoid repetition, or no last voice tracked
-            selected_voice = random.choice(enabled_voices)
-            logger.info(f"Random voice selected: {selected_voice.name} ({selected_voice.provider})")
+        selected_voice = pick_random_voice(enabled_voices, last_selected_voice_id)
+        if debug:
+            logger.debug(f"Random voice selected: {selected_voice.name} ({selected_voice.provider})")
         
         # Update last selected voice only when randomly selected (not for slot-assigned or special event voices)
         last_selected_voice_id = selected_voice.id
     
     # Track voice usage for distribution analysis
-    global voice_usage_stats, voice_selection_count
-    voice_key = f"{selected_voice.name} ({selected_voice.provider})"
+    global voice_selection_count
+    voice_key = get_voice_display_key(selected_voice)
     voice_usage_stats[voice_key] += 1
     voice_selection_count += 1
 
-    logger.info(f"Selected voice: {selected_voice.name} ({selected_voice.provider})")
+    logger.info(f"TTS event={event_type} user={username} voice={voice_key}")
 
     # Get TTS configuration
     tts_config = settings.get("tts", {})
@@ -1307,21 +1441,19 @@ async def process_tts_message(evt: Dict[str, Any]):
     # Use hybrid provider that handles all providers with rate limiting and fallback
     provider = await get_hybrid_provider(
         monster_api_key=monster_api_key if monster_api_key else None,
-        monster_voice_id=selected_voice.voice_id if selected_voice.provider == "monstertts" else None,
-        edge_voice_id=selected_voice.voice_id if selected_voice.provider == "edge" else None,
-        fallback_voices=enabled_voices,
         google_api_key=google_api_key if google_api_key else None,
         polly_config=polly_config if polly_config.get("accessKey") and polly_config.get("secretKey") else None
     )
     
     # Create TTS job with the selected voice
-    job = TTSJob(text=evt.get('text', '').strip(), voice=selected_voice.voice_id, audio_format=audio_format)
-    logger.info(f"TTS Job: text='{job.text}', voice='{selected_voice.name}' ({selected_voice.provider}:{selected_voice.voice_id}), format='{job.audio_format}'")
+    job = TTSJob(text=evt.get('text', '').strip(), voice=selected_voice.voice_id, audio_format=audio_format, provider=selected_voice.provider)
+    if debug:
+        logger.debug(f"TTS Job: text='{job.text}', voice='{selected_voice.name}' ({selected_voice.provider}:{selected_voice.voice_id}), format='{job.audio_format}'")
     
     try:
-        logger.info(f"Starting TTS synthesis for {evt.get('user')}...")
-        path = await provider.synth(job)
-        logger.info(f"TTS generated: {path}")
+        path = await get_or_synth(provider, job, selected_voice.provider)
+        if debug:
+            logger.debug(f"TTS generated: {path}")
         
         # Apply audio filters if enabled
         audio_filter_settings = settings.get("audioFilters", {})
@@ -1331,11 +1463,16 @@ async def process_tts_message(evt: Dict[str, Any]):
             filter_processor = get_audio_filter_processor()
             random_filters = audio_filter_settings.get("randomFilters", False)
             
-            # Apply filters (returns new path and duration)
-            filtered_path, filtered_duration = filter_processor.apply_filters(
+            # Apply filters (returns new path and duration). ffmpeg runs as a blocking
+            # subprocess, so keep it off the event loop.
+            # Keep the input since it may be a shared cached file
+            input_path = path
+            filtered_path, filtered_duration = await asyncio.to_thread(
+                filter_processor.apply_filters,
                 path,
                 audio_filter_settings,
-                random_filters=random_filters
+                random_filters=random_filters,
+                keep_input=True
             )
             
             # Use filtered audio and its duration
@@ -1344,8 +1481,8 @@ async def process_tts_message(evt: Dict[str, Any]):
             
             # If filter didn't return duration, it means no filters were applied
             if audio_duration is None:
-                audio_duration = get_audio_duration(path)
-                if path == filtered_path:
+                audio_duration = await asyncio.to_thread(get_audio_duration, path)
+                if path == input_path:
                     # Path unchanged means filters were skipped (no effects enabled)
                     logger.debug("Audio filters skipped (no individual effects enabled)")
                 else:
@@ -1355,69 +1492,47 @@ async def process_tts_message(evt: Dict[str, Any]):
                 logger.info(f"Audio filters applied: {path} (new duration: {audio_duration:.2f}s)")
         else:
             # Get audio duration for accurate slot timeout (no filters applied)
-            audio_duration = get_audio_duration(path)
+            audio_duration = await asyncio.to_thread(get_audio_duration, path)
         
         # We already found the slot earlier (before voice selection)
         # No need to find it again here
         
         audio_url = f"/audio/{os.path.basename(path)}"
         
-        # Debug logging for .exe troubleshooting
-        logger.info(f"=== TTS AUDIO GENERATED ===")
-        logger.info(f"Audio file path: {path}")
-        logger.info(f"Audio file exists: {os.path.exists(path)}")
-        logger.info(f"Audio file size: {os.path.getsize(path) if os.path.exists(path) else 'N/A'} bytes")
-        logger.info(f"Audio URL: {audio_url}")
-        logger.info(f"Audio duration: {audio_duration}s")
-        logger.info(f"AUDIO_DIR: {AUDIO_DIR}")
+        # Debug logging for .exe troubleshooting (skips the stat call unless enabled)
+        if debug:
+            try:
+                audio_size = f"{os.path.getsize(path)} bytes"
+            except OSError:
+                audio_size = "missing"
+            logger.debug(
+                f"TTS audio generated: path={path} size={audio_size} url={audio_url} "
+                f"duration={audio_duration}s AUDIO_DIR={AUDIO_DIR}"
+            )
         
-        # Create base payload
-        voice_info = {
-            "id": selected_voice.id,
-            "name": selected_voice.name,
-            "provider": selected_voice.provider,
-            "avatar": selected_voice.avatar_image
-        }
-        
-        base_payload = {
-            "type": "play",
-            "user": evt.get("user"),
-            "message": evt.get("text"),
-            "eventType": event_type,
-            "voice": voice_info,
-            "audioUrl": audio_url
-        }
+        base_payload = build_play_payload(evt, event_type, selected_voice, audio_url)
         
         if target_slot:
-            # Slot available - reserve it and send enhanced payload
+            # Slot available - reserve it and send the payload with slot details
             reserve_avatar_slot(target_slot["id"], username, audio_url, audio_duration)
             
-            enhanced_payload = base_payload.copy()
-            enhanced_payload.update({
-                "targetSlot": {
-                    "id": target_slot["id"],
-                    "x_position": target_slot.get("x_position", 50),
-                    "y_position": target_slot.get("y_position", 50),
-                    "size": target_slot.get("size", 100)
-                },
-                "avatarData": target_slot["avatarData"],
-                "generationId": get_avatar_assignments_generation_id()
-            })
+            base_payload["targetSlot"] = {
+                "id": target_slot["id"],
+                "x_position": target_slot.get("x_position", 50),
+                "y_position": target_slot.get("y_position", 50),
+                "size": target_slot.get("size", 100)
+            }
+            base_payload["avatarData"] = target_slot["avatarData"]
+            base_payload["generationId"] = get_avatar_assignments_generation_id()
             
-            logger.info(f"Broadcasting TTS with slot {target_slot['id']} to {len(hub.clients)} clients")
-            logger.info(f"=== BROADCASTING WEBSOCKET MESSAGE ===")
-            logger.info(f"Message type: play")
-            logger.info(f"Target slot: {target_slot['id']}")
-            logger.info(f"Audio URL in payload: {enhanced_payload.get('audioUrl')}")
-            logger.info(f"Connected WebSocket clients: {len(hub.clients)}")
-            logger.info(f"Payload keys: {list(enhanced_payload.keys())}")
+            if debug:
+                logger.debug(f"Broadcasting TTS with slot {target_slot['id']} to {len(hub.clients)} clients, audio URL: {audio_url}")
             
-            await hub.broadcast(enhanced_payload)
-            logger.info(f"=== BROADCAST COMPLETE ===")
+            await hub.broadcast(base_payload)
         else:
             # No slots available - queue the message
             logger.info(f"All slots busy, queuing TTS for {username}")
-            queue_avatar_message(base_payload)
+            queue_avatar_message(base_payload, audio_duration)
             
             # Still broadcast a notification that the message is queued
             queue_notification = {
@@ -1442,24 +1557,22 @@ async def process_tts_message(evt: Dict[str, Any]):
         asyncio.create_task(decrement_after_audio())
         
         # Clean up job tracking (we only needed it for potential cancellation during processing)
-        if username_lower in active_tts_jobs:
-            del active_tts_jobs[username_lower]
+        clear_active_tts_job(username_lower, task)
         
-        logger.info(f"TTS generation complete for {username}. Counter: {total_active_tts_count}")
+        if debug:
+            logger.debug(f"TTS generation complete for {username}. Counter: {total_active_tts_count}")
             
     except asyncio.CancelledError:
         logger.info(f"TTS synthesis cancelled for user: {username}")
         # Clean up job tracking
-        if username_lower in active_tts_jobs:
-            del active_tts_jobs[username_lower]
+        clear_active_tts_job(username_lower, task)
         # Counter was already incremented, so decrement it on cancellation
         decrement_tts_count()
         raise  # Re-raise to properly handle cancellation
     except Exception as e:
         logger.error(f"TTS synthesis error for {username}: {e}", exc_info=True)
         # Clean up job tracking
-        if username_lower in active_tts_jobs:
-            del active_tts_jobs[username_lower]
+        clear_active_tts_job(username_lower, task)
         # Counter was already incremented, so decrement it on error
         decrement_tts_count()
         # Process any queued parallel messages now that a slot is free
@@ -1522,6 +1635,36 @@ except Exception as e:
 # ---------- Avatar Slot Management API ----------
 # Avatar slot endpoints have been moved to routers/avatars.py
 
+# Interval for the voice distribution summary, kept out of the per-message path
+VOICE_STATS_LOG_INTERVAL = 60.0
+voice_stats_task = None
+
+def log_voice_distribution(stats: Dict[str, int], total: int, label: str):
+    """Log a sorted voice usage summary"""
+    logger.info(f"{label} Voice Distribution Summary (after {total} selections):")
+    counted = sum(stats.values())
+    for voice_name, count in sorted(stats.items(), key=lambda x: x[1], reverse=True):
+        percentage = (count / counted) * 100 if counted else 0
+        logger.info(f"   {voice_name}: {count} times ({percentage:.1f}%)")
+
+async def log_voice_distribution_periodically(interval: float = VOICE_STATS_LOG_INTERVAL):
+    """Log voice distribution summaries on a timer, only when new selections happened"""
+    from modules import tts as tts_module
+    
+    last_main_count = 0
+    last_fallback_count = 0
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if voice_selection_count and voice_selection_count != last_main_count:
+                last_main_count = voice_selection_count
+                log_voice_distribution(dict(voice_usage_stats), last_main_count, "Main")
+            if tts_module.fallback_selection_count and tts_module.fallback_selection_count != last_fallback_count:
+                last_fallback_count = tts_module.fallback_selection_count
+                log_voice_distribution(dict(tts_module.fallback_voice_stats), last_fallback_count, "Fallback")
+        except Exception as e:
+            logger.debug(f"Failed to log voice distribution: {e}")
+
 def custom_exception_handler(loop, context):
     """
     Custom exception handler to suppress harmless TwitchIO internal errors during shutdown.
@@ -1559,6 +1702,11 @@ async def startup():
     loop.set_exception_handler(custom_exception_handler)
     logger.info("Custom exception handler installed for cleaner TwitchIO shutdown")
     
+    warm_up_connection_pool()
+    
+    global voice_stats_task
+    voice_stats_task = asyncio.create_task(log_voice_distribution_periodically())
+    
     try:
         # Broadcast initial avatar slot assignments to any connected clients
         await broadcast_avatar_slots()
@@ -1566,6 +1714,7 @@ async def startup():
         
         settings = app_get_settings()
         logger.info(f"Settings loaded, Twitch enabled: {settings.get('twitch', {}).get('enabled')}")
+        queue_manager.set_max_queue_length(settings.get("maxQueuedMessages", queue_manager.MAX_QUEUE_LENGTH))
         
         if run_twitch_bot and settings.get("twitch", {}).get("enabled"):
             # Check if bot is already running (prevent duplicate starts)
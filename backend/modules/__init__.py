@@ -1,9 +1,16 @@
 """
 Shared dependencies and utilities for the application
 """
+import json
 import os
 import sys
 
+# orjson is optional; it serializes several times faster than the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 def is_executable():
     """
     Detect if running as a frozen executable (PyInstaller or Nuitka).
@@ -33,6 +40,21 @@ def get_env_var(key, default=""):
     
     return default
 
+def dumps_json(data) -> str:
+    """Serialize data to a compact JSON string, using orjson when available"""
+    if orjson is not None:
+        # OPT_NON_STR_KEYS matches json.dumps, which stringifies int keys
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    # ensure_ascii=False matches orjson's output; chat text is full of emoji and non-Latin
+    # scripts, and \u escapes would make those frames several times larger
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+def loads_json(data):
+    """Parse a JSON string or bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 # Initialize logging
 logger = setup_backend_logging()
 
@@ -5,6 +5,7 @@ Supports: reverb, echo, pitch shift, speed change, and random combinations.
 import os
 import random
 import subprocess
+import uuid
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 
@@ -60,7 +61,8 @@ class AudioFilterProcessor:
         self,
         input_path: str,
         filter_settings: Dict[str, Any],
-        random_filters: bool = False
+        random_filters: bool = False,
+        keep_input: bool = False
     ) -> tuple[str, Optional[float]]:
         """
         Apply audio filters to the input file.
@@ -70,6 +72,7 @@ class AudioFilterProcessor:
             input_path: Path to input audio file
             filter_settings: Dictionary of filter settings from config
             random_filters: If True, randomly select and apply filters
+            keep_input: If True, leave the input file in place (e.g. cached audio)
         
         Returns:
             Tuple of (output_file_path, audio_duration_in_seconds)
@@ -85,7 +88,11 @@ class AudioFilterProcessor:
         
         # Generate output filename
         input_file = Path(input_path)
-        output_path = str(input_file.parent / f"{input_file.stem}_filtered{input_file.suffix}")
+        if keep_input:
+            # The input can be shared (cached), so give each render its own output file
+            output_path = str(input_file.parent / f"{input_file.stem}_filtered_{uuid.uuid4().hex[:8]}{input_file.suffix}")
+        else:
+            output_path = str(input_file.parent / f"{input_file.stem}_filtered{input_file.suffix}")
         
         # Build ffmpeg filter chain
         filters = []
@@ -157,11 +164,12 @@ class AudioFilterProcessor:
             logger.info(f"Audio filtered successfully: {output_path} (duration: {duration:.2f}s)")
             
             # Delete original file to save space
-            try:
-                os.remove(input_path)
-                logger.debug(f"Deleted original audio file: {input_path}")
-            except Exception as e:
-                logger.warning(f"Failed to delete original file: {e}")
+            if not keep_input:
+                try:
+                    os.remove(input_path)
+                    logger.debug(f"Deleted original audio file: {input_path}")
+                except Exception as e:
+                    logger.warning(f"Failed to delete original file: {e}")
             
             return output_path, duration
             
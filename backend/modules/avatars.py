@@ -4,7 +4,7 @@ import time
 
 from modules import logger
 from modules.persistent_data import get_enabled_avatars
-from modules.persistent_data import get_settings
+from modules.persistent_data import get_settings, get_enabled_voice_by_id
 
 avatar_slot_assignments = []  # List of slot objects with avatar assignments
 active_avatar_slots = {}  # slot_id -> {"user": str, "start_time": float, "audio_url": str, "audio_duration": float}
@@ -210,7 +210,7 @@ def find_available_slot_for_tts(voice_id=None, user=None):
         return None
     
     # Get current timestamp for cleanup
-    current_time = time.time()
+    current_time = time.monotonic()
     
     # Clean up expired active slots (safety mechanism in case frontend doesn't report end)
     expired_slots = []
@@ -226,12 +226,6 @@ def find_available_slot_for_tts(voice_id=None, user=None):
         logger.info(f"Cleaning up expired active slot: {slot_id}")
         del active_avatar_slots[slot_id]
     
-    # Get list of valid voice IDs for validation
-    from modules.persistent_data import get_voices
-    voices_data = get_voices()
-    voices_list = voices_data.get("voices", [])
-    valid_voice_ids = {voice["id"] for voice in voices_list if voice.get("enabled", False)}
-    
     # Find slots that match the voice_id if specified
     matching_slots = []
     available_slots = []
@@ -254,11 +248,9 @@ def find_available_slot_for_tts(voice_id=None, user=None):
                 if slot_voice_id is None:
                     # Random slot - matches any voice
                     matching_slots.append(slot)
-                elif slot_voice_id == voice_id and slot_voice_id in valid_voice_ids:
-                    # Exact match with valid voice
-                    matching_slots.append(slot)
-                elif slot_voice_id not in valid_voice_ids:
-                    # Voice was deleted - treat as random
+                elif slot_voice_id == voice_id or get_enabled_voice_by_id(slot_voice_id) is None:
+                    # Exact match, or voice was deleted/disabled - treat as random.
+                    # Uses the cached enabled-voice index instead of reading the voice table
                     matching_slots.append(slot)
     
     # Prefer voice-matched slots if available
@@ -283,7 +275,7 @@ def reserve_avatar_slot(slot_id, user, audio_url, audio_duration=None):
     
     active_avatar_slots[slot_id] = {
         "user": user,
-        "start_time": time.time(),
+        "start_time": time.monotonic(),
         "audio_url": audio_url,
         "audio_duration": audio_duration or 30  # Default to 30s if duration not provided
     }
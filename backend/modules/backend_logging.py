@@ -1,5 +1,8 @@
+import atexit
 import logging
+import queue
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from . import is_executable
 
@@ -39,9 +42,13 @@ def setup_backend_logging():
         console_formatter = logging.Formatter('%(levelname)s: %(message)s')
         console_handler.setFormatter(console_formatter)
         
-        # Add handlers
-        backend_logger.addHandler(file_handler)
-        backend_logger.addHandler(console_handler)
+        # Log calls only enqueue the record; formatting and file/console writes happen on the
+        # listener thread so they never block the event loop
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        backend_logger.addHandler(QueueHandler(log_queue))
     
     backend_logger.info(f"Backend logging initialized - log file: {log_filename}")
     return backend_logger
@@ -10,10 +10,13 @@ This module provides functionality for:
 import re
 import time
 from collections import defaultdict, deque
-from typing import Dict, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any
 
 from modules import logger
 
+# Minimum delay between two sweeps of idle users out of the message history
+HISTORY_SWEEP_INTERVAL = 30.0
+
 
 class MessageHistory:
     """
@@ -33,11 +36,14 @@ class MessageHistory:
         
         # Per-user rate limiting: {username: [timestamp1, timestamp2, ...]}
         self.user_timestamps: Dict[str, deque] = defaultdict(lambda: deque(maxlen=100))
+        self._last_sweep_time = 0.0
     
-    def _cleanup_old_timestamps(self):
+    def _cleanup_old_timestamps(self, current_time: Optional[float] = None):
         """Remove timestamps older than max_age_seconds"""
-        current_time = time.time()
+        if current_time is None:
+            current_time = time.time()
         cutoff_time = current_time - self.max_age_seconds
+        self._last_sweep_time = current_time
         
         # Clean up user timestamps
         for username, timestamps in list(self.user_timestamps.items()):
@@ -46,6 +52,19 @@ class MessageHistory:
             if not timestamps:
                 del self.user_timestamps[username]
     
+    def _get_pruned_timestamps(self, username: str, current_time: float) -> deque:
+        """Get a user's timestamps with expired entries dropped"""
+        # Sweeping every user on each message is O(users); only this user's
+        # timestamps are pruned inline and idle users are swept periodically
+        if current_time - self._last_sweep_time >= HISTORY_SWEEP_INTERVAL:
+            self._cleanup_old_timestamps(current_time)
+        
+        timestamps = self.user_timestamps[username.lower()]
+        cutoff_time = current_time - self.max_age_seconds
+        while timestamps and timestamps[0] < cutoff_time:
+            timestamps.popleft()
+        return timestamps
+    
     def add_message(self, username: str, text: str) -> None:
         """
         Add a message timestamp for rate limiting tracking.
@@ -54,13 +73,10 @@ class MessageHistory:
             username: Username who sent the message
             text: Message text (not used for rate limiting, but kept for compatibility)
         """
-        self._cleanup_old_timestamps()
-        
         timestamp = time.time()
-        username_lower = username.lower()
         
         # Add timestamp for rate limiting
-        self.user_timestamps[username_lower].append(timestamp)
+        self._get_pruned_timestamps(username, timestamp).append(timestamp)
     
     def is_spam(
         self, 
@@ -79,26 +95,59 @@ class MessageHistory:
         Returns:
             (is_spam, reason)
         """
-        self._cleanup_old_timestamps()
+        timestamps = self.user_timestamps.get(username.lower())
+        if not timestamps:
+            return False, None
         
-        username_lower = username.lower()
-        current_time = time.time()
-        cutoff_time = current_time - time_window_seconds
+        cutoff_time = time.time() - time_window_seconds
         
-        if username_lower not in self.user_timestamps:
-            return False, None
+        # Timestamps are in arrival order, so count back from the newest and stop
+        # at the first one outside the window
+        recent_count = 0
+        for ts in reversed(timestamps):
+            if ts < cutoff_time:
+                break
+            recent_count += 1
+        
+        if recent_count >= max_messages:
+            return True, f"Rate limit exceeded for {username} ({recent_count} messages in {time_window_seconds}s)"
+        
+        return False, None
+    
+    def check_and_add(
+        self, 
+        username: str, 
+        max_messages: int = 5, 
+        time_window_seconds: int = 10
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Check if user is spamming and, if not, record the message.
         
-        # Count recent messages
-        recent_count = sum(1 for ts in self.user_timestamps[username_lower] if ts >= cutoff_time)
+        Same result as is_spam() followed by add_message(), with one username lookup and clock read.
+        
+        Returns:
+            (is_spam, reason)
+        """
+        timestamp = time.time()
+        timestamps = self._get_pruned_timestamps(username, timestamp)
+        
+        window_start = timestamp - time_window_seconds
+        recent_count = 0
+        for ts in reversed(timestamps):
+            if ts < window_start:
+                break
+            recent_count += 1
         
         if recent_count >= max_messages:
             return True, f"Rate limit exceeded for {username} ({recent_count} messages in {time_window_seconds}s)"
         
+        timestamps.append(timestamp)
         return False, None
     
     def clear(self):
         """Clear all message history (useful for testing)"""
         self.user_timestamps.clear()
+        self._last_sweep_time = 0.0
     
     def get_stats(self) -> Dict:
         """Get statistics about current message history"""
@@ -112,12 +161,168 @@ class MessageHistory:
 # Global instance
 _message_history = MessageHistory()
 
+# Messages starting with one of these are treated as chat commands
+COMMAND_PREFIXES = ('!', '/')
+
+# Twitch emotes tag: "emoteid:start-end,start-end/emoteid:start-end".
+# Emote IDs never contain "-", so every start-end pair can be read in one scan
+_EMOTE_RANGE_RE = re.compile(r"(\d+)-(\d+)")
+
+# Patterns used on every message, compiled once
+_MENTION_RE = re.compile(r'@\w+')
+# Fallback emote detection when no emotes tag is available: Unicode emoji blocks
+# (pictographs, symbols, dingbats, flags), plus the joiner, variation selector and tag
+# characters used to build emoji sequences
+_EMOJI_RE = re.compile(
+    '[\U0001F000-\U0001FAFF\u2300-\u23FF\u2600-\u27BF\u2B00-\u2BFF'
+    '\u200D\uFE0F\U000E0020-\U000E007F]+'
+)
+# Matches http/https, www, and bare domains with common TLDs. Bare domains are only tried
+# from the start of a word, so matching stays linear in the message length, and the TLD
+# must end at a word boundary so words like "so.cool" aren't mistaken for links
+_URL_RE = re.compile(
+    r'(?:https?://|www\.)\S+'
+    r'|(?<!\S)\S+?\.(?:com|org|net|edu|gov|mil|int|co|io|ly|me|tv|fm|gg|tk|ml|ga|cf)\b\S*',
+    re.IGNORECASE
+)
+
+
+class FilterRules:
+    """
+    Lookup structures derived from a messageFiltering settings dict.
+    
+    Built once per settings object instead of on every message.
+    """
+    
+    def __init__(self, filtering: Dict[str, Any]):
+        # Plain settings, read once here so each message reads attributes instead of
+        # probing the settings dict with defaults
+        self.skip_commands = filtering.get("skipCommands", True)
+        self.skip_mentions = filtering.get("skipMentions", False)
+        self.skip_emotes = filtering.get("skipEmotes", False)
+        self.remove_urls = filtering.get("removeUrls", True)
+        self.min_length = filtering.get("minLength", 1)
+        self.max_length = filtering.get("maxLength", 500)
+        self.ignore_if_speaking = filtering.get("ignoreIfUserSpeaking", False)
+        self.spam_filter = filtering.get("enableSpamFilter", True)
+        self.spam_threshold = filtering.get("spamThreshold", 5)
+        self.spam_window = filtering.get("spamTimeWindow", 10)
+        
+        profanity_config = filtering.get("profanityFilter") or {}
+        self.profanity_enabled = profanity_config.get("enabled", False)
+        self.profanity_replacement = profanity_config.get("replacement", "beep")
+        
+        self.ignored_users = frozenset(
+            str(user).lower() for user in filtering.get("ignoredUsers") or []
+        )
+        # All custom profanity words fused into one whole-word, case-insensitive
+        # alternation, so a message is scanned once however many words there are
+        custom_words = profanity_config.get("customWords") or []
+        words = {word.strip().lower() for word in custom_words if isinstance(word, str) and word.strip()}
+        self.profanity_re = None
+        if words:
+            # Longest first so a word never loses to a shorter word it starts with
+            alternation = '|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+            self.profanity_re = re.compile(r'\b(?:' + alternation + r')\b', re.IGNORECASE)
+        
+        # True when no filter can change or reject a message (only the length cap is left),
+        # so should_process_message can skip the pipeline entirely
+        self.passthrough = not (
+            self.ignored_users or self.skip_commands or self.skip_mentions or self.skip_emotes
+            or self.remove_urls or (self.profanity_enabled and self.profanity_re is not None)
+            or self.min_length > 1 or self.ignore_if_speaking or self.spam_filter
+        )
+
+
+# Shared default for missing settings sections and tags; never modified. A fresh {} per
+# message would also defeat the identity-keyed caches below.
+_EMPTY: Dict[str, Any] = {}
+
+# (filtering dict, rules) for the most recently seen settings. Cached settings hand out the
+# same messageFiltering dict until they are saved again, so an identity check is enough.
+_filter_rules_cache: Optional[Tuple[Dict[str, Any], FilterRules]] = None
+
+
+def get_filter_rules(filtering: Dict[str, Any]) -> FilterRules:
+    """Get the FilterRules for a messageFiltering dict, rebuilding them when the dict changes"""
+    global _filter_rules_cache
+    if _filter_rules_cache is None or _filter_rules_cache[0] is not filtering:
+        _filter_rules_cache = (filtering, FilterRules(filtering))
+    return _filter_rules_cache[1]
+
+
+# (redeemFilter dict, lowercased allowlist), cached by identity like _filter_rules_cache
+_redeem_allowlist_cache: Optional[Tuple[Dict[str, Any], frozenset]] = None
+
+
+def get_redeem_allowlist(redeem_filter: Dict[str, Any]) -> frozenset:
+    """Get the lowercased allowedRedeemNames of a redeemFilter dict, rebuilding it when the dict changes"""
+    global _redeem_allowlist_cache
+    if _redeem_allowlist_cache is None or _redeem_allowlist_cache[0] is not redeem_filter:
+        allowed_redeem_names = redeem_filter.get("allowedRedeemNames", []) or []
+        allowlist = frozenset(
+            str(r).strip().lower()
+            for r in allowed_redeem_names
+            if str(r).strip()
+        )
+        _redeem_allowlist_cache = (redeem_filter, allowlist)
+    return _redeem_allowlist_cache[1]
+
 
 def get_message_history() -> MessageHistory:
     """Get the global message history instance"""
     return _message_history
 
 
+def collapse_whitespace(text: str) -> str:
+    """Collapse runs of whitespace into single spaces and strip the ends"""
+    # split() with no separator is done in C and is faster than re.sub(r'\s+', ' ', ...)
+    return ' '.join(text.split())
+
+
+# (emotes tag, parsed ranges) for the last tag seen; emote spam repeats the same tag
+_emote_ranges_cache: Optional[Tuple[str, List[Tuple[int, int]]]] = None
+
+
+def parse_emote_ranges(emotes_tag: str) -> List[Tuple[int, int]]:
+    """
+    Parse a Twitch emotes tag into sorted (start, end) character ranges.
+    
+    Positions are inclusive on both ends. Malformed entries are skipped.
+    The returned list may be shared with later calls and must not be modified.
+    """
+    global _emote_ranges_cache
+    if not isinstance(emotes_tag, str):
+        return []
+    if _emote_ranges_cache is not None and _emote_ranges_cache[0] == emotes_tag:
+        return _emote_ranges_cache[1]
+    emote_ranges = [(int(start), int(end)) for start, end in _EMOTE_RANGE_RE.findall(emotes_tag)]
+    emote_ranges.sort()
+    _emote_ranges_cache = (emotes_tag, emote_ranges)
+    return emote_ranges
+
+
+def remove_ranges(text: str, ranges: List[Tuple[int, int]]) -> str:
+    """
+    Remove sorted, inclusive (start, end) character ranges from text.
+    
+    Overlapping or duplicate ranges are merged as the sweep goes, so the text is
+    copied once in slices regardless of how many ranges there are.
+    """
+    parts = []
+    pos = 0
+    for start, end in ranges:
+        if start > pos:
+            parts.append(text[pos:start])
+        if end >= pos:
+            pos = end + 1
+    if not parts:
+        # Only the tail is left (e.g. emote-only messages), no join needed
+        return text[pos:]
+    parts.append(text[pos:])
+    return ''.join(parts)
+
+
 def should_process_message(
     text: str, 
     settings: Dict[str, Any], 
@@ -138,18 +343,25 @@ def should_process_message(
     Returns:
         (should_process, filtered_text) - tuple indicating if message should be processed and the filtered text
     """
+    # Nothing to speak (e.g. subscription events without a message); process_tts_message
+    # would skip these anyway, so don't run any filters on them
+    if not text or text.isspace():
+        return False, text or ""
+    
+    if tags is None:
+        tags = _EMPTY
+    
     # Check Twitch channel point redeem filter first — this applies regardless of
     # whether general message filtering is enabled or disabled.
-    twitch_settings = settings.get("twitch", {})
-    redeem_filter = twitch_settings.get("redeemFilter", {})
+    redeem_filter = settings.get("twitch", _EMPTY).get("redeemFilter", _EMPTY)
     if redeem_filter.get("enabled", False):
         # Twitch IRC PRIVMSG tags include custom-reward-id (UUID) for channel point redeems,
         # but do NOT include the reward title/name.
         # Exception: the built-in "Highlight My Message" reward uses msg-id=highlighted-message
         # instead of custom-reward-id, so we treat that as a valid redeem with the
         # identifier "highlighted-message".
-        custom_reward_id = (tags.get("custom-reward-id", "") or "") if tags else ""
-        msg_id = (tags.get("msg-id", "") or "") if tags else ""
+        custom_reward_id = tags.get("custom-reward-id") or ""
+        msg_id = tags.get("msg-id") or ""
         is_highlight = msg_id.lower() == "highlighted-message"
         redeem_identifier = custom_reward_id or ("highlighted-message" if is_highlight else "")
 
@@ -158,12 +370,7 @@ def should_process_message(
             logger.info(f"Skipping message from {username} - not from a channel point redeem")
             return False, text
 
-        allowed_redeem_names = redeem_filter.get("allowedRedeemNames", []) or []
-        normalized_allowed = {
-            str(r).strip().lower()
-            for r in allowed_redeem_names
-            if str(r).strip()
-        }
+        normalized_allowed = get_redeem_allowlist(redeem_filter)
         if normalized_allowed and redeem_identifier.lower() not in normalized_allowed:
             logger.info(
                 f"Skipping channel point redeem from {username} - reward ID not in allowlist: {redeem_identifier}"
@@ -172,29 +379,32 @@ def should_process_message(
 
         logger.info(f"Processing channel point redeem from {username} (reward-id: {redeem_identifier})")
 
-    filtering = settings.get("messageFiltering", {})
+    filtering = settings.get("messageFiltering", _EMPTY)
 
     if not filtering.get("enabled", True):
         return True, text
     
-    # Skip ignored users
-    if username and filtering.get("ignoredUsers"):
-        ignored_users = filtering.get("ignoredUsers", [])
-        # Case-insensitive comparison
-        if any(username.lower() == ignored_user.lower() for ignored_user in ignored_users):
-            logger.info(f"Skipping message from ignored user: {username}")
-            return False, text
+    rules = get_filter_rules(filtering)
+    if rules.passthrough and len(text) <= rules.max_length:
+        return True, text
     
-    # Skip commands if enabled (messages starting with ! or /)
-    if filtering.get("skipCommands", True):
-        stripped = text.strip()
-        if stripped.startswith('!') or stripped.startswith('/'):
+    username_lower = username.lower() if username else ""
+    
+    # Skip ignored users (case-insensitive)
+    if username_lower and username_lower in rules.ignored_users:
+        logger.info(f"Skipping message from ignored user: {username}")
+        return False, text
+    
+    # Skip commands if enabled (messages starting with ! or /).
+    # lstrip() returns the same string when there is no leading whitespace, so this doesn't copy
+    if rules.skip_commands:
+        if text.lstrip().startswith(COMMAND_PREFIXES):
             logger.info(f"Skipping command message: {text[:50]}...")
             return False, text
 
     # Skip messages that @mention someone
-    if filtering.get("skipMentions", False):
-        if re.search(r'@\w+', text):
+    if rules.skip_mentions:
+        if _MENTION_RE.search(text):
             logger.info(f"Skipping mention message from {username}: {text[:50]}...")
             return False, text
     
@@ -202,45 +412,24 @@ def should_process_message(
     filtered_text = text
     
     # Remove emotes if enabled (and skip emote-only messages)
-    if filtering.get("skipEmotes", False):
+    if rules.skip_emotes:
         # Use Twitch tags to detect and remove emotes if available
-        if tags and "emotes" in tags and tags["emotes"]:
+        if tags.get("emotes"):
             # Twitch emotes tag format: "emoteid:start-end,start-end/emoteid:start-end"
             # Example: "25:0-4,6-10/1902:12-20" means emote 25 at positions 0-4 and 6-10, emote 1902 at 12-20
             emotes_tag = tags["emotes"]
             
             # Parse emote positions to get character ranges that are emotes
-            emote_ranges = []
-            try:
-                for emote_data in emotes_tag.split('/'):
-                    if ':' not in emote_data:
-                        continue
-                    emote_id, positions = emote_data.split(':', 1)
-                    for pos_range in positions.split(','):
-                        if '-' in pos_range:
-                            start, end = pos_range.split('-')
-                            # Emote positions are byte positions (inclusive on both ends)
-                            emote_ranges.append((int(start), int(end)))
-            except (ValueError, AttributeError) as e:
-                logger.warning(f"Failed to parse emotes tag '{emotes_tag}': {e}")
+            emote_ranges = parse_emote_ranges(emotes_tag)
+            if not emote_ranges:
+                logger.warning(f"Failed to parse emotes tag '{emotes_tag}'")
             
             if emote_ranges:
-                # Sort ranges by start position
-                emote_ranges.sort()
-                
-                # Build a set of all character positions that are part of emotes
-                emote_positions_set = set()
-                for start, end in emote_ranges:
-                    for i in range(start, end + 1):  # inclusive range
-                        emote_positions_set.add(i)
-                
-                # Build text without emotes by keeping only non-emote characters
-                text_without_emotes = ''.join(
-                    char for i, char in enumerate(filtered_text) if i not in emote_positions_set
-                )
+                # Twitch positions index the original message, so always slice text itself
+                text_without_emotes = remove_ranges(text, emote_ranges)
                 
                 # Clean up extra whitespace
-                text_without_emotes = re.sub(r'\s+', ' ', text_without_emotes).strip()
+                text_without_emotes = collapse_whitespace(text_without_emotes)
                 
                 # If nothing remains after removing emotes, skip the message entirely
                 if not text_without_emotes:
@@ -253,72 +442,57 @@ def should_process_message(
                     filtered_text = text_without_emotes
             # else: No valid emote ranges parsed, continue without emote filtering
         else:
-            # Fallback: Simple check for common emote patterns if no tags available
-            text_without_emotes = re.sub(r'\b\w+\d+\b', '', filtered_text)  # Remove emotes like PogChamp123
-            text_without_emotes = re.sub(r'[^\w\s]', '', text_without_emotes)  # Remove special characters
-            text_without_emotes = text_without_emotes.strip()
+            # Fallback: Skip emoji-only messages if no tags available. Every character the
+            # pattern matches is non-ASCII, so plain ASCII lines (most chat) skip the regex.
+            if filtered_text.isascii():
+                text_without_emotes = filtered_text
+            else:
+                text_without_emotes = _EMOJI_RE.sub('', filtered_text).strip()
             
             if not text_without_emotes:
                 logger.info(f"Skipping emote-only message (fallback detection): {text[:50]}...")
                 return False, text
     
     # Remove URLs if enabled
-    if filtering.get("removeUrls", True):
-        # URL regex pattern that matches http/https, www, and common TLDs
-        url_pattern = r'https?://[^\s]+|www\.[^\s]+|[^\s]+\.(com|org|net|edu|gov|mil|int|co|io|ly|me|tv|fm|gg|tk|ml|ga|cf)[^\s]*'
+    if rules.remove_urls:
         original_length = len(filtered_text)
-        filtered_text = re.sub(url_pattern, '', filtered_text, flags=re.IGNORECASE)
-        filtered_text = re.sub(r'\s+', ' ', filtered_text).strip()  # Clean up extra spaces
+        # Every URL the pattern matches contains "." or "://"; most chat lines contain
+        # neither, and the substring checks are far cheaper than the regex
+        if '.' in filtered_text or '://' in filtered_text:
+            filtered_text = _URL_RE.sub('', filtered_text)
+        filtered_text = collapse_whitespace(filtered_text)  # Clean up extra spaces
         
         if len(filtered_text) != original_length:
             logger.info(f"Removed URLs from message: '{text[:50]}...' -> '{filtered_text[:50]}...'")
     
     # Apply profanity filter if enabled
-    profanity_config = filtering.get("profanityFilter", {})
-    if profanity_config.get("enabled", False):
-        custom_words = profanity_config.get("customWords", [])
-        replacement = profanity_config.get("replacement", "beep")
+    if rules.profanity_enabled and rules.profanity_re is not None:
+        original_text = filtered_text
+        filtered_text, replaced = rules.profanity_re.subn(rules.profanity_replacement, filtered_text)
         
-        if custom_words:
-            original_text = filtered_text
-            
-            for word in custom_words:
-                if not word.strip():
-                    continue
-                    
-                # Escape special regex characters in the word
-                escaped_word = re.escape(word.strip())
-                
-                # Full replacement with word boundaries for case-insensitive matching
-                pattern = r'\b' + escaped_word + r'\b'
-                filtered_text = re.sub(pattern, replacement, filtered_text, flags=re.IGNORECASE)
-            
-            if filtered_text != original_text:
-                logger.info(f"Applied profanity filter: '{original_text[:50]}...' -> '{filtered_text[:50]}...'")
+        if replaced:
+            logger.info(f"Applied profanity filter: '{original_text[:50]}...' -> '{filtered_text[:50]}...'")
     
     # Check minimum length (after filtering)
-    min_length = filtering.get("minLength", 1)
+    min_length = rules.min_length
     if len(filtered_text) < min_length:
         logger.info(f"Skipping message too short after filtering ({len(filtered_text)} < {min_length}): {filtered_text}")
         return False, filtered_text
     
     # Truncate if over maximum length
-    max_length = filtering.get("maxLength", 500)
+    max_length = rules.max_length
     if len(filtered_text) > max_length:
         truncated_text = filtered_text[:max_length].strip()
         # Try to end at a word boundary
-        if ' ' in truncated_text:
-            last_space = truncated_text.rfind(' ')
-            if last_space > max_length * 0.8:  # Only use word boundary if it's not too short
-                truncated_text = truncated_text[:last_space]
+        head, sep, _ = truncated_text.rpartition(' ')
+        if sep and len(head) > max_length * 0.8:  # Only use word boundary if it's not too short
+            truncated_text = head
         
         logger.info(f"Truncating message from {len(filtered_text)} to {len(truncated_text)} characters")
         return True, truncated_text
     
     # Check if user is already speaking (ignore new messages while TTS is active)
-    if filtering.get("ignoreIfUserSpeaking", False) and active_tts_jobs is not None:
-        username_lower = username.lower() if username else ""
-        
+    if rules.ignore_if_speaking and active_tts_jobs is not None:
         # Check if user has any active TTS jobs
         user_has_active_tts = username_lower in active_tts_jobs
         
@@ -327,24 +501,18 @@ def should_process_message(
             return False, filtered_text
 
     # Check for spam (single user rate limiting)
-    if username and filtering.get("enableSpamFilter", True):
-        spam_threshold = filtering.get("spamThreshold", 5)
-        spam_window = filtering.get("spamTimeWindow", 10)
-        
-        is_spam, reason = _message_history.is_spam(
+    if username and rules.spam_filter:
+        # Messages that pass are added to the history for rate limiting tracking
+        is_spam, reason = _message_history.check_and_add(
             username, 
-            max_messages=spam_threshold, 
-            time_window_seconds=spam_window
+            max_messages=rules.spam_threshold, 
+            time_window_seconds=rules.spam_window
         )
         
         if is_spam:
             logger.info(f"Skipping spam message: {reason}")
             return False, filtered_text
     
-    # Add message to history for rate limiting tracking
-    if username and filtering.get("enableSpamFilter", True):
-        _message_history.add_message(username, filtered_text)
-    
     return True, filtered_text
 
 
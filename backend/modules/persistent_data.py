@@ -4,6 +4,7 @@ import sys
 import tempfile
 import json
 import hashlib
+import math
 from datetime import datetime
 
 from modules import logger, get_env_var, log_important
@@ -75,7 +76,30 @@ os.makedirs(AUDIO_DIR, exist_ok=True)
 logger.info(f"Audio directory set to: {AUDIO_DIR}")
 
 # Database setup
-engine = create_engine(f"sqlite:///{DB_PATH}", echo=False, connect_args={"check_same_thread": False})
+# Keep a pool of warm connections so per-request sessions don't pay connect overhead.
+# pre_ping/recycle are left off: a local SQLite file never drops connections.
+DB_POOL_SIZE = 10
+DB_MAX_OVERFLOW = 20
+engine = create_engine(
+    f"sqlite:///{DB_PATH}",
+    echo=False,
+    connect_args={"check_same_thread": False},
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW
+)
+
+def warm_up_connection_pool():
+    """Open pool_size connections up front so the first requests reuse warm connections"""
+    connections = []
+    try:
+        for _ in range(DB_POOL_SIZE):
+            connections.append(engine.connect())
+    except Exception as e:
+        logger.warning(f"Database pool warmup stopped early: {e}")
+    finally:
+        for connection in connections:
+            connection.close()
+    logger.info(f"Database connection pool warmed up ({len(connections)} connections)")
 
 # OAuth state tracking
 oauth_states = {}
@@ -85,15 +109,75 @@ def get_database_session():
     with Session(engine) as session:
         yield session
 
+# Merged settings are cached between reads.
+# Any code that writes the Setting row must call invalidate_settings_cache().
+_settings_version = 0
+_settings_cache = None
+_settings_cache_version = -1
+# settings_defaults.json ships with the app and doesn't change while it runs
+_defaults_cache = None
+
+def invalidate_settings_cache():
+    """Mark the cached settings as stale after a Setting table change"""
+    global _settings_version
+    _settings_version += 1
+
 def get_settings() -> dict:
     """Get application settings from database, merged with defaults for any missing keys"""
-    import json
+    global _settings_cache, _settings_cache_version
+    if _settings_cache is None or _settings_cache_version != _settings_version:
+        version = _settings_version
+        settings = _load_settings()
+        if settings is None:
+            # Nothing usable was loaded; fall back without caching so the next call retries
+            return _load_defaults()
+        _settings_cache = settings
+        _settings_cache_version = version
+    # Shallow copy so callers adding or replacing top-level keys don't alter the cache
+    return dict(_settings_cache)
+
+def get_setting(key: str, default=None):
+    """
+    Get a single top-level setting without copying the whole settings dict.
+    The returned value is shared with the cache and must not be modified.
+    """
+    if _settings_cache is None or _settings_cache_version != _settings_version:
+        return get_settings().get(key, default)
+    return _settings_cache.get(key, default)
+
+_parallel_limit = 0
+_parallel_limit_version = -1
+
+def get_parallel_limit() -> int:
+    """
+    Get parallelMessageLimit as a whole number of messages, 0 meaning unlimited.
+    The setting is normalized once per settings change instead of on every message.
+    """
+    global _parallel_limit, _parallel_limit_version
+    if _parallel_limit_version != _settings_version:
+        version = _settings_version
+        value = get_setting("parallelMessageLimit", 5)
+        _parallel_limit = math.ceil(value) if isinstance(value, (int, float)) and value > 0 else 0
+        _parallel_limit_version = version
+    return _parallel_limit
+
+def _load_defaults() -> dict:
+    """Read settings_defaults.json (once), or an empty dict if it can't be read"""
+    global _defaults_cache
+    if _defaults_cache is None:
+        try:
+            if os.path.exists(DEFAULTS_PATH):
+                with open(DEFAULTS_PATH, 'r', encoding='utf-8') as f:
+                    _defaults_cache = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading settings defaults: {e}")
+            return {}
+    return dict(_defaults_cache or {})
+
+def _load_settings():
+    """Read settings from the database merged with defaults, or None if they could not be read"""
     try:
-        # Load defaults
-        defaults = {}
-        if os.path.exists(DEFAULTS_PATH):
-            with open(DEFAULTS_PATH, 'r', encoding='utf-8') as f:
-                defaults = json.load(f)
+        defaults = _load_defaults()
         
         with Session(engine) as session:
             row = session.exec(select(Setting).where(Setting.key == "settings")).first()
@@ -106,14 +190,14 @@ def get_settings() -> dict:
                 return merged
             else:
                 logger.error("No settings found in database!")
-                return defaults
+                return None
     except Exception as e:
         logger.error(f"Error loading settings: {e}")
-        return {}
+        return None
 
 def save_settings(data: dict):
     """Save application settings to database (basic version without app-specific logic)"""
-    import json
+    global _settings_cache, _settings_cache_version
     try:
         with Session(engine) as session:
             row = session.exec(select(Setting).where(Setting.key == "settings")).first()
@@ -121,6 +205,11 @@ def save_settings(data: dict):
                 row.value_json = json.dumps(data)
                 session.add(row)
                 session.commit()
+                # Seed the cache with what was just written so the next read skips the database.
+                # Decoding the stored JSON keeps the cache independent of the caller's dict.
+                invalidate_settings_cache()
+                _settings_cache = {**_load_defaults(), **json.loads(row.value_json)}
+                _settings_cache_version = _settings_version
                 logger.info(f"Settings saved to database: {DB_PATH}")
             else:
                 logger.error("Could not find settings row to update!")
@@ -276,7 +365,6 @@ def delete_twitch_auth():
 
 def save_twitch_auth(user_info: dict, token_data: dict):
     """Store or update Twitch auth in database"""
-    from datetime import datetime
     
     with Session(engine) as session:
         # Check if auth already exists for this user
@@ -351,7 +439,6 @@ def delete_youtube_auth():
 
 def save_youtube_auth(channel_info: dict, token_data: dict):
     """Store or update YouTube auth in database"""
-    from datetime import datetime
     
     with Session(engine) as session:
         # Check if auth already exists for this channel
@@ -404,11 +491,47 @@ def get_youtube_token():
     
     return None
 
+# Cached enabled voices - the Voice table changes rarely but is read for every chat message.
+# Any code that writes Voice rows must call invalidate_voices_cache().
+_voices_version = 0
+_voices_cache = None
+_voices_cache_version = -1
+# voice id -> "Name (provider)" for the cached voices, rebuilt with the cache
+_voice_display_keys = {}
+# str(voice id) -> cached enabled voice
+_enabled_voices_by_id = {}
+
+def invalidate_voices_cache():
+    """Mark the enabled voices cache as stale after a Voice table change"""
+    global _voices_version
+    _voices_version += 1
+
 def get_enabled_voices():
-    with Session(engine) as session:
-        enabled_voices = session.exec(select(Voice).where(Voice.enabled == True)).all()
-        return enabled_voices
-    return None
+    """Get enabled voices, only querying the database when the voice table changed"""
+    global _voices_cache, _voices_cache_version, _voice_display_keys, _enabled_voices_by_id
+    if _voices_cache is None or _voices_cache_version != _voices_version:
+        version = _voices_version
+        with Session(engine) as session:
+            enabled_voices = session.exec(select(Voice).where(Voice.enabled == True)).all()
+            # Detach so cached objects never trigger lazy loads on a closed session
+            session.expunge_all()
+        _voices_cache = list(enabled_voices)
+        _voice_display_keys = {v.id: f"{v.name} ({v.provider})" for v in _voices_cache}
+        _enabled_voices_by_id = {str(v.id): v for v in _voices_cache}
+        _voices_cache_version = version
+    return _voices_cache
+
+def get_enabled_voice_by_id(voice_id):
+    """Look up an enabled voice by its database ID (int or numeric string), or None"""
+    get_enabled_voices()  # Refresh the lookup if the voice table changed
+    return _enabled_voices_by_id.get(str(voice_id))
+
+def get_voice_display_key(voice) -> str:
+    """Get the "Name (provider)" label of a voice, reusing the string built for cached voices"""
+    key = _voice_display_keys.get(voice.id)
+    if key is None:
+        key = f"{voice.name} ({voice.provider})"
+    return key
 
 def get_voices():
     with Session(engine) as session:
@@ -438,6 +561,7 @@ def add_voice(new_voice: Voice):
         session.add(new_voice)
         session.commit()
         session.refresh(new_voice)
+    invalidate_voices_cache()
 
 def remove_voice(voice_id: int):
     """Remove a voice by its ID"""
@@ -446,6 +570,7 @@ def remove_voice(voice_id: int):
         if voice:
             session.delete(voice)
             session.commit()
+    invalidate_voices_cache()
 
 def Debug_Database():
     with Session(engine) as session:
@@ -5,7 +5,9 @@ Handles both avatar slot queuing and parallel message queuing.
 import asyncio
 import os
 import time
-from typing import Dict, Any
+from collections import deque
+from itertools import zip_longest
+from typing import Dict, Any, Iterator, List, Optional
 
 from modules import logger
 from modules.persistent_data import AUDIO_DIR
@@ -17,19 +19,190 @@ from modules.avatars import (
     get_avatar_assignments_generation_id
 )
 
+# Default upper bound on queued messages (maxQueuedMessages setting); appending to a
+# full queue drops the oldest entry
+MAX_QUEUE_LENGTH = 500
+# Avatar queue entries kept per user; a user's oldest entry is dropped beyond this
+MAX_QUEUED_PER_USER = 3
+# Seconds after which queued messages are discarded instead of played
+AVATAR_QUEUE_MAX_AGE = 60
+PARALLEL_QUEUE_MAX_AGE = 120
+# Times a queued message is put back after failing to play, and the delay before retrying
+MAX_QUEUED_RETRIES = 3
+QUEUE_RETRY_DELAY = 0.25
+
+
+
+class FairMessageQueue:
+    """
+    Queue that serves users round-robin instead of strictly first-in first-out.
+    
+    Each user has their own FIFO; the next entry comes from the user who has waited
+    longest for a turn, so one busy chatter can't hold every slot.
+    """
+    
+    def __init__(self, maxlen: int = MAX_QUEUE_LENGTH, per_user: int = MAX_QUEUED_PER_USER):
+        self.maxlen = maxlen
+        self.per_user = per_user
+        # Insertion order of the dict is the order users get their next turn
+        self._users: Dict[str, deque] = {}
+        self._length = 0
+        # Earliest queued_time left after the last expiry sweep (None = unknown). Entries
+        # only arrive later and leave from the front, so it stays a valid lower bound
+        self._earliest_queued: Optional[float] = None
+    
+    def __len__(self) -> int:
+        return self._length
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate entries in the order they would be served"""
+        for round_items in zip_longest(*self._users.values()):
+            for item in round_items:
+                if item is not None:
+                    yield item
+    
+    def append(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Add an entry, returning the entry dropped to make room (if any)"""
+        key = str(item["message_data"].get("user", "")).lower()
+        user_queue = self._users.get(key)
+        
+        dropped = None
+        if user_queue and len(user_queue) >= self.per_user:
+            dropped = user_queue.popleft()
+            self._length -= 1
+        elif self._length >= self.maxlen:
+            dropped = self._pop_oldest()
+            user_queue = self._users.get(key)
+        
+        if user_queue is None:
+            user_queue = self._users[key] = deque()
+        user_queue.append(item)
+        self._length += 1
+        return dropped
+    
+    def peek(self) -> Optional[Dict[str, Any]]:
+        """Get the entry that would be served next without removing it"""
+        user_queue = next(iter(self._users.values()), None)
+        return user_queue[0] if user_queue else None
+    
+    def popleft(self) -> Dict[str, Any]:
+        """Remove and return the next entry, moving its user to the back of the rotation"""
+        key = next(iter(self._users))
+        user_queue = self._users.pop(key)
+        item = user_queue.popleft()
+        self._length -= 1
+        if user_queue:
+            self._users[key] = user_queue
+        return item
+    
+    def requeue(self, item: Dict[str, Any]) -> bool:
+        """
+        Put a served entry back at the front of the queue, keeping its queued_time.
+        Returns False (dropping the entry) if its user or the queue is already full.
+        """
+        key = str(item["message_data"].get("user", "")).lower()
+        user_queue = self._users.get(key)
+        if (user_queue and len(user_queue) >= self.per_user) or self._length >= self.maxlen:
+            return False
+        
+        if user_queue is None:
+            user_queue = deque()
+        user_queue.appendleft(item)
+        # The user had the first turn when the entry was served, so give it back
+        self._users = {key: user_queue, **{k: q for k, q in self._users.items() if k != key}}
+        self._length += 1
+        if self._earliest_queued is not None and item["queued_time"] < self._earliest_queued:
+            self._earliest_queued = item["queued_time"]
+        return True
+    
+    def pop_expired(self, max_age: float) -> List[Dict[str, Any]]:
+        """Remove and return every entry queued more than max_age seconds ago"""
+        cutoff = time.monotonic() - max_age
+        if self._earliest_queued is not None and self._earliest_queued >= cutoff:
+            # Nothing can have expired yet, skip walking every user's queue
+            return []
+        
+        expired = []
+        earliest = None
+        for key in list(self._users):
+            user_queue = self._users[key]
+            while user_queue and user_queue[0]["queued_time"] < cutoff:
+                expired.append(user_queue.popleft())
+            if not user_queue:
+                del self._users[key]
+            elif earliest is None or user_queue[0]["queued_time"] < earliest:
+                earliest = user_queue[0]["queued_time"]
+        self._length -= len(expired)
+        self._earliest_queued = earliest
+        return expired
+    
+    def trim_to(self, max_len: int) -> int:
+        """Drop the earliest queued entries until at most max_len remain, returning how many were dropped"""
+        dropped = 0
+        while self._length > max_len:
+            self._pop_oldest()
+            dropped += 1
+        return dropped
+    
+    def clear(self):
+        self._users.clear()
+        self._length = 0
+        self._earliest_queued = None
+    
+    def _pop_oldest(self) -> Dict[str, Any]:
+        """Remove the entry queued earliest across all users"""
+        key = min(self._users, key=lambda k: self._users[k][0]["queued_time"])
+        user_queue = self._users[key]
+        item = user_queue.popleft()
+        if not user_queue:
+            del self._users[key]
+        self._length -= 1
+        return item
+
+
 # Global queue state
-avatar_message_queue = []  # Queue for messages when all avatar slots are busy
-parallel_message_queue = []  # Queue for messages when parallel limit is reached
+avatar_message_queue = FairMessageQueue()  # Queue for messages when all avatar slots are busy
+parallel_message_queue = deque()  # Queue for messages when parallel limit is reached
+max_queue_length = MAX_QUEUE_LENGTH
+
+
+def set_max_queue_length(max_length: Any):
+    """Apply the maxQueuedMessages setting to both queues, dropping the oldest entries beyond it"""
+    global max_queue_length
+    
+    try:
+        max_length = max(1, int(max_length))
+    except (TypeError, ValueError):
+        max_length = MAX_QUEUE_LENGTH
+    if max_length == max_queue_length:
+        return
+    
+    max_queue_length = max_length
+    avatar_message_queue.maxlen = max_length
+    dropped = avatar_message_queue.trim_to(max_length)
+    while len(parallel_message_queue) > max_length:
+        parallel_message_queue.popleft()
+        dropped += 1
+    logger.info(f"Message queue limit set to {max_length} (dropped {dropped} queued messages)")
 
 
-def queue_avatar_message(message_data: Dict[str, Any]):
-    """Add a message to the avatar queue when all slots are busy"""
+def queue_avatar_message(message_data: Dict[str, Any], audio_duration: Optional[float] = None,
+                         retries: int = 0):
+    """
+    Add a message to the avatar queue when all slots are busy.
+    
+    The audio duration is kept with the entry so dequeuing never has to read the file again.
+    """
     global avatar_message_queue
     
-    avatar_message_queue.append({
+    dropped = avatar_message_queue.append({
         "message_data": message_data,
-        "queued_time": time.time()
+        "queued_time": time.monotonic(),
+        "audio_duration": audio_duration,
+        "retries": retries
     })
+    if dropped:
+        logger.warning(f"Avatar queue limit reached, dropping older message from {dropped['message_data'].get('user')}")
     logger.info(f"Queued message for {message_data.get('user')} (queue length: {len(avatar_message_queue)})")
 
 
@@ -37,14 +210,19 @@ def queue_parallel_message(message_data: Dict[str, Any]):
     """Add a message to the parallel queue when limit is reached"""
     global parallel_message_queue
     
+    if len(parallel_message_queue) >= max_queue_length:
+        dropped = parallel_message_queue.popleft()["message_data"]
+        logger.warning(f"Parallel queue full, dropping oldest message from {dropped.get('user')}")
     parallel_message_queue.append({
         "message_data": message_data,
-        "queued_time": time.time()
+        "queued_time": time.monotonic(),
+        # Lowercased once here; active_tts_jobs is keyed by lowercase username
+        "user_key": str(message_data.get("user", "unknown")).lower()
     })
     logger.info(f"Queued message for {message_data.get('user')} (parallel queue length: {len(parallel_message_queue)})")
 
 
-def process_parallel_message_queue(app_get_settings_func, process_tts_message_func, 
+def process_parallel_message_queue(parallel_limit: int, process_tts_message_func, 
                                    active_tts_jobs: Dict[str, Any], 
                                    total_active_tts_count: int,
                                    increment_tts_count_func, 
@@ -53,7 +231,7 @@ def process_parallel_message_queue(app_get_settings_func, process_tts_message_fu
     Process queued messages if parallel slots become available.
     
     Args:
-        app_get_settings_func: Function to get current settings
+        parallel_limit: Maximum number of parallel TTS jobs, 0 for unlimited
         process_tts_message_func: Async function to process TTS message
         active_tts_jobs: Dict of currently active TTS jobs
         total_active_tts_count: Current count of active TTS jobs
@@ -62,47 +240,29 @@ def process_parallel_message_queue(app_get_settings_func, process_tts_message_fu
     """
     global parallel_message_queue
     
+    # Discard expired messages (older than 120 seconds) from the front of the queue
+    cutoff = time.monotonic() - PARALLEL_QUEUE_MAX_AGE
+    while parallel_message_queue and parallel_message_queue[0]["queued_time"] < cutoff:
+        expired = parallel_message_queue.popleft()
+        logger.info(f"Discarded old queued parallel message for {expired['message_data'].get('user')}")
+    
     if not parallel_message_queue:
         return
     
-    settings = app_get_settings_func()
-    parallel_limit = settings.get("parallelMessageLimit", 5)
-    
     # Check if we're under the limit now (or if there's no limit)
-    if parallel_limit is None or not isinstance(parallel_limit, (int, float)) or parallel_limit <= 0 or total_active_tts_count < parallel_limit:
-        # Try to process the oldest queued message
-        queued_item = parallel_message_queue[0]
-        message_data = queued_item["message_data"]
-        
-        # Check if message is too old (ignore messages older than 120 seconds)
-        if time.time() - queued_item["queued_time"] > 120:
-            parallel_message_queue.pop(0)
-            logger.info(f"Discarded old queued parallel message for {message_data.get('user')}")
-            # Try to process next message
-            if parallel_message_queue:
-                process_parallel_message_queue(
-                    app_get_settings_func, 
-                    process_tts_message_func,
-                    active_tts_jobs,
-                    total_active_tts_count,
-                    increment_tts_count_func,
-                    decrement_tts_count_func
-                )
-            return
-        
-        # Remove from queue and process
-        parallel_message_queue.pop(0)
+    if not parallel_limit or total_active_tts_count < parallel_limit:
+        # Remove the oldest queued message and process it
+        queued = parallel_message_queue.popleft()
+        message_data = queued["message_data"]
         
         # Reserve the slot by incrementing counter (check if replacing existing job)
         username = message_data.get('user', 'unknown')
-        username_lower = username.lower()
-        replacing_existing = username_lower in active_tts_jobs
+        replacing_existing = queued["user_key"] in active_tts_jobs
         
         if not replacing_existing:
             increment_tts_count_func()
         
-        limit_text = "unlimited" if not parallel_limit or not isinstance(parallel_limit, (int, float)) or parallel_limit <= 0 else str(int(parallel_limit))
-        logger.info(f"Processing queued parallel message for {username} (active: {total_active_tts_count}/{limit_text}, replacing={replacing_existing})")
+        logger.info(f"Processing queued parallel message for {username} (active: {total_active_tts_count}/{parallel_limit or 'unlimited'}, replacing={replacing_existing})")
         
         # Process the queued message
         async def process_queued():
@@ -126,21 +286,16 @@ def process_avatar_message_queue(process_queued_tts_message_func):
     """
     global avatar_message_queue
     
+    # Discard expired messages (older than 60 seconds)
+    for expired in avatar_message_queue.pop_expired(AVATAR_QUEUE_MAX_AGE):
+        logger.info(f"Discarded old queued message for {expired['message_data'].get('user')}")
+    
     if not avatar_message_queue:
         return
     
-    # Try to process the oldest queued message
-    queued_item = avatar_message_queue[0]
-    message_data = queued_item["message_data"]
-    
-    # Check if message is too old (ignore messages older than 60 seconds)
-    if time.time() - queued_item["queued_time"] > 60:
-        avatar_message_queue.pop(0)
-        logger.info(f"Discarded old queued message for {message_data.get('user')}")
-        # Try to process next message
-        if avatar_message_queue:
-            process_avatar_message_queue(process_queued_tts_message_func)
-        return
+    # Try to process the message of the user whose turn it is
+    queued = avatar_message_queue.peek()
+    message_data = queued["message_data"]
     
     # Try to find an available slot
     voice_id = message_data.get("voice", {}).get("id") if message_data.get("voice") else None
@@ -148,15 +303,20 @@ def process_avatar_message_queue(process_queued_tts_message_func):
     
     if available_slot:
         # Remove from queue and process
-        avatar_message_queue.pop(0)
+        avatar_message_queue.popleft()
         logger.info(f"Processing queued message for {message_data.get('user')} in slot {available_slot['id']}")
         
         # Process the queued TTS message
-        asyncio.create_task(process_queued_tts_message_func(message_data, available_slot))
+        asyncio.create_task(process_queued_tts_message_func(
+            message_data, available_slot, queued.get("audio_duration"), queued.get("retries", 0),
+            queued["queued_time"]
+        ))
 
 
 async def process_queued_tts_message(message_data: Dict[str, Any], target_slot: Dict[str, Any], 
-                                     hub, process_avatar_message_queue_func):
+                                     hub, process_avatar_message_queue_func,
+                                     audio_duration: Optional[float] = None, retries: int = 0,
+                                     queued_time: Optional[float] = None):
     """
     Process a TTS message that was queued due to all slots being busy.
     
@@ -165,25 +325,25 @@ async def process_queued_tts_message(message_data: Dict[str, Any], target_slot:
         target_slot: The avatar slot to use
         hub: WebSocket hub for broadcasting
         process_avatar_message_queue_func: Function to process avatar queue on error
+        audio_duration: Duration recorded when the message was queued, if known
+        retries: How many times this message has already failed to play
+        queued_time: When the message was first queued, kept if it is put back
     """
     try:
         # Reserve the slot
         audio_url = message_data.get("audioUrl", "")
         user = message_data.get("user", "")
         
-        # Try to get audio duration from the file
-        audio_duration = None
-        if audio_url:
-            audio_filename = os.path.basename(audio_url)
-            audio_path = os.path.join(AUDIO_DIR, audio_filename)
-            if os.path.exists(audio_path):
-                audio_duration = get_audio_duration(audio_path)
+        # Fall back to reading the duration from the file, off the event loop
+        if audio_duration is None and audio_url:
+            audio_path = os.path.join(AUDIO_DIR, os.path.basename(audio_url))
+            audio_duration = await asyncio.to_thread(get_audio_duration, audio_path)
         
         reserve_avatar_slot(target_slot["id"], user, audio_url, audio_duration)
         
-        # Add slot information to the message
-        enriched_message = message_data.copy()
-        enriched_message.update({
+        # Add slot information to the message (one dict build instead of copy + update)
+        enriched_message = {
+            **message_data,
             "targetSlot": {
                 "id": target_slot["id"],
                 "x_position": target_slot.get("x_position", 50),
@@ -192,7 +352,7 @@ async def process_queued_tts_message(message_data: Dict[str, Any], target_slot:
             },
             "avatarData": target_slot["avatarData"],
             "generationId": get_avatar_assignments_generation_id()
-        })
+        }
         
         # Broadcast to clients
         await hub.broadcast(enriched_message)
@@ -200,9 +360,25 @@ async def process_queued_tts_message(message_data: Dict[str, Any], target_slot:
         
     except Exception as e:
         logger.error(f"Failed to process queued TTS message: {e}")
-        # Release the slot on error
         release_avatar_slot(target_slot["id"])
-        process_avatar_message_queue_func()
+        
+        # Put the message back a limited number of times, so a message that always
+        # fails can't keep the queue spinning
+        if retries >= MAX_QUEUED_RETRIES:
+            logger.warning(f"Dropping queued TTS for {message_data.get('user')} after {retries + 1} failed attempts")
+        elif queued_time is None:
+            queue_avatar_message(message_data, audio_duration, retries + 1)
+        # Keep the original queued_time so retries don't extend the message's lifetime
+        elif not avatar_message_queue.requeue({
+            "message_data": message_data,
+            "queued_time": queued_time,
+            "audio_duration": audio_duration,
+            "retries": retries + 1
+        }):
+            logger.warning(f"Avatar queue full, dropping failed TTS for {message_data.get('user')}")
+        
+        # Retry after a short delay rather than re-entering the queue from inside this handler
+        asyncio.get_running_loop().call_later(QUEUE_RETRY_DELAY, process_avatar_message_queue_func)
 
 
 def get_avatar_queue_length() -> int:
@@ -1,4 +1,5 @@
 import asyncio
+import json
 import os
 import uuid
 import time
@@ -8,9 +9,10 @@ from dataclasses import dataclass
 import aiohttp
 import random
 from collections import defaultdict
+from typing import Dict, Optional, Tuple
 
 from modules import logger
-from modules.persistent_data import AUDIO_DIR
+from modules.persistent_data import AUDIO_DIR, get_voice_display_key
 
 # Fallback voice usage tracking for distribution analysis
 fallback_voice_stats = defaultdict(int)
@@ -61,6 +63,9 @@ class TTSJob:
     text: str
     voice: str
     audio_format: str = "mp3"
+    cacheable: bool = True  # Cleared when a provider falls back to a different voice
+    provider: str = ""  # Provider owning the voice, used by HybridTTSProvider for routing
+    fallback_voices: Optional[list] = None  # Limits HybridTTSProvider fallbacks to these voices (no default voice)
 
 class TTSProvider:
     async def synth(self, job: TTSJob) -> str:
@@ -81,7 +86,6 @@ class MonsterTTSProvider(TTSProvider):
     
     async def _cleanup_file_after_delay(self, filepath: str, delay_seconds: int):
         """Clean up temporary audio file after delay"""
-        import asyncio
         await asyncio.sleep(delay_seconds)
         try:
             if os.path.exists(filepath):
@@ -141,7 +145,6 @@ class MonsterTTSProvider(TTSProvider):
                 # Check if we got JSON response with URL (MonsterTTS format)
                 if audio_data.startswith(b'{') or audio_data.startswith(b'['):
                     # Parse JSON response to get audio URL
-                    import json
                     try:
                         response_json = json.loads(audio_data.decode('utf-8'))
                         logger.info(f"MonsterTTS JSON Response: {response_json}")
@@ -185,7 +188,6 @@ class MonsterTTSProvider(TTSProvider):
                 logger.info(f"MonsterTTS audio ready: {outpath} ({len(audio_data)} bytes)")
                 
                 # Schedule file cleanup after a short delay (enough time for frontend to fetch)
-                import asyncio
                 asyncio.create_task(self._cleanup_file_after_delay(outpath, 30))  # 30 seconds
                 
                 return outpath
@@ -260,6 +262,9 @@ class MonsterTTSProvider(TTSProvider):
                 return voices
 
 class EdgeTTSProvider(TTSProvider):
+    # Voice used when a job has no voice, or its voice returns no audio
+    voice_id = "en-US-AvaNeural"
+    
     async def list_voices(self, use_cache: bool = True) -> list:
         """Fetch available voices from Edge TTS with caching support
         
@@ -399,6 +404,8 @@ class EdgeTTSProvider(TTSProvider):
             # Try with default voice as fallback
             if job.voice != self.voice_id:
                 logger.warning(f"Voice '{job.voice}' appears to be invalid or deprecated. Retrying with default voice: {self.voice_id}")
+                # The audio no longer matches job.voice, so it must not be cached under it
+                job.cacheable = False
                 try:
                     await attempt_synthesis(self.voice_id)
                     logger.info(f"Successfully synthesized with fallback voice: {self.voice_id}")
@@ -418,7 +425,6 @@ class EdgeTTSProvider(TTSProvider):
     
     async def _cleanup_file_after_delay(self, filepath: str, delay_seconds: int):
         """Clean up temporary audio file after delay"""
-        import asyncio
         await asyncio.sleep(delay_seconds)
         try:
             if os.path.exists(filepath):
@@ -595,7 +601,6 @@ class GoogleTTSProvider(TTSProvider):
     
     async def _cleanup_file_after_delay(self, filepath: str, delay_seconds: int):
         """Clean up temporary audio file after delay"""
-        import asyncio
         await asyncio.sleep(delay_seconds)
         try:
             if os.path.exists(filepath):
@@ -742,7 +747,6 @@ class AmazonPollyProvider(TTSProvider):
     
     async def _cleanup_file_after_delay(self, filepath: str, delay_seconds: int):
         """Clean up temporary audio file after delay"""
-        import asyncio
         await asyncio.sleep(delay_seconds)
         try:
             if os.path.exists(filepath):
@@ -753,7 +757,6 @@ class AmazonPollyProvider(TTSProvider):
     
     async def _cleanup_file_after_delay(self, filepath: str, delay_seconds: int):
         """Clean up temporary audio file after delay"""
-        import asyncio
         await asyncio.sleep(delay_seconds)
         try:
             if os.path.exists(filepath):
@@ -764,19 +767,23 @@ class AmazonPollyProvider(TTSProvider):
 
 class HybridTTSProvider(TTSProvider):
     """Hybrid provider that uses MonsterTTS when available and under rate limit,
-    falls back to random configured voices when rate limited or MonsterTTS unavailable."""
+    falls back to random configured voices when rate limited or MonsterTTS unavailable.
+    
+    One instance serves every voice: the backend is chosen per job from job.provider,
+    so instances can be reused until the provider credentials change."""
     
-    def __init__(self, monster_api_key: str = None, monster_voice_id: str = None, edge_voice_id: str = None, 
-                 fallback_voices: list = None, google_api_key: str = None, polly_config: dict = None):
+    def __init__(self, monster_api_key: str = None, google_api_key: str = None, polly_config: dict = None,
+                 fallback_voices: list = None):
         self.monster_provider = None
         self.edge_provider = None
         self.google_provider = None
         self.polly_provider = None
-        self.fallback_voices = fallback_voices or []
+        # When not given, fallbacks are drawn from the currently enabled voices
+        self.fallback_voices = fallback_voices
         
         # Initialize MonsterTTS if API key provided
         if monster_api_key and AIOHTTP_AVAILABLE:
-            self.monster_provider = MonsterTTSProvider(monster_api_key, monster_voice_id or "9aad4a1b-f04e-43a1-8ff5-4830115a10a8")
+            self.monster_provider = MonsterTTSProvider(monster_api_key, "9aad4a1b-f04e-43a1-8ff5-4830115a10a8")
         
         # Initialize Edge TTS as fallback
         if edge_tts is not None:
@@ -793,77 +800,60 @@ class HybridTTSProvider(TTSProvider):
                 polly_config['secretKey'],
                 polly_config.get('region', 'us-east-1')
             )
-        
-        self.edge_voice_id = edge_voice_id
-        self.monster_voice_id = monster_voice_id
+    
+    def _get_fallback_voices(self) -> list:
+        if self.fallback_voices is not None:
+            return self.fallback_voices
+        from modules.persistent_data import get_enabled_voices
+        return get_enabled_voices()
     
     async def synth(self, job: TTSJob) -> str:
-        # Determine which provider to use based on the job's voice
-        # The job.voice should be the actual voice_id from the selected voice
+        fallback_voices = job.fallback_voices if job.fallback_voices is not None else self._get_fallback_voices()
         
-        # First, check if we have a MonsterTTS voice and can use MonsterTTS
-        if (self.monster_provider and self.monster_voice_id and 
-            job.voice == self.monster_voice_id and self.monster_provider.can_process_now()):
-            try:
-                logger.info("Using MonsterTTS")
-                return await self.monster_provider.synth(job)
-            except Exception as e:
-                logger.info(f"MonsterTTS failed: {e}, falling back")
-        
-        # If we have an Edge TTS voice, use Edge TTS directly
-        if self.edge_provider and self.edge_voice_id and job.voice == self.edge_voice_id:
-            logger.info("Using Edge TTS")
-            return await self.edge_provider.synth(job)
+        # Determine which provider owns the job's voice
+        provider_name = job.provider
+        if not provider_name:
+            matching_voice = next((v for v in fallback_voices if v.voice_id == job.voice), None)
+            if matching_voice:
+                provider_name = matching_voice.provider
         
-        # If the voice doesn't match our configured voices, try to find it in fallback voices
-        if self.fallback_voices:
-            # Find the voice in fallback_voices that matches the job.voice
-            matching_voice = next((v for v in self.fallback_voices if v.voice_id == job.voice), None)
+        if provider_name:
+            logger.info(f"Using configured voice: {job.voice} ({provider_name})")
             
-            if matching_voice:
-                logger.info(f"Using configured voice: {matching_voice.name} ({matching_voice.provider})")
-                
-                if matching_voice.provider == "edge" and self.edge_provider:
-                    return await self.edge_provider.synth(job)
-                elif matching_voice.provider == "monstertts" and self.monster_provider:
-                    # Check rate limit for MonsterTTS voices
-                    if self.monster_provider.can_process_now():
-                        try:
-                            return await self.monster_provider.synth(job)
-                        except Exception as e:
-                            logger.info(f"MonsterTTS voice failed: {e}, trying random fallback")
-                    else:
-                        logger.info("MonsterTTS rate limited, trying random fallback")
-                elif matching_voice.provider == "google" and self.google_provider:
-                    try:
-                        return await self.google_provider.synth(job)
-                    except Exception as e:
-                        logger.info(f"Google TTS voice failed: {e}, trying random fallback")
-                elif matching_voice.provider == "polly" and self.polly_provider:
+            if provider_name == "edge" and self.edge_provider:
+                return await self.edge_provider.synth(job)
+            elif provider_name == "monstertts" and self.monster_provider:
+                # Check rate limit for MonsterTTS voices
+                if self.monster_provider.can_process_now():
                     try:
-                        return await self.polly_provider.synth(job)
+                        return await self.monster_provider.synth(job)
                     except Exception as e:
-                        logger.info(f"Amazon Polly voice failed: {e}, trying random fallback")
-            
+                        logger.info(f"MonsterTTS voice failed: {e}, trying random fallback")
+                else:
+                    logger.info("MonsterTTS rate limited, trying random fallback")
+            elif provider_name == "google" and self.google_provider:
+                try:
+                    return await self.google_provider.synth(job)
+                except Exception as e:
+                    logger.info(f"Google TTS voice failed: {e}, trying random fallback")
+            elif provider_name == "polly" and self.polly_provider:
+                try:
+                    return await self.polly_provider.synth(job)
+                except Exception as e:
+                    logger.info(f"Amazon Polly voice failed: {e}, trying random fallback")
+        
+        if fallback_voices:
             # Random fallback from enabled voices
-            fallback_voice = random.choice(self.fallback_voices)
+            job.cacheable = False
+            fallback_voice = random.choice(fallback_voices)
             
             # Track fallback voice usage for distribution analysis
             global fallback_voice_stats, fallback_selection_count
-            fallback_key = f"{fallback_voice.name} ({fallback_voice.provider})"
+            fallback_key = get_voice_display_key(fallback_voice)
             fallback_voice_stats[fallback_key] += 1
             fallback_selection_count += 1
             
-            logger.info(f"Using random fallback voice: {fallback_voice.name} ({fallback_voice.provider})")
-            
-            # Log fallback distribution every 5 selections
-            if fallback_selection_count % 5 == 0:
-                logger.info(f"\nFallback Voice Distribution Summary (after {fallback_selection_count} fallbacks):")
-                total_fallbacks = sum(fallback_voice_stats.values())
-                for voice_name, count in sorted(fallback_voice_stats.items(), key=lambda x: x[1], reverse=True):
-                    percentage = (count / total_fallbacks) * 100
-                    logger.info(f"   {voice_name}: {count} times ({percentage:.1f}%)")
-                logger.info("---")
+            logger.info(f"Using random fallback voice: {fallback_key}")
             
             fallback_job = TTSJob(
                 text=job.text,
@@ -891,8 +881,9 @@ class HybridTTSProvider(TTSProvider):
                     logger.info(f"Amazon Polly random fallback failed: {e}")
         
         # Final fallback to Edge TTS with default voice
-        if self.edge_provider:
+        if self.edge_provider and job.fallback_voices is None:
             logger.info("Using Edge TTS with default voice")
+            job.cacheable = False
             default_job = TTSJob(
                 text=job.text,
                 voice="en-US-AvaNeural",
@@ -904,10 +895,27 @@ class HybridTTSProvider(TTSProvider):
         return None
 
 # Factory functions
-async def get_hybrid_provider(monster_api_key: str = None, monster_voice_id: str = None, edge_voice_id: str = None, 
-                             fallback_voices: list = None, google_api_key: str = None, polly_config: dict = None) -> HybridTTSProvider:
-    """Get a hybrid provider that uses all TTS providers with intelligent fallback"""
-    return HybridTTSProvider(monster_api_key, monster_voice_id, edge_voice_id, fallback_voices, google_api_key, polly_config)
+# Hybrid provider reused across events, keyed on the credentials it was built from
+_hybrid_provider_cache: Dict[tuple, HybridTTSProvider] = {}
+
+async def get_hybrid_provider(monster_api_key: str = None, google_api_key: str = None, polly_config: dict = None) -> HybridTTSProvider:
+    """
+    Get a hybrid provider that uses all TTS providers with intelligent fallback.
+    The instance is reused until the credentials change, which also keeps
+    per-provider state such as the MonsterTTS rate limit across messages.
+    """
+    polly_key = None
+    if polly_config:
+        polly_key = (polly_config.get('accessKey'), polly_config.get('secretKey'), polly_config.get('region', 'us-east-1'))
+    key = (monster_api_key, google_api_key, polly_key)
+    
+    provider = _hybrid_provider_cache.get(key)
+    if provider is None:
+        provider = HybridTTSProvider(monster_api_key, google_api_key, polly_config)
+        # Only the current configuration is worth keeping
+        _hybrid_provider_cache.clear()
+        _hybrid_provider_cache[key] = provider
+    return provider
 
 async def get_provider(api_key: str = None, voice_id: str = "9aad4a1b-f04e-43a1-8ff5-4830115a10a8") -> TTSProvider:
     """Legacy factory - Try MonsterTTS first if API key is provided, otherwise Edge TTS"""
@@ -922,11 +930,33 @@ async def get_provider(api_key: str = None, voice_id: str = "9aad4a1b-f04e-43a1-
     # Final fallback to fake tone
     return None
 
-def get_audio_duration(file_path: str) -> float:
+# (path, size) -> duration; cached files are replayed often and never rewritten
+_audio_duration_cache: Dict[Tuple[str, int], float] = {}
+AUDIO_DURATION_CACHE_SIZE = 512
+
+def get_audio_duration(file_path: str) -> Optional[float]:
     """
     Get the duration of an audio file in seconds.
     Returns the duration if successful, or None if it fails.
     """
+    try:
+        file_size = os.path.getsize(file_path)
+    except OSError as e:
+        logger.debug(f"Failed to get audio duration: {e}")
+        return None
+    
+    key = (file_path, file_size)
+    duration = _audio_duration_cache.get(key)
+    if duration is None:
+        duration = _probe_audio_duration(file_path, file_size)
+        if duration is not None:
+            if len(_audio_duration_cache) >= AUDIO_DURATION_CACHE_SIZE:
+                _audio_duration_cache.clear()
+            _audio_duration_cache[key] = duration
+    return duration
+
+def _probe_audio_duration(file_path: str, file_size: int) -> Optional[float]:
+    """Read the duration from the file, estimating from its size if mutagen can't"""
     try:
         # Try using mutagen library for MP3 files (most common)
         try:
@@ -943,16 +973,10 @@ def get_audio_duration(file_path: str) -> float:
         
         # Fallback: try to estimate from file size (very rough approximation)
         # MP3 bitrate is typically 128-320 kbps, we'll assume 192 kbps average
-        try:
-            file_size = os.path.getsize(file_path)
-            # 192 kbps = 24 KB/s
-            estimated_duration = file_size / (24 * 1024)
-            logger.info(f"Audio duration estimated for {os.path.basename(file_path)}: ~{estimated_duration:.2f}s (file size)")
-            return estimated_duration
-        except Exception as e:
-            logger.debug(f"Failed to estimate duration from file size: {e}")
-        
-        return None
+        # 192 kbps = 24 KB/s
+        estimated_duration = file_size / (24 * 1024)
+        logger.info(f"Audio duration estimated for {os.path.basename(file_path)}: ~{estimated_duration:.2f}s (file size)")
+        return estimated_duration
         
     except Exception as e:
         logger.warning(f"Failed to get audio duration: {e}")
@@ -0,0 +1,195 @@
+"""
+Persistent cache for synthesized TTS audio.
+
+Repeated messages (common phrases, greetings, emote spam) would otherwise hit the
+TTS provider every time. Synthesized files are stored in AUDIO_DIR under a name
+derived from (provider, voice, format, text) so later requests can reuse them.
+"""
+import asyncio
+import hashlib
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from modules import logger
+from modules.persistent_data import AUDIO_DIR
+from modules.tts import TTSJob
+
+# Total size budget for cached audio files
+TTS_CACHE_MAX_BYTES = 500 * 1024 * 1024
+# Minimum delay between two size-budget sweeps
+TTS_CACHE_SWEEP_INTERVAL = 60.0
+# Maximum number of provider synth calls running at once
+TTS_CONCURRENT_REQUESTS = int(os.environ.get("TTS_CONCURRENT_REQUESTS", "3"))
+
+CACHE_FILE_PREFIX = "cache_"
+
+_last_sweep_time = 0.0
+
+# cache key -> synthesis task shared by concurrent identical requests
+_inflight: Dict[str, asyncio.Task] = {}
+
+# (event loop, semaphore) bounding provider calls; rebuilt if the loop changes
+_synth_semaphore: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+
+def get_cache_key(job: TTSJob, provider_name: str = "") -> str:
+    """Build the cache key for a TTS job"""
+    raw = f"{provider_name}|{job.voice}|{job.audio_format}|{job.text}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def get_cache_path(key: str, audio_format: str) -> str:
+    """Get the on-disk path of a cached audio file"""
+    return os.path.join(AUDIO_DIR, f"{CACHE_FILE_PREFIX}{key}.{audio_format}")
+
+
+def lookup_cached_audio(job: TTSJob, provider_name: str = "") -> Optional[str]:
+    """
+    Return the cached audio path for a job, or None on a miss.
+    A hit refreshes the file's mtime so the sweep evicts least recently used files first.
+    """
+    cache_path = get_cache_path(get_cache_key(job, provider_name), job.audio_format)
+    try:
+        os.utime(cache_path)
+    except OSError:
+        return None
+    return cache_path
+
+
+def store_cached_audio(path: str, job: TTSJob, provider_name: str = "") -> str:
+    """
+    Move a freshly synthesized file into the cache and return its new path.
+    Falls back to the original path if the move fails.
+    """
+    cache_path = get_cache_path(get_cache_key(job, provider_name), job.audio_format)
+    try:
+        os.replace(path, cache_path)
+    except OSError as e:
+        logger.warning(f"Failed to store audio in TTS cache: {e}")
+        return path
+    _schedule_sweep()
+    return cache_path
+
+
+async def get_or_synth(provider, job: TTSJob, provider_name: str = "") -> Optional[str]:
+    """
+    Return cached audio for the job if present, otherwise synthesize and cache it.
+    Concurrent identical requests share a single provider call.
+
+    Args:
+        provider: TTS provider used on a cache miss
+        job: The TTS job to synthesize
+        provider_name: Name of the provider owning job.voice (part of the cache key)
+
+    Returns:
+        Path to the audio file, or None if the provider produced nothing
+    """
+    cached_path = lookup_cached_audio(job, provider_name)
+    if cached_path:
+        logger.debug(f"TTS cache hit: {os.path.basename(cached_path)}")
+        return cached_path
+
+    key = get_cache_key(job, provider_name)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_synth_and_store(provider, job, provider_name))
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _on_synth_done(key, t))
+    else:
+        logger.debug("Joining in-flight TTS synthesis for identical request")
+
+    # Shield so a cancelled requester (e.g. banned user) doesn't cancel the
+    # synthesis other requesters are waiting on
+    return await asyncio.shield(task)
+
+
+def _on_synth_done(key: str, task: asyncio.Task):
+    """Forget a finished in-flight synthesis"""
+    _inflight.pop(key, None)
+    # Retrieve the exception so it isn't reported as unhandled when every requester was cancelled
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug(f"In-flight TTS synthesis failed: {task.exception()}")
+
+
+async def _synth_and_store(provider, job: TTSJob, provider_name: str) -> Optional[str]:
+    """Synthesize a job and move the result into the cache when allowed"""
+    # Chat floods would otherwise start one provider request per message
+    async with _get_synth_semaphore():
+        path = await provider.synth(job)
+    if not path:
+        return path
+
+    # Providers mark jobs that fell back to a different voice as not cacheable,
+    # otherwise the fallback voice would be replayed for this voice forever
+    if not job.cacheable:
+        return path
+
+    return store_cached_audio(path, job, provider_name)
+
+
+def _get_synth_semaphore() -> asyncio.Semaphore:
+    """Get the semaphore bounding concurrent provider calls for the running loop"""
+    global _synth_semaphore
+
+    loop = asyncio.get_running_loop()
+    if _synth_semaphore is None or _synth_semaphore[0] is not loop:
+        _synth_semaphore = (loop, asyncio.Semaphore(max(1, TTS_CONCURRENT_REQUESTS)))
+    return _synth_semaphore[1]
+
+
+def prune_cache(max_bytes: int = TTS_CACHE_MAX_BYTES) -> int:
+    """
+    Delete least recently used cache files until the cache fits in max_bytes.
+
+    Returns:
+        Number of files removed
+    """
+    entries = []
+    total_size = 0
+    try:
+        with os.scandir(AUDIO_DIR) as it:
+            for entry in it:
+                if not entry.name.startswith(CACHE_FILE_PREFIX) or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+    except OSError as e:
+        logger.warning(f"Failed to scan TTS cache: {e}")
+        return 0
+
+    if total_size <= max_bytes:
+        return 0
+
+    removed = 0
+    entries.sort()
+    for _, size, path in entries:
+        if total_size <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total_size -= size
+            removed += 1
+        except OSError as e:
+            logger.debug(f"Failed to remove cached audio {path}: {e}")
+
+    logger.info(f"TTS cache sweep removed {removed} files")
+    return removed
+
+
+def _schedule_sweep():
+    """Run a size-budget sweep in a worker thread, at most once per sweep interval"""
+    global _last_sweep_time
+
+    now = time.monotonic()
+    if now - _last_sweep_time < TTS_CACHE_SWEEP_INTERVAL:
+        return
+    _last_sweep_time = now
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        prune_cache()
+        return
+    loop.run_in_executor(None, prune_cache)
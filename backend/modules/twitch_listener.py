@@ -1,5 +1,6 @@
 import asyncio
-from typing import Callable, Dict, Any, Optional
+import re
+from typing import Callable, Dict, Any, Optional, Tuple
 from modules import logger
 from twitchio.ext import commands
 import twitchio
@@ -16,6 +17,40 @@ def get_twitchio_major_version() -> int:
         return 2
 
 
+# The installed TwitchIO can't change while the app runs
+TWITCHIO_MAJOR_VERSION = get_twitchio_major_version()
+
+# Error message fragments that mean the token was rejected, and the TwitchIO 3.x
+# errors raised when the app's client credentials are missing
+_AUTH_ERROR_RE = re.compile(r"authentication|unauthorized|invalid|access token", re.IGNORECASE)
+_CONFIG_ERROR_RE = re.compile(r"client_id|client_secret|bot_id", re.IGNORECASE)
+
+
+def is_twitch_auth_error(error: Exception, include_config_errors: bool = False) -> bool:
+    """Check whether an exception looks like a Twitch authentication failure"""
+    if error.__class__.__name__ == "AuthenticationError":
+        return True
+    message = str(error)
+    if _AUTH_ERROR_RE.search(message):
+        return True
+    return include_config_errors and _CONFIG_ERROR_RE.search(message) is not None
+
+
+def get_twitch_client_credentials() -> Tuple[str, str]:
+    """Get the Twitch app client ID and secret, falling back to the embedded build config"""
+    try:
+        # Import here to avoid circular imports
+        from modules.persistent_data import TWITCH_CLIENT_ID, TWITCH_CLIENT_SECRET
+        return TWITCH_CLIENT_ID or "", TWITCH_CLIENT_SECRET or ""
+    except ImportError:
+        # Fallback for embedded builds with fixed client ID
+        try:
+            import embedded_config
+            return getattr(embedded_config, 'TWITCH_CLIENT_ID', ''), getattr(embedded_config, 'TWITCH_CLIENT_SECRET', '')
+        except ImportError:
+            return "", ""
+
+
 def prepare_twitchio_bot_kwargs(
     token: str,
     nick: str,
@@ -46,99 +81,45 @@ def prepare_twitchio_bot_kwargs(
     if channels is None:
         channels = []
     
-    major_version = get_twitchio_major_version()
-    
     # Build constructor kwargs compatible with 1.x, 2.x, and 3.x
-    try:
-        if major_version >= 3:
-            # TwitchIO 3.x requires client_id, client_secret, and bot_id
-            # Import here to avoid circular imports
-            try:
-                from modules.persistent_data import TWITCH_CLIENT_ID, TWITCH_CLIENT_SECRET
-                client_id = TWITCH_CLIENT_ID or ""
-                client_secret = TWITCH_CLIENT_SECRET or ""
-            except ImportError:
-                # Fallback for embedded builds with fixed client ID
-                try:
-                    import embedded_config
-                    client_id = getattr(embedded_config, 'TWITCH_CLIENT_ID', '')
-                    client_secret = getattr(embedded_config, 'TWITCH_CLIENT_SECRET', '')
-                except ImportError:
-                    client_id = ""
-                    client_secret = ""
-            
-            # Validate that we have required credentials for TwitchIO 3.x
-            if not client_id or not client_secret:
-                raise ValueError(
-                    f"TwitchIO 3.x requires TWITCH_CLIENT_ID and TWITCH_CLIENT_SECRET, "
-                    f"but they are not configured. client_id={'present' if client_id else 'missing'}, "
-                    f"client_secret={'present' if client_secret else 'missing'}"
-                )
-            
-            # For TwitchIO 3.x, bot_id should be the user ID, not the username
-            bot_id = user_id or nick
-            
-            return {
-                "token": token,
-                "client_id": client_id,
-                "client_secret": client_secret,
-                "bot_id": bot_id,
-                "prefix": prefix,
-                "initial_channels": channels
-            }
-        elif major_version >= 2:
-            # TwitchIO 2.x
-            return {
-                "token": token,
-                "prefix": prefix,
-                "initial_channels": channels
-            }
-        else:
-            # TwitchIO 1.x expects irc_token + nick
-            return {
-                "irc_token": token,
-                "nick": nick,
-                "prefix": prefix,
-                "initial_channels": channels
-            }
-    except TypeError as e:
-        # If we still get a TypeError, it might be version detection issue
-        # Try the 3.x format as fallback
-        if "client_id" in str(e) or "client_secret" in str(e) or "bot_id" in str(e):
-            try:
-                from modules.persistent_data import TWITCH_CLIENT_ID, TWITCH_CLIENT_SECRET
-                client_id = TWITCH_CLIENT_ID or ""
-                client_secret = TWITCH_CLIENT_SECRET or ""
-            except ImportError:
-                try:
-                    import embedded_config
-                    client_id = getattr(embedded_config, 'TWITCH_CLIENT_ID', '')
-                    client_secret = getattr(embedded_config, 'TWITCH_CLIENT_SECRET', '')
-                except ImportError:
-                    client_id = ""
-                    client_secret = ""
-            
-            # Validate that we have required credentials for TwitchIO 3.x
-            if not client_id or not client_secret:
-                raise ValueError(
-                    f"TwitchIO 3.x requires TWITCH_CLIENT_ID and TWITCH_CLIENT_SECRET, "
-                    f"but they are not configured. client_id={'present' if client_id else 'missing'}, "
-                    f"client_secret={'present' if client_secret else 'missing'}"
-                )
-            
-            # For TwitchIO 3.x, bot_id should be the user ID, not the username
-            bot_id = user_id or nick
-            
-            return {
-                "token": token,
-                "client_id": client_id,
-                "client_secret": client_secret,
-                "bot_id": bot_id,
-                "prefix": prefix,
-                "initial_channels": channels
-            }
-        else:
-            raise
+    if TWITCHIO_MAJOR_VERSION >= 3:
+        # TwitchIO 3.x requires client_id, client_secret, and bot_id
+        client_id, client_secret = get_twitch_client_credentials()
+        
+        # Validate that we have required credentials for TwitchIO 3.x
+        if not client_id or not client_secret:
+            raise ValueError(
+                f"TwitchIO 3.x requires TWITCH_CLIENT_ID and TWITCH_CLIENT_SECRET, "
+                f"but they are not configured. client_id={'present' if client_id else 'missing'}, "
+                f"client_secret={'present' if client_secret else 'missing'}"
+            )
+        
+        # For TwitchIO 3.x, bot_id should be the user ID, not the username
+        bot_id = user_id or nick
+        
+        return {
+            "token": token,
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "bot_id": bot_id,
+            "prefix": prefix,
+            "initial_channels": channels
+        }
+    elif TWITCHIO_MAJOR_VERSION >= 2:
+        # TwitchIO 2.x
+        return {
+            "token": token,
+            "prefix": prefix,
+            "initial_channels": channels
+        }
+    else:
+        # TwitchIO 1.x expects irc_token + nick
+        return {
+            "irc_token": token,
+            "nick": nick,
+            "prefix": prefix,
+            "initial_channels": channels
+        }
 
 
 async def test_twitch_connection(token_info: dict) -> bool:
@@ -227,19 +208,7 @@ async def test_twitch_connection(token_info: dict) -> bool:
             logger.error("To fix this, ensure TWITCH_CLIENT_ID and TWITCH_CLIENT_SECRET are properly configured in the build environment.")
         
         # Check if this is an authentication error
-        error_str = str(e).lower()
-        is_auth_error = (
-            "authentication" in error_str or 
-            "unauthorized" in error_str or 
-            "invalid" in error_str or
-            "access token" in error_str or
-            e.__class__.__name__ == "AuthenticationError" or
-            "client_id" in error_str or
-            "client_secret" in error_str or
-            "bot_id" in error_str
-        )
-        
-        if is_auth_error:
+        if is_twitch_auth_error(e, include_config_errors=True):
             logger.warning("=== AUTHENTICATION ERROR DETECTED IN CONNECTION TEST ===")
             
             # Store and broadcast auth error immediately
@@ -271,8 +240,8 @@ async def test_twitch_connection(token_info: dict) -> bool:
             pass  # Ignore errors when restoring directory
 
 def _ti_major() -> int:
-    """Legacy compatibility wrapper - use get_twitchio_major_version() instead"""
-    return get_twitchio_major_version()
+    """Legacy compatibility wrapper - use TWITCHIO_MAJOR_VERSION instead"""
+    return TWITCHIO_MAJOR_VERSION
 
 def _normalize_tags(tags_obj) -> Dict[str, Any]:
     """
@@ -311,7 +280,7 @@ def _is_vip_from(message, tags: Dict[str, Any]) -> bool:
 
 class TwitchBot(commands.Bot):
     def __init__(self, token: str, nick: str, channel: str, on_event: Callable[[Dict[str, Any]], None], user_id: str = None):
-        self._major = get_twitchio_major_version()
+        self._major = TWITCHIO_MAJOR_VERSION
         self.on_event_cb = on_event
         self.channel_name = channel
         self._nick = nick  # keep our own record for logs
@@ -6,7 +6,7 @@ import secrets
 import time
 import urllib.parse
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 import aiohttp
 from fastapi import APIRouter, HTTPException
@@ -191,6 +191,7 @@ async def twitch_disconnect():
     try:
         result = delete_twitch_auth()
         if result["success"]:
+            _cancel_twitch_expiry_refresh()
             logger.info("Twitch account disconnected")
         return result
     except Exception as e:
@@ -377,12 +378,10 @@ async def test_twitch_connection_endpoint():
 async def test_auto_refresh():
     """Test the automatic token refresh functionality"""
     try:
-        # Reset the refresh attempt tracking to allow testing
+        # Reset the refresh backoff to allow testing
         import app
-        if hasattr(app, 'twitch_refresh_attempted'):
-            old_value = app.twitch_refresh_attempted
-            app.twitch_refresh_attempted = False
-            logger.info(f"Reset twitch_refresh_attempted from {old_value} to False for testing")
+        logger.info(f"Resetting token refresh backoff after {app.twitch_refresh_attempts} attempts for testing")
+        app.reset_twitch_refresh_backoff()
         
         # Simulate an auth error to trigger the refresh logic
         from app import handle_twitch_task_creation_error
@@ -394,7 +393,7 @@ async def test_auto_refresh():
         return {
             "success": True,
             "message": "Auto-refresh test completed - check logs for details",
-            "refresh_attempted": getattr(app, 'twitch_refresh_attempted', False)
+            "refresh_attempted": app.twitch_refresh_attempts > 0
         }
     
     except Exception as e:
@@ -452,15 +451,91 @@ async def get_twitch_user_info(access_token: str) -> Dict[str, Any]:
         return None
 
 async def store_twitch_auth(user_info: Dict[str, Any], token_data: Dict[str, Any]):
-    """Store Twitch auth in database"""
+    """Store Twitch auth in database and schedule its refresh before it expires"""
     try:
         save_twitch_auth(user_info, token_data)
     except Exception as e:
         logger.error(f"Error storing Twitch auth: {e}")
         raise
+    # A fresh token (refresh or re-auth) lets the next auth error refresh right away
+    import app
+    app.reset_twitch_refresh_backoff()
+    if "expires_in" in token_data:
+        _schedule_twitch_expiry_refresh(token_data["expires_in"], token_data.get("refresh_token"))
+
+# Seconds before expiry at which a stored Twitch token is refreshed in the background,
+# so the bot never reconnects with an expired token
+TWITCH_EXPIRY_REFRESH_MARGIN = 300
+
+# Background task refreshing the stored Twitch token before it expires
+_twitch_expiry_refresh_task: Optional[asyncio.Task] = None
+
+def _schedule_twitch_expiry_refresh(expires_in: float, refresh_token: Optional[str]):
+    """(Re)schedule the background refresh of the stored Twitch token"""
+    global _twitch_expiry_refresh_task
+    
+    _cancel_twitch_expiry_refresh()
+    if not refresh_token:
+        return
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    delay = max(0.0, expires_in - TWITCH_EXPIRY_REFRESH_MARGIN)
+    _twitch_expiry_refresh_task = asyncio.create_task(_refresh_twitch_before_expiry(delay, refresh_token))
+    logger.info(f"Twitch token refresh scheduled in {delay:.0f}s")
+
+def _cancel_twitch_expiry_refresh():
+    """Cancel a pending background Twitch token refresh"""
+    global _twitch_expiry_refresh_task
+    
+    task = _twitch_expiry_refresh_task
+    _twitch_expiry_refresh_task = None
+    # The refresh stores the new token itself, which reschedules from inside the task
+    if task is not None and not task.done() and task is not asyncio.current_task():
+        task.cancel()
+
+async def _refresh_twitch_before_expiry(delay: float, refresh_token: str):
+    """Sleep until shortly before the token expires, then rotate it"""
+    await asyncio.sleep(delay)
+    logger.info("Twitch token expires soon, refreshing in the background")
+    try:
+        refreshed_token_data = await refresh_twitch_token(refresh_token)
+        if not refreshed_token_data:
+            logger.warning("Background Twitch token refresh failed, will refresh on the next auth error")
+            return
+        user_info = await get_twitch_user_info(refreshed_token_data["access_token"])
+        if not user_info:
+            logger.warning("Failed to get user info after background Twitch token refresh")
+            return
+        # Storing schedules the next refresh
+        await store_twitch_auth(user_info, refreshed_token_data)
+    except Exception as e:
+        logger.error(f"Error during background Twitch token refresh: {e}")
+
+# refresh token -> in-flight refresh request shared by concurrent callers
+# (auth-error handlers of several bot tasks, bot startup, the refresh endpoint)
+_twitch_refresh_inflight: Dict[str, asyncio.Task] = {}
+_youtube_refresh_inflight: Dict[str, asyncio.Task] = {}
+
+async def _shared_token_refresh(inflight: Dict[str, asyncio.Task], refresh_token: str, request_refresh):
+    """Run request_refresh once per refresh token, letting concurrent callers await the same result"""
+    task = inflight.get(refresh_token)
+    if task is None:
+        task = asyncio.ensure_future(request_refresh(refresh_token))
+        inflight[refresh_token] = task
+        task.add_done_callback(lambda t: inflight.pop(refresh_token, None))
+    else:
+        logger.info("Joining in-flight token refresh")
+    # Shield so a cancelled caller doesn't cancel the refresh others are waiting on
+    return await asyncio.shield(task)
 
 async def refresh_twitch_token(refresh_token: str) -> Dict[str, Any]:
-    """Refresh an expired Twitch access token"""
+    """Refresh an expired Twitch access token (concurrent calls share one request)"""
+    return await _shared_token_refresh(_twitch_refresh_inflight, refresh_token, _request_twitch_token_refresh)
+
+async def _request_twitch_token_refresh(refresh_token: str) -> Dict[str, Any]:
+    """Exchange a Twitch refresh token for a new access token"""
     try:
         logger.info("Attempting Twitch token refresh with refresh token...")
         data = {
@@ -543,6 +618,12 @@ async def get_twitch_token_for_bot():
             logger.error("Twitch token is expired and no refresh token available - user must re-authenticate")
             return None
         
+        # Tokens stored before this run have no refresh scheduled yet
+        pending = _twitch_expiry_refresh_task
+        if not needs_refresh and auth.expires_at and auth.refresh_token and (pending is None or pending.done()):
+            expires_in = (datetime.fromisoformat(auth.expires_at) - datetime.now()).total_seconds()
+            _schedule_twitch_expiry_refresh(expires_in, auth.refresh_token)
+        
         # Return current token if no refresh needed
         return {
             "token": auth.access_token,
@@ -777,7 +858,11 @@ async def store_youtube_auth(channel_info: Dict[str, Any], token_data: Dict[str,
         raise
 
 async def refresh_youtube_token(refresh_token: str) -> Dict[str, Any]:
-    """Refresh an expired YouTube access token"""
+    """Refresh an expired YouTube access token (concurrent calls share one request)"""
+    return await _shared_token_refresh(_youtube_refresh_inflight, refresh_token, _request_youtube_token_refresh)
+
+async def _request_youtube_token_refresh(refresh_token: str) -> Dict[str, Any]:
+    """Exchange a YouTube refresh token for a new access token"""
     try:
         data = {
             "client_id": YOUTUBE_CLIENT_ID,
@@ -152,10 +152,9 @@ async def api_upload_avatar(file: UploadFile, avatar_name: str = Form(...), avat
         
         # Broadcast refresh message to all connected clients and regenerate slot assignments
         # Import here to avoid circular imports
-        from app import hub
+        from app import hub, broadcast_avatar_slots
         from modules.queue_manager import avatar_message_queue
-        from modules.avatars import (generate_avatar_slot_assignments, get_active_avatar_slots,
-                                     get_avatar_slot_assignments, get_avatar_assignments_generation_id)
+        from modules.avatars import generate_avatar_slot_assignments, get_active_avatar_slots
         
         # Regenerate avatar slot assignments since available avatars changed
         get_active_avatar_slots().clear()
@@ -163,11 +162,7 @@ async def api_upload_avatar(file: UploadFile, avatar_name: str = Form(...), avat
         generate_avatar_slot_assignments()
         
         # Broadcast avatar slots update to yappers page
-        asyncio.create_task(hub.broadcast({
-            "type": "avatar_slots_updated",
-            "slots": get_avatar_slot_assignments(),
-            "generationId": get_avatar_assignments_generation_id()
-        }))
+        asyncio.create_task(broadcast_avatar_slots())
         
         # Also broadcast avatar update message for settings page
         asyncio.create_task(hub.broadcast({
@@ -224,10 +219,9 @@ async def api_delete_avatar(avatar_id: int):
         delete_avatar(avatar_id)
         
         # Broadcast refresh message and regenerate slot assignments
-        from app import hub
+        from app import hub, broadcast_avatar_slots
         from modules.queue_manager import avatar_message_queue
-        from modules.avatars import (generate_avatar_slot_assignments, get_active_avatar_slots,
-                                     get_avatar_slot_assignments, get_avatar_assignments_generation_id)
+        from modules.avatars import generate_avatar_slot_assignments, get_active_avatar_slots
         
         # Regenerate avatar slot assignments since available avatars changed
         get_active_avatar_slots().clear()
@@ -235,11 +229,7 @@ async def api_delete_avatar(avatar_id: int):
         generate_avatar_slot_assignments()
         
         # Broadcast avatar slots update to yappers page
-        asyncio.create_task(hub.broadcast({
-            "type": "avatar_slots_updated",
-            "slots": get_avatar_slot_assignments(),
-            "generationId": get_avatar_assignments_generation_id()
-        }))
+        asyncio.create_task(broadcast_avatar_slots())
         
         # Also broadcast avatar update message for settings page
         asyncio.create_task(hub.broadcast({
@@ -257,19 +247,14 @@ async def api_delete_avatar_group(group_id: str):
     """Delete an entire avatar group (all avatars with the same group_id)"""
     try:
         result = delete_avatar_group(group_id)
-        from app import hub
+        from app import hub, broadcast_avatar_slots
         from modules.queue_manager import avatar_message_queue
-        from modules.avatars import (generate_avatar_slot_assignments, get_active_avatar_slots,
-                                     get_avatar_slot_assignments, get_avatar_assignments_generation_id)
+        from modules.avatars import generate_avatar_slot_assignments, get_active_avatar_slots
         get_active_avatar_slots().clear()
         avatar_message_queue.clear()
         generate_avatar_slot_assignments()
         # Broadcast avatar slots update to yappers page
-        asyncio.create_task(hub.broadcast({
-            "type": "avatar_slots_updated",
-            "slots": get_avatar_slot_assignments(),
-            "generationId": get_avatar_assignments_generation_id()
-        }))
+        asyncio.create_task(broadcast_avatar_slots())
         # Also broadcast avatar update message for settings page
         asyncio.create_task(hub.broadcast({
             "type": "avatar_updated",
@@ -286,19 +271,14 @@ async def api_update_avatar_position(group_id: str, position_data: dict):
         spawn_position = position_data.get("spawn_position")
         result = update_avatar_group_position(group_id, spawn_position)
         
-        from app import hub
+        from app import hub, broadcast_avatar_slots
         from modules.queue_manager import avatar_message_queue
-        from modules.avatars import (generate_avatar_slot_assignments, get_active_avatar_slots,
-                                     get_avatar_slot_assignments, get_avatar_assignments_generation_id)
+        from modules.avatars import generate_avatar_slot_assignments, get_active_avatar_slots
         get_active_avatar_slots().clear()
         avatar_message_queue.clear()
         generate_avatar_slot_assignments()
         # Broadcast avatar slots update to yappers page
-        asyncio.create_task(hub.broadcast({
-            "type": "avatar_slots_updated",
-            "slots": get_avatar_slot_assignments(),
-            "generationId": get_avatar_assignments_generation_id()
-        }))
+        asyncio.create_task(broadcast_avatar_slots())
         # Also broadcast avatar update message for settings page
         asyncio.create_task(hub.broadcast({
             "type": "avatar_updated",
@@ -313,19 +293,14 @@ async def api_toggle_avatar_group_disabled(group_id: str):
     """Toggle the disabled status of an entire avatar group"""
     try:
         result = toggle_avatar_group_disabled(group_id)
-        from app import hub
+        from app import hub, broadcast_avatar_slots
         from modules.queue_manager import avatar_message_queue
-        from modules.avatars import (generate_avatar_slot_assignments, get_active_avatar_slots,
-                                     get_avatar_slot_assignments, get_avatar_assignments_generation_id)
+        from modules.avatars import generate_avatar_slot_assignments, get_active_avatar_slots
         get_active_avatar_slots().clear()
         avatar_message_queue.clear()
         generate_avatar_slot_assignments()
         # Broadcast avatar slots update to yappers page
-        asyncio.create_task(hub.broadcast({
-            "type": "avatar_slots_updated",
-            "slots": get_avatar_slot_assignments(),
-            "generationId": get_avatar_assignments_generation_id()
-        }))
+        asyncio.create_task(broadcast_avatar_slots())
         # Also broadcast avatar update message for settings page
         asyncio.create_task(hub.broadcast({
             "type": "avatar_updated",
@@ -340,7 +315,7 @@ async def api_toggle_avatar_group_disabled(group_id: str):
 async def api_regenerate_avatar_slots():
     """Force regeneration of avatar slot assignments (re-randomize avatars)"""
     try:
-        from app import hub
+        from app import broadcast_avatar_slots
         from modules.queue_manager import avatar_message_queue
         from modules.avatars import (generate_avatar_slot_assignments, get_active_avatar_slots,
                                      get_avatar_slot_assignments, get_avatar_assignments_generation_id)
@@ -353,11 +328,7 @@ async def api_regenerate_avatar_slots():
         generate_avatar_slot_assignments()
         
         # Broadcast to all clients to update their assignments
-        await hub.broadcast({
-            "type": "avatar_slots_updated",
-            "slots": get_avatar_slot_assignments(),
-            "generationId": get_avatar_assignments_generation_id()
-        })
+        await broadcast_avatar_slots()
         
         logger.info(f"Avatar slots regenerated (generation #{get_avatar_assignments_generation_id()})")
         
@@ -404,14 +375,18 @@ async def api_get_avatar_queue():
         active_avatar_slots = get_active_avatar_slots()
         avatar_slot_assignments = get_avatar_slot_assignments()
         
+        # Queue times are monotonic; report queued_time as a wall-clock timestamp
+        now = time.monotonic()
+        wall_now = time.time()
         queue_info = []
         for i, item in enumerate(avatar_message_queue):
+            wait_time = now - item["queued_time"]
             queue_info.append({
                 "position": i + 1,
                 "user": item["message_data"].get("user", "unknown"),
                 "text": item["message_data"].get("text", "")[:50] + "..." if len(item["message_data"].get("text", "")) > 50 else item["message_data"].get("text", ""),
-                "queued_time": item["queued_time"],
-                "wait_time": time.time() - item["queued_time"]
+                "queued_time": wall_now - wait_time,
+                "wait_time": wait_time
             })
         
         return {
@@ -453,21 +428,16 @@ async def api_create_avatar_slot(slot_data: dict):
         )
         
         # Broadcast update to all clients
-        from app import hub
+        from app import broadcast_avatar_slots
         from modules.queue_manager import avatar_message_queue
-        from modules.avatars import (generate_avatar_slot_assignments, get_active_avatar_slots,
-                                     get_avatar_slot_assignments, get_avatar_assignments_generation_id)
+        from modules.avatars import generate_avatar_slot_assignments, get_active_avatar_slots
         
         # Regenerate avatar slot assignments
         get_active_avatar_slots().clear()
         avatar_message_queue.clear()
         generate_avatar_slot_assignments()
         
-        await hub.broadcast({
-            "type": "avatar_slots_updated",
-            "slots": get_avatar_slot_assignments(),
-            "generationId": get_avatar_assignments_generation_id()
-        })
+        await broadcast_avatar_slots()
         
         return {"success": True, "slot": slot}
     except Exception as e:
@@ -499,21 +469,16 @@ async def api_update_configured_slot(slot_id: int, slot_data: dict):
             return {"success": False, "error": "Slot not found"}
         
         # Broadcast update to all clients
-        from app import hub
+        from app import broadcast_avatar_slots
         from modules.queue_manager import avatar_message_queue
-        from modules.avatars import (generate_avatar_slot_assignments, get_active_avatar_slots,
-                                     get_avatar_slot_assignments, get_avatar_assignments_generation_id)
+        from modules.avatars import generate_avatar_slot_assignments, get_active_avatar_slots
         
         # Regenerate avatar slot assignments
         get_active_avatar_slots().clear()
         avatar_message_queue.clear()
         generate_avatar_slot_assignments()
         
-        await hub.broadcast({
-            "type": "avatar_slots_updated",
-            "slots": get_avatar_slot_assignments(),
-            "generationId": get_avatar_assignments_generation_id()
-        })
+        await broadcast_avatar_slots()
         
         return {"success": True, "slot": slot}
     except Exception as e:
@@ -531,21 +496,16 @@ async def api_delete_configured_slot(slot_id: int):
             return {"success": False, "error": "Slot not found"}
         
         # Broadcast update to all clients
-        from app import hub
+        from app import broadcast_avatar_slots
         from modules.queue_manager import avatar_message_queue
-        from modules.avatars import (generate_avatar_slot_assignments, get_active_avatar_slots,
-                                     get_avatar_slot_assignments, get_avatar_assignments_generation_id)
+        from modules.avatars import generate_avatar_slot_assignments, get_active_avatar_slots
         
         # Regenerate avatar slot assignments
         get_active_avatar_slots().clear()
         avatar_message_queue.clear()
         generate_avatar_slot_assignments()
         
-        await hub.broadcast({
-            "type": "avatar_slots_updated",
-            "slots": get_avatar_slot_assignments(),
-            "generationId": get_avatar_assignments_generation_id()
-        })
+        await broadcast_avatar_slots()
         
         return {"success": True}
     except Exception as e:
@@ -560,21 +520,16 @@ async def api_delete_all_configured_slots():
         count = delete_all_avatar_slots()
         
         # Broadcast update to all clients
-        from app import hub
+        from app import broadcast_avatar_slots
         from modules.queue_manager import avatar_message_queue
-        from modules.avatars import (generate_avatar_slot_assignments, get_active_avatar_slots,
-                                     get_avatar_slot_assignments, get_avatar_assignments_generation_id)
+        from modules.avatars import generate_avatar_slot_assignments, get_active_avatar_slots
         
         # Regenerate avatar slot assignments (will be empty or use defaults)
         get_active_avatar_slots().clear()
         avatar_message_queue.clear()
         generate_avatar_slot_assignments()
         
-        await hub.broadcast({
-            "type": "avatar_slots_updated",
-            "slots": get_avatar_slot_assignments(),
-            "generationId": get_avatar_assignments_generation_id()
-        })
+        await broadcast_avatar_slots()
         
         return {"success": True, "deleted_count": count}
     except Exception as e:
@@ -19,7 +19,7 @@ from fastapi.responses import StreamingResponse
 from modules import logger
 from modules.persistent_data import (
     get_settings, save_settings, get_all_avatars, get_voices,
-    add_avatar, add_voice, PERSISTENT_AVATARS_DIR, DB_PATH, USER_DATA_DIR,
+    add_avatar, add_voice, invalidate_voices_cache, invalidate_settings_cache, PERSISTENT_AVATARS_DIR, DB_PATH, USER_DATA_DIR,
     engine
 )
 from modules.models import AvatarImage, Voice, Setting
@@ -267,12 +267,9 @@ async def import_config(
                     logger.info(f"Imported {stats['avatars_imported']} avatars, copied {stats['images_copied']} images")
                 
                 # Regenerate avatar slot assignments
-                from app import hub
+                from app import hub, broadcast_avatar_slots
                 from modules.queue_manager import avatar_message_queue
-                from modules.avatars import (
-                    generate_avatar_slot_assignments, get_active_avatar_slots,
-                    get_avatar_slot_assignments, get_avatar_assignments_generation_id
-                )
+                from modules.avatars import generate_avatar_slot_assignments, get_active_avatar_slots
                 
                 get_active_avatar_slots().clear()
                 avatar_message_queue.clear()
@@ -284,11 +281,7 @@ async def import_config(
                     "settings": import_data.get("settings", {})
                 }))
                 
-                asyncio.create_task(hub.broadcast({
-                    "type": "avatar_slots_updated",
-                    "slots": get_avatar_slot_assignments(),
-                    "generationId": get_avatar_assignments_generation_id()
-                }))
+                asyncio.create_task(broadcast_avatar_slots())
                 
                 logger.info(f"Import complete: {stats}")
                 
@@ -303,6 +296,8 @@ async def import_config(
                 # Restore backup on error
                 logger.error(f"Import failed, restoring backup: {e}")
                 shutil.copy2(backup_path, DB_PATH)
+                invalidate_settings_cache()
+                invalidate_voices_cache()
                 raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
             
     except HTTPException:
@@ -404,6 +399,8 @@ async def factory_reset():
             session.exec(delete(AvatarImage))
             session.exec(delete(TwitchAuth))
             session.commit()
+        invalidate_voices_cache()
+        invalidate_settings_cache()
         logger.info("✓ Cleared all database tables")
         
         logger.warning(f"✅ FACTORY RESET COMPLETE - Deleted: {settings_count} settings, {voices_count} voices, {avatars_count} avatars, {avatar_files_deleted} files")
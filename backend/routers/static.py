@@ -1,84 +1,47 @@
 """
 Static file serving and frontend routing
 """
+import hashlib
 import os
+import re
+import stat
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 
 from modules import logger
 
-from modules.persistent_data import PUBLIC_DIR, PERSISTENT_AVATARS_DIR, AUDIO_DIR
+from modules.persistent_data import PUBLIC_DIR, AUDIO_DIR
 
 router = APIRouter()
 
-# Direct route for audio files (fallback if mount doesn't work)
-@router.get("/audio/{filename}")
-async def serve_audio(filename: str):
-    """Serve audio files"""
-    file_path = os.path.join(AUDIO_DIR, filename)
-    logger.info(f"Audio request: {filename} -> {file_path}")
-    
-    if not os.path.isfile(file_path):
-        logger.warning(f"Audio file not found: {file_path}")
-        logger.info(f"AUDIO_DIR: {AUDIO_DIR}")
-        logger.info(f"AUDIO_DIR exists: {os.path.isdir(AUDIO_DIR)}")
-        if os.path.isdir(AUDIO_DIR):
-            try:
-                files = os.listdir(AUDIO_DIR)
-                logger.info(f"Available audio files: {len(files)} files")
-                if files:
-                    logger.info(f"Sample files: {files[:5]}")
-            except Exception as e:
-                logger.error(f"Error listing audio directory: {e}")
-        raise HTTPException(status_code=404, detail="Audio file not found")
-    
-    # Determine MIME type based on file extension
-    media_type = None
-    if filename.lower().endswith('.mp3'):
-        media_type = 'audio/mpeg'
-    elif filename.lower().endswith('.wav'):
-        media_type = 'audio/wav'
-    elif filename.lower().endswith('.ogg'):
-        media_type = 'audio/ogg'
-    elif filename.lower().endswith('.m4a'):
-        media_type = 'audio/mp4'
-    
-    logger.info(f"Serving audio file: {filename} ({os.path.getsize(file_path)} bytes) with MIME type: {media_type}")
-    return FileResponse(file_path, media_type=media_type)
+# MIME types for frontend bundles (others are guessed by FileResponse)
+ASSET_MIME_TYPES = {
+    '.js': 'application/javascript',
+    '.css': 'text/css',
+    '.map': 'application/json',
+}
 
-# Direct route for user avatars (fallback if mount doesn't work)
-@router.get("/user_avatars/{filename}")
-async def serve_user_avatar(filename: str):
-    """Serve user-uploaded avatar images"""
-    file_path = os.path.join(PERSISTENT_AVATARS_DIR, filename)
-    logger.info(f"User avatar request: {filename} -> {file_path}")
-    
-    if not os.path.isfile(file_path):
-        logger.warning(f"User avatar file not found: {file_path}")
-        logger.info(f"PERSISTENT_AVATARS_DIR: {PERSISTENT_AVATARS_DIR}")
-        logger.info(f"PERSISTENT_AVATARS_DIR exists: {os.path.isdir(PERSISTENT_AVATARS_DIR)}")
-        if os.path.isdir(PERSISTENT_AVATARS_DIR):
-            try:
-                files = os.listdir(PERSISTENT_AVATARS_DIR)
-                logger.info(f"Available files: {files}")
-            except Exception as e:
-                logger.error(f"Error listing directory: {e}")
-        raise HTTPException(status_code=404, detail="Avatar not found")
-    
-    # Determine MIME type
-    media_type = None
-    if filename.lower().endswith('.png'):
-        media_type = 'image/png'
-    elif filename.lower().endswith(('.jpg', '.jpeg')):
-        media_type = 'image/jpeg'
-    elif filename.lower().endswith('.gif'):
-        media_type = 'image/gif'
-    elif filename.lower().endswith('.webp'):
-        media_type = 'image/webp'
-    
-    logger.info(f"Serving user avatar: {filename} with MIME type: {media_type}")
-    return FileResponse(file_path, media_type=media_type)
+AUDIO_MIME_TYPES = {
+    '.mp3': 'audio/mpeg',
+    '.wav': 'audio/wav',
+    '.ogg': 'audio/ogg',
+    '.m4a': 'audio/mp4',
+}
+
+# Vite output names look like index-B1x9zQ_k.js: an 8-character hash before the
+# extension. Requiring an uppercase letter, digit or underscore in it keeps plain
+# names like chat-filename.png from being cached as immutable
+HASHED_ASSET_RE = re.compile(r'-(?=[A-Za-z0-9_-]{0,7}[A-Z0-9_])[A-Za-z0-9_-]{8}\.[a-z0-9]+$')
+IMMUTABLE_CACHE_HEADERS = {"Cache-Control": "public, max-age=31536000, immutable"}
+
+# Placeholder served for /vite.svg
+VITE_SVG = b'''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
+            <circle cx="12" cy="12" r="10"/>
+            <path d="m9 12 2 2 4-4"/>
+        </svg>'''
+VITE_SVG_ETAG = f'"{hashlib.md5(VITE_SVG).hexdigest()}"'
+VITE_SVG_HEADERS = {**IMMUTABLE_CACHE_HEADERS, "ETag": VITE_SVG_ETAG}
 
 @router.get("/favicon.ico")
 async def favicon():
@@ -90,6 +53,25 @@ async def favicon():
         # Return a 204 No Content if favicon doesn't exist
         return Response(status_code=204)
 
+@router.get("/audio/{filename}")
+async def serve_audio(filename: str):
+    """Serve generated TTS audio (FileResponse handles Range requests)"""
+    # Audio files sit directly in AUDIO_DIR; reject anything that could walk out of it
+    if filename.startswith('.') or os.path.basename(filename) != filename:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    
+    file_path = os.path.join(AUDIO_DIR, filename)
+    try:
+        stat_result = os.stat(file_path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(status_code=404, detail="Audio not found")
+    
+    # Pass the stat along so FileResponse doesn't stat the file again
+    media_type = AUDIO_MIME_TYPES.get(os.path.splitext(filename)[1].lower())
+    return FileResponse(file_path, media_type=media_type, stat_result=stat_result)
+
 # Assets endpoint (needs to be defined as a route)
 if os.path.isdir(PUBLIC_DIR):
     assets_dir = os.path.join(PUBLIC_DIR, "assets")
@@ -98,25 +80,16 @@ if os.path.isdir(PUBLIC_DIR):
         async def serve_assets(filename: str):
             """Serve assets with correct MIME types"""
             file_path = os.path.join(assets_dir, filename)
-            logger.info(f"Assets request: {filename} -> {file_path}")
             
             if not os.path.isfile(file_path):
                 logger.info(f"Asset file not found: {file_path}")
                 raise HTTPException(status_code=404, detail="Asset not found")
             
-            # Determine MIME type based on file extension
-            media_type = None
-            if filename.endswith('.js'):
-                media_type = 'application/javascript'
-                logger.info(f"Setting JavaScript MIME type for: {filename}")
-            elif filename.endswith('.css'):
-                media_type = 'text/css'
-                logger.info(f"Setting CSS MIME type for: {filename}")
-            elif filename.endswith('.map'):
-                media_type = 'application/json'
+            media_type = ASSET_MIME_TYPES.get(os.path.splitext(filename)[1])
             
-            logger.info(f"Serving asset: {filename} with MIME type: {media_type}")
-            return FileResponse(file_path, media_type=media_type)
+            # Vite puts a content hash in bundle names, so those never change in place
+            headers = IMMUTABLE_CACHE_HEADERS if HASHED_ASSET_RE.search(filename) else None
+            return FileResponse(file_path, media_type=media_type, headers=headers)
 
     # Handle specific routes for SPA
     @router.get("/settings")
@@ -133,13 +106,11 @@ if os.path.isdir(PUBLIC_DIR):
     
     # Handle vite.svg specifically
     @router.get("/vite.svg")
-    async def serve_vite_svg():
+    async def serve_vite_svg(request: Request):
         """Serve vite.svg placeholder"""
-        svg_content = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-            <circle cx="12" cy="12" r="10"/>
-            <path d="m9 12 2 2 4-4"/>
-        </svg>'''
-        return Response(content=svg_content, media_type="image/svg+xml")
+        if request.headers.get("if-none-match") == VITE_SVG_ETAG:
+            return Response(status_code=304, headers=VITE_SVG_HEADERS)
+        return Response(content=VITE_SVG, media_type="image/svg+xml", headers=VITE_SVG_HEADERS)
     
     # Handle root path
     @router.get("/")
@@ -150,46 +121,14 @@ if os.path.isdir(PUBLIC_DIR):
 
 def mount_static_files(app):
     """Mount static file directories after all routes are defined"""
-    logger.info(f"=== MOUNTING STATIC FILES ===")
-    logger.info(f"PUBLIC_DIR: {PUBLIC_DIR}")
-    logger.info(f"PUBLIC_DIR exists: {os.path.isdir(PUBLIC_DIR)}")
-    logger.info(f"PERSISTENT_AVATARS_DIR: {PERSISTENT_AVATARS_DIR}")
-    logger.info(f"PERSISTENT_AVATARS_DIR exists: {os.path.isdir(PERSISTENT_AVATARS_DIR)}")
-    
-    if os.path.isdir(PUBLIC_DIR):
-        logger.info(f"Mounting static files from: {PUBLIC_DIR}")
-        
-        # Mount built-in voice avatars
-        voice_avatars_dir = os.path.join(PUBLIC_DIR, "voice_avatars")
-        if os.path.isdir(voice_avatars_dir):
-            logger.info(f"Mounting /voice_avatars from: {voice_avatars_dir}")
-            app.mount("/voice_avatars", StaticFiles(directory=voice_avatars_dir), name="voice_avatars")
-        else:
-            logger.warning(f"Built-in voice avatars directory not found: {voice_avatars_dir}")
-        
-        # Mount user-uploaded avatars from persistent directory
-        if os.path.isdir(PERSISTENT_AVATARS_DIR):
-            logger.info(f"Mounting /user_avatars from: {PERSISTENT_AVATARS_DIR}")
-            # List files in directory for debugging
-            try:
-                files = os.listdir(PERSISTENT_AVATARS_DIR)
-                logger.info(f"Files in PERSISTENT_AVATARS_DIR: {len(files)} files")
-                if files:
-                    logger.info(f"Sample files: {files[:5]}")
-            except Exception as e:
-                logger.error(f"Error listing files in PERSISTENT_AVATARS_DIR: {e}")
-            
-            app.mount("/user_avatars", StaticFiles(directory=PERSISTENT_AVATARS_DIR), name="user_avatars")
-        else:
-            logger.warning(f"User avatars directory not found: {PERSISTENT_AVATARS_DIR}")
-            logger.warning(f"Creating directory: {PERSISTENT_AVATARS_DIR}")
-            try:
-                os.makedirs(PERSISTENT_AVATARS_DIR, exist_ok=True)
-                logger.info(f"Directory created successfully")
-                app.mount("/user_avatars", StaticFiles(directory=PERSISTENT_AVATARS_DIR), name="user_avatars")
-            except Exception as e:
-                logger.error(f"Failed to create PERSISTENT_AVATARS_DIR: {e}")
-    else:
+    if not os.path.isdir(PUBLIC_DIR):
         logger.error(f"Static files directory not found: {PUBLIC_DIR}")
+        return
     
-    logger.info(f"=== STATIC FILES MOUNT COMPLETE ===")
\ No newline at end of file
+    # Mount built-in voice avatars
+    voice_avatars_dir = os.path.join(PUBLIC_DIR, "voice_avatars")
+    if os.path.isdir(voice_avatars_dir):
+        app.mount("/voice_avatars", StaticFiles(directory=voice_avatars_dir), name="voice_avatars")
+        logger.info(f"Mounted static files from: {PUBLIC_DIR}")
+    else:
+        logger.warning(f"Built-in voice avatars directory not found: {voice_avatars_dir}")
\ No newline at end of file
@@ -1,15 +1,15 @@
 """
 System, settings, stats, and debug router
 """
-import json
+import asyncio
 import os
 import platform
 from pathlib import Path
 from typing import Dict, Any, List
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 
-from modules import logger
+from modules import logger, dumps_json, tts
 from modules.persistent_data import get_settings, Debug_Database, DB_PATH
 
 router = APIRouter()
@@ -18,7 +18,7 @@ router = APIRouter()
 async def api_get_settings():
     logger.info("API: GET /api/settings called")
     settings = get_settings()
-    logger.info(f"API: Returning settings: {len(json.dumps(settings))} characters")
+    logger.info(f"API: Returning settings: {len(dumps_json(settings))} characters")
     return settings
 
 @router.post("/api/settings")
@@ -52,6 +52,19 @@ async def api_get_status():
     logger.info(f"API: Returning status: {status}")
     return status
 
+# Common web-safe fonts that might not be detected on the system
+WEB_SAFE_FONTS = (
+    {'name': 'Arial', 'family': 'Arial, sans-serif'},
+    {'name': 'Helvetica', 'family': 'Helvetica, sans-serif'},
+    {'name': 'Times New Roman', 'family': '"Times New Roman", Times, serif'},
+    {'name': 'Courier New', 'family': '"Courier New", Courier, monospace'},
+    {'name': 'Verdana', 'family': 'Verdana, sans-serif'},
+    {'name': 'Georgia', 'family': 'Georgia, serif'},
+)
+
+# Serialized /api/system/fonts response, built on first request
+_fonts_response_body = None
+
 def get_system_fonts() -> List[Dict[str, str]]:
     """
     Detect installed system fonts on Windows and Linux.
@@ -121,18 +134,8 @@ def get_system_fonts() -> List[Dict[str, str]]:
         fonts.sort(key=lambda x: x['name'].lower())
         
         # Add common web-safe fonts that might not be detected
-        web_safe = [
-            {'name': 'Arial', 'family': 'Arial, sans-serif'},
-            {'name': 'Helvetica', 'family': 'Helvetica, sans-serif'},
-            {'name': 'Times New Roman', 'family': '"Times New Roman", Times, serif'},
-            {'name': 'Courier New', 'family': '"Courier New", Courier, monospace'},
-            {'name': 'Verdana', 'family': 'Verdana, sans-serif'},
-            {'name': 'Georgia', 'family': 'Georgia, serif'},
-        ]
-        
-        # Add web-safe fonts if not already in the list
         existing_names = {f['name'] for f in fonts}
-        for ws_font in web_safe:
+        for ws_font in WEB_SAFE_FONTS:
             if ws_font['name'] not in existing_names:
                 fonts.insert(0, ws_font)
         
@@ -141,23 +144,18 @@ def get_system_fonts() -> List[Dict[str, str]]:
     except Exception as e:
         logger.error(f"Error detecting system fonts: {e}")
         # Return basic web-safe fonts as fallback
-        fonts = [
-            {'name': 'Arial', 'family': 'Arial, sans-serif'},
-            {'name': 'Helvetica', 'family': 'Helvetica, sans-serif'},
-            {'name': 'Verdana', 'family': 'Verdana, sans-serif'},
-            {'name': 'Georgia', 'family': 'Georgia, serif'},
-            {'name': 'Times New Roman', 'family': '"Times New Roman", Times, serif'},
-            {'name': 'Courier New', 'family': '"Courier New", Courier, monospace'},
-        ]
+        fonts = list(WEB_SAFE_FONTS)
     
     return fonts
 
 @router.get("/api/system/fonts")
-async def api_get_system_fonts():
-    """Get list of installed system fonts"""
-    logger.info("API: GET /api/system/fonts called")
-    fonts = get_system_fonts()
-    return {"fonts": fonts, "count": len(fonts)}
+async def api_get_system_fonts(refresh: bool = False):
+    """Get list of installed system fonts (scanned once, pass refresh=true to rescan)"""
+    global _fonts_response_body
+    if _fonts_response_body is None or refresh:
+        fonts = get_system_fonts()
+        _fonts_response_body = dumps_json({"fonts": fonts, "count": len(fonts)}).encode("utf-8")
+    return Response(content=_fonts_response_body, media_type="application/json")
 
 @router.get("/api/debug/tts-state")
 async def api_debug_tts_state():
@@ -232,7 +230,9 @@ async def api_voice_stats():
     try:
         # Import global stats when needed
         from app import voice_usage_stats, voice_selection_count
-        from modules.tts import fallback_voice_stats, fallback_selection_count
+        # Read through the module: fallback_selection_count is rebound on every fallback
+        fallback_voice_stats = tts.fallback_voice_stats
+        fallback_selection_count = tts.fallback_selection_count
         
         # Calculate percentages for main voice selections
         main_stats = {}
@@ -272,17 +272,13 @@ async def api_voice_stats():
 async def api_reset_voice_stats():
     """Reset voice usage distribution statistics"""
     try:
-        # Import functions and variables when needed
-        from app import voice_usage_stats, voice_selection_count
-        from modules.tts import reset_fallback_stats
-        
         # Reset global stats - need to import and modify the actual global variables
         import app
         app.voice_usage_stats.clear()
         app.voice_selection_count = 0
         
         # Reset fallback stats
-        reset_fallback_stats()
+        tts.reset_fallback_stats()
         
         logger.info("Voice distribution statistics have been reset")
         return {"ok": True, "message": "Voice statistics reset successfully"}
@@ -358,22 +354,12 @@ async def api_debug_database():
 async def api_get_message_history():
     """Get message history for testing and replay"""
     try:
-        from app import message_history
-        
-        # Convert deque to list and format timestamps
-        history_list = []
-        for msg in message_history:
-            history_list.append({
-                "timestamp": msg["timestamp"],
-                "username": msg["username"],
-                "original_text": msg["original_text"],
-                "filtered_text": msg["filtered_text"],
-                "event_type": msg["event_type"],
-                "was_filtered": msg["was_filtered"]
-            })
+        from app import message_history, MESSAGE_HISTORY_FIELDS
         
-        # Return in reverse order (newest first)
-        return {"success": True, "messages": list(reversed(history_list))}
+        # Newest first; deques iterate in reverse without copying.
+        # zip stops at the last UI field, leaving out the stored tags.
+        messages = [dict(zip(MESSAGE_HISTORY_FIELDS, msg)) for msg in reversed(message_history)]
+        return {"success": True, "messages": messages}
     except Exception as e:
         logger.error(f"Failed to get message history: {e}", exc_info=True)
         return {"success": False, "error": str(e), "messages": []}
@@ -383,7 +369,6 @@ async def api_replay_message(payload: Dict[str, Any]):
     """Replay a message through the TTS pipeline for testing"""
     try:
         from app import handle_event
-        import asyncio
         
         # Extract message data
         username = payload.get("username", "TestUser")
@@ -416,7 +401,6 @@ async def api_test_clearchat(payload: Dict[str, Any]):
     """Simulate a Twitch CLEARCHAT event (ban/timeout) for testing"""
     try:
         from app import handle_moderation_event
-        import asyncio
         
         # Extract parameters
         target_user = payload.get("target_user", "TestUser")
@@ -461,7 +445,6 @@ async def api_test_clearchat(payload: Dict[str, Any]):
 async def test_parallel_limit():
     """Test parallel message limiting by sending multiple messages rapidly"""
     try:
-        import asyncio
         import time
         from app import handle_event
         
@@ -5,7 +5,7 @@ import json
 
 from fastapi import APIRouter, Form, HTTPException
 
-from modules import logger
+from modules import logger, loads_json
 from modules.persistent_data import get_settings
 
 router = APIRouter()
@@ -18,7 +18,7 @@ async def api_simulate(
     testVoice: str = Form(None)
 ):
     """Simulate a chat message"""
-    logger.info(f"Simulate request: user={user}, text={text}, eventType={eventType}, testVoice={testVoice}")
+    logger.debug(f"Simulate request: user={user}, text={text}, eventType={eventType}, testVoice={testVoice}")
     
     # Import functions when needed to avoid circular imports
     from app import handle_event, handle_test_voice_event, should_process_message
@@ -37,7 +37,7 @@ async def api_simulate(
     # If testVoice is provided, parse it and use it directly
     if testVoice:
         try:
-            test_voice_data = json.loads(testVoice)
+            test_voice_data = loads_json(testVoice)
             await handle_test_voice_event({
                 "user": user, 
                 "text": final_text, 
@@ -109,7 +109,7 @@ async def api_get_active_tts():
     """Get list of currently active TTS jobs"""
     try:
         # Import global variables when needed
-        from app import active_tts_jobs, tts_enabled
+        from app import active_tts_jobs, tts_state
         
         active_jobs = {}
         for username, job_info in active_tts_jobs.items():
@@ -123,7 +123,7 @@ async def api_get_active_tts():
             "success": True,
             "active_jobs": active_jobs,
             "total_active": len(active_jobs),
-            "tts_enabled": tts_enabled
+            "tts_enabled": tts_state.enabled
         }
     except Exception as e:
         logger.error(f"Failed to get active TTS jobs: {e}", exc_info=True)
@@ -134,10 +134,10 @@ async def api_stop_all_tts():
     """Stop all TTS activity"""
     try:
         # Import function when needed to avoid circular imports
-        from app import stop_all_tts, tts_enabled
+        from app import stop_all_tts, tts_state
         
         stop_all_tts()
-        return {"success": True, "message": "All TTS stopped", "tts_enabled": tts_enabled}
+        return {"success": True, "message": "All TTS stopped", "tts_enabled": tts_state.enabled}
     except Exception as e:
         logger.error(f"Failed to stop all TTS: {e}", exc_info=True)
         return {"success": False, "error": str(e)}
@@ -147,10 +147,10 @@ async def api_resume_all_tts():
     """Resume TTS processing"""
     try:
         # Import function when needed to avoid circular imports
-        from app import resume_all_tts, tts_enabled
+        from app import resume_all_tts, tts_state
         
         resume_all_tts()
-        return {"success": True, "message": "TTS processing resumed", "tts_enabled": tts_enabled}
+        return {"success": True, "message": "TTS processing resumed", "tts_enabled": tts_state.enabled}
     except Exception as e:
         logger.error(f"Failed to resume TTS: {e}", exc_info=True)
         return {"success": False, "error": str(e)}
@@ -174,11 +174,11 @@ async def api_get_tts_status():
     """Get current TTS status"""
     try:
         # Import global variables when needed
-        from app import active_tts_jobs, tts_enabled
+        from app import active_tts_jobs, tts_state
         
         return {
             "success": True,
-            "tts_enabled": tts_enabled,
+            "tts_enabled": tts_state.enabled,
             "active_jobs_count": len(active_tts_jobs)
         }
     except Exception as e:
@@ -7,9 +7,13 @@ import aiohttp
 from fastapi import APIRouter
 
 from modules import logger
-from modules.models import Voice
+from modules.models import Voice, ProviderVoiceCache
+from modules.tts import EdgeTTSProvider, GoogleTTSProvider, AmazonPollyProvider, MonsterTTSProvider
 
-from modules.persistent_data import get_voices, check_voice_exists, add_voice, get_voice_by_id, remove_voice
+from modules.persistent_data import (
+    get_voices, check_voice_exists, add_voice, get_voice_by_id, remove_voice, invalidate_voices_cache,
+    hash_credentials, Session, engine, select
+)
 router = APIRouter()
 
 @router.get("/api/voices")
@@ -48,9 +52,6 @@ async def api_add_voice(voice_data: dict):
 @router.put("/api/voices/{voice_id}")
 async def api_update_voice(voice_id: int, voice_data: dict):
     """Update a voice (enable/disable, change avatar, etc.)"""
-    from sqlmodel import Session, select
-    from modules.persistent_data import engine
-    
     with Session(engine) as session:
         voice = session.get(Voice, voice_id)
         
@@ -74,6 +75,7 @@ async def api_update_voice(voice_id: int, voice_data: dict):
         session.add(voice)
         session.commit()
         session.refresh(voice)
+        invalidate_voices_cache()
 
         return {"success": True, "voice": voice.dict()}
 
@@ -90,7 +92,6 @@ async def api_get_available_voices(provider: str, api_key: str = None):
     if provider == "edge":
         # Fetch Edge TTS voices dynamically (with caching enabled by default)
         try:
-            from modules.tts import EdgeTTSProvider
             edge_provider = EdgeTTSProvider()
             voices = await edge_provider.list_voices(use_cache=True)
             logger.info(f"Fetched {len(voices)} Edge TTS voices from cache or API")
@@ -151,7 +152,6 @@ async def api_get_available_voices(provider: str, api_key: str = None):
             return {"error": "API key required for Google TTS voices"}
         
         try:
-            from modules.tts import GoogleTTSProvider
             google_provider = GoogleTTSProvider(api_key)
             voices = await google_provider.list_voices()
             return {"voices": voices}
@@ -164,8 +164,6 @@ async def api_get_available_voices(provider: str, api_key: str = None):
 async def api_get_polly_voices(credentials: dict):
     """Get available voices from Amazon Polly (with caching)"""
     try:
-        from modules.tts import AmazonPollyProvider
-        from modules import logger
         
         refresh = credentials.get('refresh', False)
         use_cache = not refresh
@@ -182,11 +180,9 @@ async def api_get_polly_voices(credentials: dict):
         voices = await polly_provider.list_voices(use_cache=use_cache)
         
         # Get cache info
-        from modules.persistent_data import get_cached_voices, hash_credentials
         credentials_hash = hash_credentials(credentials.get('accessKey', ''), credentials.get('secretKey', ''))
         
         # Get the cache entry to find last_updated
-        from modules.persistent_data import Session, engine, select, ProviderVoiceCache
         with Session(engine) as session:
             cache = session.exec(select(ProviderVoiceCache).where(ProviderVoiceCache.provider == "polly")).first()
             last_updated = cache.last_updated if cache else None
@@ -197,7 +193,6 @@ async def api_get_polly_voices(credentials: dict):
             "last_updated": last_updated
         }
     except Exception as e:
-        from modules import logger
         logger.error(f"Error fetching Polly voices: {e}")
         return {"error": f"Error fetching Polly voices: {str(e)}"}
 
@@ -205,8 +200,6 @@ async def api_get_polly_voices(credentials: dict):
 async def api_get_google_voices(credentials: dict):
     """Get available voices from Google Cloud TTS (with caching)"""
     try:
-        from modules.tts import GoogleTTSProvider
-        from modules import logger
         
         api_key = credentials.get('apiKey', '')
         if not api_key:
@@ -223,11 +216,9 @@ async def api_get_google_voices(credentials: dict):
         voices = await google_provider.list_voices(use_cache=use_cache)
         
         # Get cache info
-        from modules.persistent_data import get_cached_voices, hash_credentials
         credentials_hash = hash_credentials(api_key)
         
         # Get the cache entry to find last_updated
-        from modules.persistent_data import Session, engine, select, ProviderVoiceCache
         with Session(engine) as session:
             cache = session.exec(select(ProviderVoiceCache).where(ProviderVoiceCache.provider == "google")).first()
             last_updated = cache.last_updated if cache else None
@@ -238,7 +229,6 @@ async def api_get_google_voices(credentials: dict):
             "last_updated": last_updated
         }
     except Exception as e:
-        from modules import logger
         logger.error(f"Error fetching Google TTS voices: {e}")
         return {"error": f"Error fetching Google TTS voices: {str(e)}"}
 
@@ -246,8 +236,6 @@ async def api_get_google_voices(credentials: dict):
 async def api_get_monstertts_voices(credentials: dict):
     """Get available voices from MonsterTTS (with caching)"""
     try:
-        from modules.tts import MonsterTTSProvider
-        from modules import logger
         
         api_key = credentials.get('apiKey', '')
         if not api_key:
@@ -264,11 +252,9 @@ async def api_get_monstertts_voices(credentials: dict):
         voices = await monster_provider.list_voices(use_cache=use_cache)
         
         # Get cache info
-        from modules.persistent_data import get_cached_voices, hash_credentials
         credentials_hash = hash_credentials(api_key)
         
         # Get the cache entry to find last_updated
-        from modules.persistent_data import Session, engine, select, ProviderVoiceCache
         with Session(engine) as session:
             cache = session.exec(select(ProviderVoiceCache).where(ProviderVoiceCache.provider == "monstertts")).first()
             last_updated = cache.last_updated if cache else None
@@ -279,7 +265,6 @@ async def api_get_monstertts_voices(credentials: dict):
             "last_updated": last_updated
         }
     except Exception as e:
-        from modules import logger
         logger.error(f"Error fetching MonsterTTS voices: {e}")
         return {"error": f"Error fetching MonsterTTS voices: {str(e)}"}
 
@@ -290,8 +275,6 @@ async def api_get_edge_voices(request: dict = None):
     Note: Edge TTS is free and doesn't require credentials.
     """
     try:
-        from modules.tts import EdgeTTSProvider
-        from modules import logger
         
         # Edge TTS doesn't need credentials, but we support refresh parameter
         refresh = request.get('refresh', False) if request else False
@@ -305,7 +288,6 @@ async def api_get_edge_voices(request: dict = None):
         voices = await edge_provider.list_voices(use_cache=use_cache)
         
         # Get cache info (no credential hash for free service)
-        from modules.persistent_data import Session, engine, select, ProviderVoiceCache
         with Session(engine) as session:
             cache = session.exec(select(ProviderVoiceCache).where(ProviderVoiceCache.provider == "edge")).first()
             last_updated = cache.last_updated if cache else None
@@ -316,6 +298,5 @@ async def api_get_edge_voices(request: dict = None):
             "last_updated": last_updated
         }
     except Exception as e:
-        from modules import logger
         logger.error(f"Error fetching Edge TTS voices: {e}")
         return {"error": f"Error fetching Edge TTS voices: {str(e)}"}
\ No newline at end of file
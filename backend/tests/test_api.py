@@ -43,6 +43,51 @@ class TestSettingsEndpoints:
         
         assert response.status_code == 200
         assert response.json().get("ok") is True
+    
+    def test_settings_update_is_visible_after_cached_read(self, client):
+        """Test that cached settings are refreshed after a settings update"""
+        current_settings = client.get("/api/settings").json()
+        original_volume = current_settings.get("volume", 1.0)
+        
+        try:
+            client.post("/api/settings", json={**current_settings, "volume": 0.25})
+            assert client.get("/api/settings").json()["volume"] == 0.25
+        finally:
+            client.post("/api/settings", json={**current_settings, "volume": original_volume})
+    
+    def test_settings_save_seeds_cache(self, client, monkeypatch):
+        """Test that reading settings right after a save doesn't go back to the database"""
+        from modules import persistent_data
+        current_settings = client.get("/api/settings").json()
+        
+        persistent_data.save_settings(current_settings)
+        monkeypatch.setattr(persistent_data, "_load_settings", lambda: pytest.fail("settings reloaded"))
+        
+        assert persistent_data.get_settings() == current_settings
+    
+    def test_single_setting_follows_saves(self, client):
+        """Test that get_setting reads the current value and falls back to the default"""
+        from modules import persistent_data
+        current_settings = client.get("/api/settings").json()
+        
+        try:
+            persistent_data.save_settings({**current_settings, "parallelMessageLimit": 2})
+            assert persistent_data.get_setting("parallelMessageLimit", 5) == 2
+            assert persistent_data.get_setting("missingSetting", "fallback") == "fallback"
+        finally:
+            persistent_data.save_settings(current_settings)
+    
+    @pytest.mark.parametrize("value,expected", [(3, 3), (2.5, 3), (0, 0), (-1, 0), (None, 0), ("4", 0)])
+    def test_parallel_limit_is_normalized(self, client, value, expected):
+        """Test that parallelMessageLimit is read as a whole number with 0 meaning unlimited"""
+        from modules import persistent_data
+        current_settings = client.get("/api/settings").json()
+        
+        try:
+            persistent_data.save_settings({**current_settings, "parallelMessageLimit": value})
+            assert persistent_data.get_parallel_limit() == expected
+        finally:
+            persistent_data.save_settings(current_settings)
 
 
 @pytest.mark.unit
@@ -124,6 +169,13 @@ class TestTTSControlEndpoints:
         # Should succeed even if no TTS is playing
         assert response.status_code == 200
     
+    def test_stop_and_resume_report_current_state(self, client):
+        """Test that stop/resume responses reflect the state after the call"""
+        try:
+            assert client.post("/api/tts/stop-all").json()["tts_enabled"] is False
+        finally:
+            assert client.post("/api/tts/resume-all").json()["tts_enabled"] is True
+    
     @pytest.mark.asyncio
     async def test_toggle_tts_enabled(self, client):
         """Test toggling TTS enabled state"""
@@ -150,6 +202,28 @@ class TestStatusEndpoint:
         assert "status" in data
         assert data["status"] == "running"
     
+    def test_system_fonts(self, client):
+        """Test fonts endpoint returns the cached font list"""
+        response = client.get("/api/system/fonts")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == len(data["fonts"])
+        assert any(font["name"] == "Arial" for font in data["fonts"])
+        assert client.get("/api/system/fonts").content == response.content
+    
+    def test_message_history_newest_first(self, client):
+        """Test message history is returned newest first without tags"""
+        import app as app_module
+        
+        app_module.add_to_message_history("first", "hello", "hello", tags={"badges": "vip"})
+        app_module.add_to_message_history("second", "hi", "hi")
+        
+        messages = client.get("/api/test/message-history").json()["messages"]
+        
+        assert [m["username"] for m in messages[:2]] == ["second", "first"]
+        assert "tags" not in messages[0]
+    
     def test_test_endpoint(self, client):
         """Test simple test endpoint"""
         response = client.get("/api/test")
@@ -159,6 +233,307 @@ class TestStatusEndpoint:
         assert data.get("success") is True
 
 
+@pytest.mark.unit
+@pytest.mark.api
+class TestAudioEndpoint:
+    """Tests for serving generated audio"""
+    
+    def test_audio_supports_range_requests(self, client):
+        """Test that audio files can be fetched in byte ranges"""
+        from modules.persistent_data import AUDIO_DIR
+        
+        audio_path = Path(AUDIO_DIR) / "test_range_request.mp3"
+        audio_path.write_bytes(bytes(range(256)) * 4)
+        try:
+            response = client.get("/audio/test_range_request.mp3", headers={"Range": "bytes=100-199"})
+            
+            assert response.status_code == 206
+            assert response.headers["content-range"] == "bytes 100-199/1024"
+            assert response.content == (bytes(range(256)) * 4)[100:200]
+        finally:
+            audio_path.unlink()
+    
+    def test_audio_rejects_paths_outside_audio_dir(self, client):
+        """Test that only files directly inside the audio directory are served"""
+        assert client.get("/audio/..%2Fchatyapper.db").status_code == 404
+        assert client.get("/audio/.hidden.mp3").status_code == 404
+        assert client.get("/audio/missing.mp3").status_code == 404
+    
+    @pytest.mark.parametrize("filename,hashed", [
+        ("index-B1x9zQ_k.js", True),
+        ("vendor-a1b2c3d4.css", True),
+        ("some-long-filename.png", False),
+        ("chat-overlay-background.js", False),
+        ("index-B1x9zQ_k9.js", False),
+    ])
+    def test_only_vite_hashed_assets_are_immutable(self, filename, hashed):
+        """Test that only names ending in a Vite content hash count as hashed"""
+        from routers.static import HASHED_ASSET_RE
+        
+        assert bool(HASHED_ASSET_RE.search(filename)) == hashed
+
+
+class FakeSocket:
+    """WebSocket stand-in that records sent frames after an optional delay"""
+    
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.sent = []
+        self.close_code = None
+    
+    async def send_text(self, data):
+        import asyncio
+        await asyncio.sleep(self.delay)
+        self.sent.append(data)
+    
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+@pytest.mark.unit
+@pytest.mark.api
+class TestHubBroadcast:
+    """Tests for WebSocket hub broadcasting"""
+    
+    @pytest.mark.asyncio
+    async def test_slow_client_is_dropped_without_blocking_others(self, monkeypatch):
+        """Test that a client exceeding the send timeout is unregistered"""
+        import asyncio
+        import app as app_module
+        
+        monkeypatch.setattr(app_module, "HUB_SEND_TIMEOUT", 0.05)
+        hub = app_module.Hub()
+        fast, slow = FakeSocket(), FakeSocket(delay=1)
+        hub.register(slow)
+        hub.register(fast)
+        
+        await hub.broadcast({"type": "play"})
+        await asyncio.sleep(0.1)
+        
+        assert [json.loads(data) for data in fast.sent] == [{"type": "play"}]
+        assert hub.clients == {fast}
+        # Closing the socket makes the frontend reconnect instead of waiting forever
+        assert slow.close_code == app_module.HUB_DROP_CLOSE_CODE
+        assert fast.close_code is None
+    
+    @pytest.mark.asyncio
+    async def test_client_with_full_queue_is_dropped(self, monkeypatch):
+        """Test that broadcasting never waits on a client that has fallen behind"""
+        import asyncio
+        import app as app_module
+        
+        monkeypatch.setattr(app_module, "HUB_CLIENT_QUEUE_SIZE", 2)
+        hub = app_module.Hub()
+        stuck = FakeSocket(delay=10)
+        hub.register(stuck)
+        
+        for i in range(4):
+            await hub.broadcast({"type": "play", "n": i})
+        await asyncio.sleep(0.01)
+        
+        assert hub.clients == set()
+        assert stuck.close_code == app_module.HUB_DROP_CLOSE_CODE
+    
+    @pytest.mark.asyncio
+    async def test_burst_is_delivered_in_order(self):
+        """Test that messages queued while the sender was busy arrive in order as one array frame"""
+        import asyncio
+        import app as app_module
+        
+        hub = app_module.Hub()
+        client = FakeSocket()
+        hub.register(client)
+        
+        for i in range(10):
+            await hub.broadcast({"type": "play", "n": i})
+        await asyncio.sleep(0.01)
+        
+        assert len(client.sent) == 1
+        assert [message["n"] for message in json.loads(client.sent[0])] == list(range(10))
+    
+    @pytest.mark.asyncio
+    async def test_broadcast_nowait_queues_without_a_task(self):
+        """Test that sync callers can queue a broadcast that is delivered in order"""
+        import asyncio
+        import app as app_module
+        
+        hub = app_module.Hub()
+        client = FakeSocket()
+        hub.register(client)
+        
+        hub.broadcast_nowait({"type": "tts_cancelled", "user": "a"})
+        hub.broadcast_nowait({"type": "tts_cancelled", "user": "b"})
+        await asyncio.sleep(0.01)
+        
+        assert [message["user"] for message in json.loads(client.sent[0])] == ["a", "b"]
+    
+    @pytest.mark.asyncio
+    async def test_scheduled_broadcasts_are_coalesced(self, monkeypatch):
+        """Test that a burst of scheduled broadcasts with one key sends only the last"""
+        import asyncio
+        import app as app_module
+        
+        monkeypatch.setattr(app_module, "BROADCAST_COALESCE_DELAY", 0.01)
+        hub = app_module.Hub()
+        client = FakeSocket()
+        hub.register(client)
+        
+        for i in range(5):
+            hub.schedule_broadcast("settings_updated", lambda i=i: hub.broadcast({"type": "settings_updated", "n": i}))
+        await asyncio.sleep(0.05)
+        
+        assert [json.loads(data)["n"] for data in client.sent] == [4]
+    
+    @pytest.mark.asyncio
+    async def test_avatar_slots_request_is_answered_only_to_requester(self, monkeypatch):
+        """Test that request_avatar_slots replies to the requesting client alone"""
+        import asyncio
+        import app as app_module
+        
+        hub = app_module.Hub()
+        monkeypatch.setattr(app_module, "hub", hub)
+        requester, other = FakeSocket(), FakeSocket()
+        hub.register(requester)
+        hub.register(other)
+        
+        await app_module.handle_websocket_message({"type": "request_avatar_slots"}, requester)
+        await asyncio.sleep(0.01)
+        
+        assert [json.loads(data)["type"] for data in requester.sent] == ["avatar_slots_updated"]
+        assert other.sent == []
+    
+    @pytest.mark.asyncio
+    async def test_ping_is_answered_only_to_requester(self, monkeypatch):
+        """Test that a ping gets a pong on the pinging client alone"""
+        import asyncio
+        import app as app_module
+        
+        hub = app_module.Hub()
+        monkeypatch.setattr(app_module, "hub", hub)
+        requester, other = FakeSocket(), FakeSocket()
+        hub.register(requester)
+        hub.register(other)
+        
+        await app_module.handle_websocket_message({"type": "ping"}, requester)
+        await asyncio.sleep(0.01)
+        
+        assert [json.loads(data) for data in requester.sent] == [{"type": "pong"}]
+        assert other.sent == []
+    
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_json_helpers_keep_text_unescaped(self, monkeypatch, use_orjson):
+        """Test that both JSON backends emit compact output with non-ASCII text left as is"""
+        import modules
+        
+        if not use_orjson:
+            monkeypatch.setattr(modules, "orjson", None)
+        elif modules.orjson is None:
+            pytest.skip("orjson not installed")
+        
+        data = modules.dumps_json({"text": "héllo 😂", 1: True})
+        
+        assert data == '{"text":"héllo 😂","1":true}'
+        assert modules.loads_json(data) == {"text": "héllo 😂", "1": True}
+    
+    def test_avatar_slots_message_reuses_serialized_slots(self, monkeypatch):
+        """Test that slot assignments are serialized once per generation"""
+        import app as app_module
+        
+        slots = [{"id": "slot1", "avatarData": {"name": "cat"}}]
+        monkeypatch.setattr(app_module, "get_avatar_slot_assignments", lambda: slots)
+        monkeypatch.setattr(app_module, "get_avatar_assignments_generation_id", lambda: 7)
+        monkeypatch.setattr(app_module, "_avatar_slots_json_cache", None)
+        
+        first = json.loads(app_module.build_avatar_slots_message(queueLength=2))
+        cached = app_module._avatar_slots_json_cache
+        second = json.loads(app_module.build_avatar_slots_message())
+        
+        assert first == {"type": "avatar_slots_updated", "generationId": 7, "queueLength": 2, "slots": slots}
+        assert second["slots"] == slots
+        assert app_module._avatar_slots_json_cache is cached
+
+
+@pytest.mark.unit
+@pytest.mark.api
+class TestTwitchAutoRefresh:
+    """Tests for refreshing the Twitch token after auth errors"""
+    
+    @pytest.fixture
+    def fake_twitch_refresh(self, monkeypatch):
+        """Stub the Twitch refresh requests, recording refresh calls"""
+        import asyncio
+        import app as app_module
+        from routers import auth
+        state = {"calls": [], "result": {"access_token": "new_token"}}
+        
+        async def fake_refresh(refresh_token):
+            state["calls"].append(refresh_token)
+            await asyncio.sleep(0.01)
+            return state["result"]
+        
+        async def fake_user_info(access_token):
+            return {"id": "1", "login": "streamer"}
+        
+        monkeypatch.setattr(auth, "get_auth", lambda: Mock(refresh_token="refresh"))
+        monkeypatch.setattr(auth, "refresh_twitch_token", fake_refresh)
+        monkeypatch.setattr(auth, "get_twitch_user_info", fake_user_info)
+        monkeypatch.setattr(auth, "save_twitch_auth", lambda user_info, token_data: None)
+        app_module.reset_twitch_refresh_backoff()
+        yield state
+        app_module.reset_twitch_refresh_backoff()
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_errors_share_one_refresh(self, fake_twitch_refresh):
+        """Test that simultaneous auth errors refresh once and only the first caller handles it"""
+        import asyncio
+        import app as app_module
+        
+        results = await asyncio.gather(*(app_module.refresh_twitch_auth_after_error("test") for _ in range(3)))
+        
+        assert results == [True, None, None]
+        assert fake_twitch_refresh["calls"] == ["refresh"]
+        # A successful refresh resets the backoff
+        assert await app_module.refresh_twitch_auth_after_error("test") is True
+        assert len(fake_twitch_refresh["calls"]) == 2
+    
+    @pytest.mark.asyncio
+    async def test_failed_refresh_backs_off(self, fake_twitch_refresh):
+        """Test that a quick repeat after a failed refresh waits for the backoff"""
+        import app as app_module
+        fake_twitch_refresh["result"] = None
+        
+        assert await app_module.refresh_twitch_auth_after_error("test") is False
+        assert await app_module.refresh_twitch_auth_after_error("test") is False
+        assert fake_twitch_refresh["calls"] == ["refresh"]
+    
+    @pytest.mark.asyncio
+    async def test_stored_token_is_refreshed_before_expiry(self, monkeypatch):
+        """Test that storing a token schedules a refresh that rotates it and reschedules itself"""
+        from routers import auth
+        saved = []
+        
+        async def fake_refresh(refresh_token):
+            return {"access_token": "new_token", "refresh_token": "new_refresh", "expires_in": 3600}
+        
+        async def fake_user_info(access_token):
+            return {"id": "1", "login": "streamer"}
+        
+        monkeypatch.setattr(auth, "save_twitch_auth", lambda user_info, token_data: saved.append(token_data["access_token"]))
+        monkeypatch.setattr(auth, "refresh_twitch_token", fake_refresh)
+        monkeypatch.setattr(auth, "get_twitch_user_info", fake_user_info)
+        try:
+            await auth.store_twitch_auth({"id": "1"}, {"access_token": "old_token", "refresh_token": "refresh",
+                                                       "expires_in": auth.TWITCH_EXPIRY_REFRESH_MARGIN})
+            first_task = auth._twitch_expiry_refresh_task
+            await first_task
+            
+            assert saved == ["old_token", "new_token"]
+            assert auth._twitch_expiry_refresh_task is not first_task
+            assert not auth._twitch_expiry_refresh_task.done()
+        finally:
+            auth._cancel_twitch_expiry_refresh()
+
+
 @pytest.mark.integration
 @pytest.mark.api
 class TestWebSocketConnection:
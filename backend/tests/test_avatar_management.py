@@ -490,6 +490,25 @@ class TestAvatarPositioning:
         assert avatar.spawn_position is None
 
 
+@pytest.mark.unit
+@pytest.mark.avatars
+class TestAvatarSlotSelection:
+    """Tests for picking a slot for a TTS message"""
+    
+    def test_voice_matched_slots_preferred(self, monkeypatch):
+        """Test that slots for the requested voice, random slots and slots with removed voices match"""
+        from modules import avatars
+        
+        slots = [{"id": 1, "voice_id": 7}, {"id": 2, "voice_id": 8}, {"id": 3, "voice_id": 99}, {"id": 4, "voice_id": None}]
+        monkeypatch.setattr(avatars, "avatar_slot_assignments", slots)
+        monkeypatch.setattr(avatars, "active_avatar_slots", {})
+        monkeypatch.setattr(avatars, "get_enabled_voice_by_id", lambda voice_id: object() if voice_id in (7, 8) else None)
+        
+        picked = {avatars.find_available_slot_for_tts(voice_id=7)["id"] for _ in range(100)}
+        
+        assert picked == {1, 3, 4}
+
+
 @pytest.mark.integration
 @pytest.mark.avatars
 class TestAvatarIntegration:
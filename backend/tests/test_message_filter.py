@@ -1,7 +1,10 @@
 """Unit tests for message filtering (duplicate and spam detection)"""
 import pytest
 import time
-from modules.message_filter import MessageHistory, get_message_history, reset_message_history
+from modules.message_filter import (
+    MessageHistory, get_message_history, reset_message_history, should_process_message, get_filter_rules,
+    get_redeem_allowlist, parse_emote_ranges, remove_ranges
+)
 
 
 @pytest.fixture
@@ -339,6 +342,29 @@ class TestMessageHistoryCleanup:
         # Old message should be cleaned up
         assert stats["total_timestamps"] == 1
     
+    def test_check_and_add_records_only_allowed_messages(self, message_history):
+        """Test that check_and_add adds messages until the user hits the limit"""
+        results = [message_history.check_and_add("Chatter", max_messages=2, time_window_seconds=10)[0] for _ in range(3)]
+        
+        assert results == [False, False, True]
+        assert message_history.get_stats()["total_timestamps"] == 2
+    
+    def test_idle_users_swept_periodically(self, monkeypatch):
+        """Test that idle users are only swept once the sweep interval has passed"""
+        import modules.message_filter as message_filter
+        now = [1000.0]
+        monkeypatch.setattr(message_filter.time, "time", lambda: now[0])
+        history = MessageHistory(max_age_seconds=10)
+        
+        history.add_message("IdleUser", "Hello")
+        now[0] += 20
+        history.add_message("ActiveUser", "Hi")
+        assert history.get_stats()["tracked_users"] == 2
+        
+        now[0] += message_filter.HISTORY_SWEEP_INTERVAL
+        history.add_message("ActiveUser", "Hi again")
+        assert history.get_stats()["tracked_users"] == 1
+    
     def test_clear_history(self, message_history):
         """Test clearing message history"""
         message_history.add_message("User1", "Message 1")
@@ -423,3 +449,190 @@ class TestEdgeCases:
         is_dup, reason = message_history.is_duplicate("testuser", "Hello", 60)
         
         assert is_dup is True  # Should normalize username case
+
+
+@pytest.mark.unit
+@pytest.mark.filtering
+class TestFilterRules:
+    """Tests for the lookups precomputed from filter settings"""
+    
+    def test_ignored_users_are_case_insensitive(self):
+        """Test that ignored users match regardless of case"""
+        settings = {"messageFiltering": {"enabled": True, "ignoredUsers": ["NightBot"]}}
+        
+        should_process, _ = should_process_message("hello", settings, username="nightbot")
+        assert should_process is False
+        
+        should_process, _ = should_process_message("hello", settings, username="viewer")
+        assert should_process is True
+    
+    def test_rules_are_reused_until_settings_change(self):
+        """Test that rules are rebuilt only when a new filtering dict is seen"""
+        filtering = {"ignoredUsers": ["A"]}
+        rules = get_filter_rules(filtering)
+        
+        assert get_filter_rules(filtering) is rules
+        assert get_filter_rules({"ignoredUsers": ["B"]}).ignored_users == frozenset({"b"})
+    
+    def test_rules_are_reused_without_filtering_settings(self):
+        """Test that settings without a messageFiltering section don't rebuild rules per message"""
+        from modules import message_filter
+        
+        should_process_message("hello", {})
+        rules = message_filter._filter_rules_cache[1]
+        should_process_message("hello again", {}, tags=None)
+        
+        assert message_filter._filter_rules_cache[1] is rules
+    
+    def test_unconfigured_filters_pass_messages_through(self):
+        """Test that rules with every filter off take the fast path but still enforce the length cap"""
+        filtering = {
+            "enabled": True, "skipCommands": False, "removeUrls": False,
+            "enableSpamFilter": False, "maxLength": 10
+        }
+        settings = {"messageFiltering": filtering}
+        
+        assert get_filter_rules(filtering).passthrough is True
+        assert get_filter_rules({"enabled": True}).passthrough is False
+        assert should_process_message("!cmd a.com", settings, "viewer") == (True, "!cmd a.com")
+        assert should_process_message("a much longer message", settings, "viewer") == (True, "a much lon")
+    
+    def test_commands_are_skipped(self):
+        """Test that messages starting with a command prefix are skipped"""
+        settings = {"messageFiltering": {"enabled": True}}
+        
+        assert should_process_message("  !song", settings)[0] is False
+        assert should_process_message("/me waves", settings)[0] is False
+    
+    def test_empty_messages_are_skipped(self):
+        """Test that empty or whitespace-only messages are skipped even with filtering disabled"""
+        settings = {"messageFiltering": {"enabled": False}}
+        
+        assert should_process_message("", settings) == (False, "")
+        assert should_process_message("  \t", settings)[0] is False
+    
+    def test_redeem_allowlist_is_case_insensitive(self):
+        """Test that only allowlisted channel point redeems pass, matching reward IDs case-insensitively"""
+        redeem_filter = {"enabled": True, "allowedRedeemNames": [" ABC-123 ", ""]}
+        settings = {"twitch": {"redeemFilter": redeem_filter}, "messageFiltering": {"enabled": False}}
+        
+        assert should_process_message("hi", settings, "viewer", tags={"custom-reward-id": "abc-123"})[0] is True
+        assert should_process_message("hi", settings, "viewer", tags={"custom-reward-id": "other"})[0] is False
+        assert should_process_message("hi", settings, "viewer", tags={})[0] is False
+        assert get_redeem_allowlist(redeem_filter) is get_redeem_allowlist(redeem_filter)
+    
+    def test_long_messages_are_truncated_at_a_word_boundary(self):
+        """Test that truncation backs up to the last space unless that cuts too much"""
+        settings = {"messageFiltering": {"enabled": True, "maxLength": 20}}
+        
+        assert should_process_message("aaaa bbbb cccc ddddd eeee", settings)[1] == "aaaa bbbb cccc ddddd"
+        assert should_process_message("aaaa bbbb cccc dddd eeee", settings)[1] == "aaaa bbbb cccc dddd"
+        assert should_process_message("aaaa bbbbbbbbbbbbbbbbbbbb", settings)[1] == "aaaa bbbbbbbbbbbbbbb"
+    
+    def test_profanity_words_are_replaced(self):
+        """Test that custom profanity words are replaced as whole words, ignoring case"""
+        settings = {"messageFiltering": {
+            "enabled": True,
+            "enableSpamFilter": False,
+            "profanityFilter": {"enabled": True, "customWords": ["darn", " heck ", ""], "replacement": "beep"}
+        }}
+        
+        should_process, text = should_process_message("Darn it, what the heck, darning", settings)
+        
+        assert should_process is True
+        assert text == "beep it, what the beep, darning"
+    
+    def test_profanity_prefers_longest_word(self):
+        """Test that a word is replaced whole even when a shorter word is its prefix"""
+        settings = {"messageFiltering": {
+            "enabled": True,
+            "enableSpamFilter": False,
+            "profanityFilter": {"enabled": True, "customWords": ["dang", "dangit"], "replacement": "*"}
+        }}
+        
+        _, text = should_process_message("dangit and DANG", settings)
+        
+        assert text == "* and *"
+    
+    def test_urls_are_removed(self):
+        """Test that URLs are stripped and whitespace collapsed"""
+        settings = {"messageFiltering": {"enabled": True, "enableSpamFilter": False}}
+        
+        _, text = should_process_message("look  https://example.com/x at example.tv now", settings)
+        
+        assert text == "look at now"
+    
+    def test_url_tld_must_end_the_domain(self):
+        """Test that words merely containing a TLD after a dot are kept"""
+        settings = {"messageFiltering": {"enabled": True, "enableSpamFilter": False}}
+        
+        _, text = should_process_message("so.cool see twitch.tv/streamer and sub.example.com?x=1", settings)
+        
+        assert text == "so.cool see and"
+    
+    def test_user_with_active_tts_is_ignored_case_insensitively(self):
+        """Test that ignoreIfUserSpeaking matches active jobs keyed by lowercase username"""
+        settings = {"messageFiltering": {"enabled": True, "ignoreIfUserSpeaking": True, "enableSpamFilter": False}}
+        
+        should_process, _ = should_process_message("hello", settings, username="Speaker", active_tts_jobs={"speaker": {}})
+        
+        assert should_process is False
+    
+    def test_finished_job_keeps_newer_job_of_same_user(self, monkeypatch):
+        """Test that an older job finishing doesn't clear the user's newer active job"""
+        import app as app_module
+        
+        old_task, new_task = object(), object()
+        jobs = {"speaker": {"task": new_task, "message": "second"}}
+        monkeypatch.setattr(app_module, "active_tts_jobs", jobs)
+        
+        app_module.clear_active_tts_job("speaker", old_task)
+        assert "speaker" in jobs
+        
+        app_module.clear_active_tts_job("speaker", new_task)
+        assert "speaker" not in jobs
+
+
+@pytest.mark.unit
+@pytest.mark.filtering
+class TestEmoteFiltering:
+    """Tests for removing Twitch emotes using the emotes tag"""
+    
+    def test_parse_emote_ranges(self):
+        """Test that emote ranges are parsed, sorted and malformed entries skipped"""
+        assert parse_emote_ranges("1902:12-20/25:0-4,6-10") == [(0, 4), (6, 10), (12, 20)]
+        assert parse_emote_ranges("emotesv2_abc:3-5/bad") == [(3, 5)]
+        assert parse_emote_ranges("") == []
+        assert parse_emote_ranges("25:0-4") is parse_emote_ranges("25:0-4")
+    
+    def test_remove_overlapping_ranges(self):
+        """Test that overlapping and duplicate ranges are removed once"""
+        assert remove_ranges("abcdefghij", [(0, 2), (1, 4), (1, 4), (8, 9)]) == "fgh"
+        assert remove_ranges("abc", []) == "abc"
+    
+    def test_emotes_are_removed_from_text(self):
+        """Test that emote positions from the tag are stripped from the message"""
+        settings = {"messageFiltering": {"enabled": True, "skipEmotes": True}}
+        tags = {"emotes": "25:0-4,12-16"}
+        
+        should_process, text = should_process_message("Kappa hello Kappa", settings, tags=tags)
+        
+        assert should_process is True
+        assert text == "hello"
+    
+    def test_emote_only_message_is_skipped(self):
+        """Test that a message made only of emotes is skipped"""
+        settings = {"messageFiltering": {"enabled": True, "skipEmotes": True}}
+        
+        should_process, _ = should_process_message("Kappa Kappa", settings, tags={"emotes": "25:0-4,6-10"})
+        
+        assert should_process is False
+    
+    def test_emoji_only_message_is_skipped_without_tags(self):
+        """Test that the tagless fallback skips emoji-only messages but keeps words with digits"""
+        settings = {"messageFiltering": {"enabled": True, "skipEmotes": True}}
+        
+        assert should_process_message("😂 👍🏽 ❤️", settings)[0] is False
+        assert should_process_message("🏳️‍🌈", settings)[0] is False
+        assert should_process_message("top 10 moments 😂", settings)[0] is True
+        assert should_process_message("mp3 player", settings)[0] is True
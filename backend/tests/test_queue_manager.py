@@ -0,0 +1,171 @@
+"""Unit tests for avatar and parallel message queues"""
+import pytest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules import queue_manager
+
+
+@pytest.fixture(autouse=True)
+def empty_queues():
+    """Start and finish every test with empty queues"""
+    queue_manager.clear_all_queues()
+    yield
+    queue_manager.clear_all_queues()
+
+
+@pytest.mark.unit
+@pytest.mark.avatars
+class TestMessageQueues:
+    """Tests for queueing and draining messages"""
+
+    def test_full_queue_drops_oldest_message(self):
+        """Test that queues are bounded and evict the oldest entry first"""
+        for i in range(queue_manager.MAX_QUEUE_LENGTH + 2):
+            queue_manager.queue_avatar_message({"user": f"user{i}"})
+
+        assert queue_manager.get_avatar_queue_length() == queue_manager.MAX_QUEUE_LENGTH
+        assert queue_manager.avatar_message_queue.peek()["message_data"]["user"] == "user2"
+
+    def test_queue_limit_follows_setting(self):
+        """Test that lowering maxQueuedMessages trims both queues to their newest entries"""
+        for i in range(5):
+            queue_manager.queue_parallel_message({"user": f"user{i}"})
+            queue_manager.queue_avatar_message({"user": f"user{i}"})
+        
+        try:
+            queue_manager.set_max_queue_length(3)
+            queue_manager.queue_parallel_message({"user": "user5"})
+            
+            assert [item["message_data"]["user"] for item in queue_manager.parallel_message_queue] == ["user3", "user4", "user5"]
+            assert queue_manager.get_avatar_queue_length() == 3
+            assert queue_manager.avatar_message_queue.peek()["message_data"]["user"] == "user2"
+        finally:
+            queue_manager.set_max_queue_length(None)
+        
+        assert queue_manager.max_queue_length == queue_manager.MAX_QUEUE_LENGTH
+    
+    def test_users_are_served_round_robin(self):
+        """Test that a busy user can't hold the queue and is capped to a few entries"""
+        for i in range(queue_manager.MAX_QUEUED_PER_USER + 2):
+            queue_manager.queue_avatar_message({"user": "spammer", "text": str(i)})
+        queue_manager.queue_avatar_message({"user": "viewer", "text": "hi"})
+
+        queue = queue_manager.avatar_message_queue
+        assert len(queue) == queue_manager.MAX_QUEUED_PER_USER + 1
+        served = [queue.popleft()["message_data"] for _ in range(3)]
+        assert [m["user"] for m in served] == ["spammer", "viewer", "spammer"]
+        # The spammer's oldest entries were dropped
+        assert served[0]["text"] == "2"
+
+    def test_expired_messages_are_drained_iteratively(self, monkeypatch):
+        """Test that a long run of expired messages is discarded in one call"""
+        monkeypatch.setattr(queue_manager, "find_available_slot_for_tts", lambda voice_id, user: None)
+        for i in range(queue_manager.MAX_QUEUE_LENGTH - 1):
+            queue_manager.queue_avatar_message({"user": f"stale{i}"})
+        for item in queue_manager.avatar_message_queue:
+            item["queued_time"] -= queue_manager.AVATAR_QUEUE_MAX_AGE + 1
+        queue_manager.queue_avatar_message({"user": "fresh"})
+
+        queue_manager.process_avatar_message_queue(lambda message_data, slot, audio_duration, retries: None)
+
+        assert [item["message_data"]["user"] for item in queue_manager.avatar_message_queue] == ["fresh"]
+
+    def test_expiry_sweep_uses_earliest_entry(self, monkeypatch):
+        """Test that expired entries are found after a sweep that found none"""
+        now = [1000.0]
+        monkeypatch.setattr(queue_manager.time, "monotonic", lambda: now[0])
+        queue = queue_manager.FairMessageQueue()
+        queue.append({"message_data": {"user": "a"}, "queued_time": now[0]})
+        
+        assert queue.pop_expired(60) == []
+        now[0] += 30
+        queue.append({"message_data": {"user": "b"}, "queued_time": now[0]})
+        now[0] += 31
+        
+        assert [item["message_data"]["user"] for item in queue.pop_expired(60)] == ["a"]
+        assert len(queue) == 1
+    
+    @pytest.mark.asyncio
+    async def test_parallel_message_of_speaking_user_replaces_job(self):
+        """Test that a queued message from a user with an active job doesn't take a new slot"""
+        import asyncio
+        processed = []
+        increments = []
+        
+        async def process(message_data):
+            processed.append(message_data["user"])
+        
+        queue_manager.queue_parallel_message({"user": "Speaker"})
+        queue_manager.process_parallel_message_queue(
+            5, process, {"speaker": {}}, 0, lambda: increments.append(1), lambda: None
+        )
+        await asyncio.sleep(0)
+        
+        assert processed == ["Speaker"]
+        assert increments == []
+    
+    @pytest.mark.asyncio
+    async def test_queued_duration_is_reused(self, monkeypatch):
+        """Test that a queued message is replayed with its recorded duration instead of re-reading the file"""
+        reserved = {}
+        broadcasts = []
+
+        class FakeHub:
+            async def broadcast(self, payload):
+                broadcasts.append(payload)
+
+        monkeypatch.setattr(queue_manager, "get_audio_duration", lambda path: pytest.fail("audio file was read"))
+        monkeypatch.setattr(queue_manager, "reserve_avatar_slot",
+                            lambda slot_id, user, audio_url, duration: reserved.update(duration=duration))
+        slot = {"id": "slot1", "avatarData": {}}
+
+        await queue_manager.process_queued_tts_message(
+            {"user": "viewer", "audioUrl": "/audio/a.mp3"}, slot, FakeHub(), lambda: None, 2.5
+        )
+
+        assert reserved["duration"] == 2.5
+        assert broadcasts[0]["targetSlot"]["id"] == "slot1"
+
+    @pytest.mark.asyncio
+    async def test_failed_message_is_retried_a_limited_number_of_times(self, monkeypatch):
+        """Test that a message failing to play is re-queued until it runs out of retries"""
+        def failing_reserve(*args):
+            raise RuntimeError("reserve failed")
+
+        monkeypatch.setattr(queue_manager, "reserve_avatar_slot", failing_reserve)
+        monkeypatch.setattr(queue_manager, "release_avatar_slot", lambda slot_id: None)
+        slot = {"id": "slot1", "avatarData": {}}
+        message = {"user": "viewer", "audioUrl": "/audio/a.mp3"}
+
+        await queue_manager.process_queued_tts_message(message, slot, None, lambda: None, 1.0, 0)
+        assert queue_manager.avatar_message_queue.peek()["retries"] == 1
+
+        queue_manager.clear_all_queues()
+        await queue_manager.process_queued_tts_message(
+            message, slot, None, lambda: None, 1.0, queue_manager.MAX_QUEUED_RETRIES
+        )
+        assert queue_manager.get_avatar_queue_length() == 0
+    
+    @pytest.mark.asyncio
+    async def test_retried_message_keeps_its_age_and_turn(self, monkeypatch):
+        """Test that a failed queued message goes back first with its original queued_time"""
+        def failing_reserve(*args):
+            raise RuntimeError("reserve failed")
+
+        monkeypatch.setattr(queue_manager, "reserve_avatar_slot", failing_reserve)
+        monkeypatch.setattr(queue_manager, "release_avatar_slot", lambda slot_id: None)
+        queue_manager.queue_avatar_message({"user": "other"})
+        slot = {"id": "slot1", "avatarData": {}}
+
+        await queue_manager.process_queued_tts_message(
+            {"user": "viewer", "audioUrl": "/audio/a.mp3"}, slot, None, lambda: None, 1.0, 0, 123.0
+        )
+
+        retried = queue_manager.avatar_message_queue.peek()
+        assert retried["message_data"]["user"] == "viewer"
+        assert retried["queued_time"] == 123.0
+        assert retried["retries"] == 1
+        assert len(queue_manager.avatar_message_queue.pop_expired(queue_manager.AVATAR_QUEUE_MAX_AGE)) == 1
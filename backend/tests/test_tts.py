@@ -14,6 +14,7 @@ from modules.tts import (
     TTSProvider, 
     MonsterTTSProvider,
     get_provider,
+    get_hybrid_provider,
     reset_fallback_stats
 )
 
@@ -231,6 +232,111 @@ class TestGetProvider:
             pass
 
 
+@pytest.mark.unit
+@pytest.mark.tts
+class TestGetHybridProvider:
+    """Tests for get_hybrid_provider reuse"""
+    
+    @pytest.mark.asyncio
+    async def test_provider_reused_for_same_credentials(self):
+        """Test that the same credentials return the same provider instance"""
+        first = await get_hybrid_provider(monster_api_key="key")
+        second = await get_hybrid_provider(monster_api_key="key")
+        
+        assert first is second
+    
+    @pytest.mark.asyncio
+    async def test_provider_rebuilt_when_credentials_change(self):
+        """Test that changing credentials builds a new provider"""
+        first = await get_hybrid_provider(monster_api_key="key")
+        second = await get_hybrid_provider(monster_api_key="other-key")
+        
+        assert first is not second
+        assert second.monster_provider.api_key == "other-key"
+    
+    @pytest.mark.asyncio
+    async def test_job_fallback_voices_limit_fallback(self):
+        """Test that a job with its own fallback voices never falls back to another voice"""
+        from modules.tts import HybridTTSProvider
+        provider = HybridTTSProvider()
+        provider.google_provider = Mock(synth=AsyncMock(side_effect=RuntimeError("quota")))
+        provider.edge_provider = Mock(synth=AsyncMock(return_value="edge.mp3"))
+        voice = Mock(id="test", name="Test", provider="google", voice_id="en-US-Test")
+        job = TTSJob(text="hi", voice="en-US-Test", provider="google", fallback_voices=[voice])
+        
+        try:
+            assert await provider.synth(job) is None
+        finally:
+            reset_fallback_stats()
+        assert provider.google_provider.synth.await_count == 2
+        provider.edge_provider.synth.assert_not_awaited()
+
+
+@pytest.mark.unit
+@pytest.mark.tts
+class TestEdgeTTSFallback:
+    """Tests for Edge TTS falling back to its default voice"""
+    
+    @pytest.mark.asyncio
+    async def test_default_voice_audio_is_not_cached(self, tmp_path, monkeypatch):
+        """Test that audio synthesized with the default voice isn't cached under the requested voice"""
+        from modules import tts, tts_cache
+        
+        class FakeCommunicate:
+            def __init__(self, text, voice):
+                self.voice = voice
+            
+            async def save(self, path):
+                if self.voice != tts.EdgeTTSProvider.voice_id:
+                    raise tts.edge_tts.exceptions.NoAudioReceived("no audio")
+                with open(path, "wb") as f:
+                    f.write(b"audio")
+        
+        async def no_cleanup(self, filepath, delay_seconds):
+            pass
+        
+        monkeypatch.setattr(tts, "AUDIO_DIR", str(tmp_path))
+        monkeypatch.setattr(tts_cache, "AUDIO_DIR", str(tmp_path))
+        monkeypatch.setattr(tts.edge_tts, "Communicate", FakeCommunicate)
+        monkeypatch.setattr(tts.EdgeTTSProvider, "list_voices", AsyncMock(return_value=[]))
+        monkeypatch.setattr(tts.EdgeTTSProvider, "_cleanup_file_after_delay", no_cleanup)
+        job = TTSJob(text="hello", voice="en-US-RetiredNeural")
+        
+        path = await tts_cache.get_or_synth(tts.EdgeTTSProvider(), job, "edge")
+        
+        assert os.path.exists(path)
+        assert job.cacheable is False
+        assert not os.path.basename(path).startswith(tts_cache.CACHE_FILE_PREFIX)
+        assert tts_cache.lookup_cached_audio(TTSJob(text="hello", voice="en-US-RetiredNeural"), "edge") is None
+
+
+@pytest.mark.unit
+@pytest.mark.tts
+class TestGetAudioDuration:
+    """Tests for get_audio_duration caching"""
+    
+    def test_duration_is_probed_once_per_file(self, tmp_path):
+        """Test that replaying a file reuses its duration until the file changes"""
+        from modules import tts
+        audio_file = tmp_path / "cache_abc.mp3"
+        audio_file.write_bytes(b"x" * 2048)
+        
+        with patch.object(tts, "_probe_audio_duration", return_value=1.5) as probe:
+            assert tts.get_audio_duration(str(audio_file)) == 1.5
+            assert tts.get_audio_duration(str(audio_file)) == 1.5
+            assert probe.call_count == 1
+            
+            audio_file.write_bytes(b"x" * 4096)
+            tts.get_audio_duration(str(audio_file))
+            assert probe.call_count == 2
+    
+    def test_missing_file_returns_none(self, tmp_path):
+        """Test that a missing file has no duration"""
+        from modules import tts
+        
+        assert tts.get_audio_duration(str(tmp_path / "missing.mp3")) is None
+
+
 @pytest.mark.unit
 @pytest.mark.tts
 class TestFallbackStats:
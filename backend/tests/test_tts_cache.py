@@ -0,0 +1,151 @@
+"""Unit tests for the synthesized audio cache"""
+import asyncio
+import os
+import pytest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules import tts_cache
+from modules.tts import TTSJob
+
+
+class FakeProvider:
+    """Provider that writes a small file and counts synth calls"""
+
+    def __init__(self, audio_dir, fallback=False, delay=0):
+        self.audio_dir = audio_dir
+        self.fallback = fallback
+        self.delay = delay
+        self.calls = 0
+
+    async def synth(self, job):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fallback:
+            job.cacheable = False
+        path = os.path.join(self.audio_dir, f"synth_{self.calls}.{job.audio_format}")
+        with open(path, "wb") as f:
+            f.write(b"audio")
+        return path
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Point the cache at a temporary audio directory"""
+    monkeypatch.setattr(tts_cache, "AUDIO_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.unit
+@pytest.mark.tts
+class TestTTSCache:
+    """Tests for get_or_synth and cache pruning"""
+
+    def test_cache_key_depends_on_all_fields(self):
+        """Test that provider, voice, format and text all change the key"""
+        job = TTSJob(text="hello", voice="voice-a")
+        base = tts_cache.get_cache_key(job, "edge")
+
+        assert base == tts_cache.get_cache_key(TTSJob(text="hello", voice="voice-a"), "edge")
+        assert base != tts_cache.get_cache_key(job, "polly")
+        assert base != tts_cache.get_cache_key(TTSJob(text="hello", voice="voice-b"), "edge")
+        assert base != tts_cache.get_cache_key(TTSJob(text="hello", voice="voice-a", audio_format="wav"), "edge")
+        assert base != tts_cache.get_cache_key(TTSJob(text="hello!", voice="voice-a"), "edge")
+
+    @pytest.mark.asyncio
+    async def test_second_request_is_served_from_cache(self, cache_dir):
+        """Test that identical jobs only synthesize once"""
+        provider = FakeProvider(str(cache_dir))
+
+        first = await tts_cache.get_or_synth(provider, TTSJob(text="hi", voice="v"), "edge")
+        second = await tts_cache.get_or_synth(provider, TTSJob(text="hi", voice="v"), "edge")
+
+        assert provider.calls == 1
+        assert first == second
+        assert os.path.basename(first).startswith(tts_cache.CACHE_FILE_PREFIX)
+        assert os.path.exists(first)
+
+    @pytest.mark.asyncio
+    async def test_fallback_voice_is_not_cached(self, cache_dir):
+        """Test that jobs marked as not cacheable bypass the cache"""
+        provider = FakeProvider(str(cache_dir), fallback=True)
+
+        first = await tts_cache.get_or_synth(provider, TTSJob(text="hi", voice="v"), "edge")
+        await tts_cache.get_or_synth(provider, TTSJob(text="hi", voice="v"), "edge")
+
+        assert provider.calls == 2
+        assert not os.path.basename(first).startswith(tts_cache.CACHE_FILE_PREFIX)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_share_synthesis(self, cache_dir):
+        """Test that identical in-flight requests await the same provider call"""
+        provider = FakeProvider(str(cache_dir), delay=0.05)
+
+        paths = await asyncio.gather(*(
+            tts_cache.get_or_synth(provider, TTSJob(text="burst", voice="v"), "edge")
+            for _ in range(5)
+        ))
+
+        assert provider.calls == 1
+        assert len(set(paths)) == 1
+        assert not tts_cache._inflight
+
+    @pytest.mark.asyncio
+    async def test_cancelled_requester_does_not_cancel_others(self, cache_dir):
+        """Test that cancelling one waiter leaves the shared synthesis running"""
+        provider = FakeProvider(str(cache_dir), delay=0.05)
+
+        first = asyncio.create_task(tts_cache.get_or_synth(provider, TTSJob(text="x", voice="v"), "edge"))
+        second = asyncio.create_task(tts_cache.get_or_synth(provider, TTSJob(text="x", voice="v"), "edge"))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        path = await second
+        assert provider.calls == 1
+        assert os.path.exists(path)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_synthesis_is_bounded(self, cache_dir, monkeypatch):
+        """Test that distinct jobs never exceed TTS_CONCURRENT_REQUESTS provider calls"""
+        monkeypatch.setattr(tts_cache, "TTS_CONCURRENT_REQUESTS", 2)
+        monkeypatch.setattr(tts_cache, "_synth_semaphore", None)
+        provider = FakeProvider(str(cache_dir), delay=0.02)
+        running = 0
+        peak = 0
+        original_synth = provider.synth
+
+        async def tracking_synth(job):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            try:
+                return await original_synth(job)
+            finally:
+                running -= 1
+
+        provider.synth = tracking_synth
+        await asyncio.gather(*(
+            tts_cache.get_or_synth(provider, TTSJob(text=f"message {i}", voice="v"), "edge")
+            for i in range(6)
+        ))
+
+        assert provider.calls == 6
+        assert peak == 2
+
+    def test_prune_removes_oldest_files(self, cache_dir):
+        """Test that pruning evicts least recently used files first"""
+        for i, name in enumerate(["old", "mid", "new"]):
+            path = cache_dir / f"{tts_cache.CACHE_FILE_PREFIX}{name}.mp3"
+            path.write_bytes(b"x" * 100)
+            os.utime(path, (1000 + i, 1000 + i))
+        (cache_dir / "other.mp3").write_bytes(b"x" * 100)
+
+        removed = tts_cache.prune_cache(max_bytes=200)
+
+        assert removed == 1
+        assert not (cache_dir / f"{tts_cache.CACHE_FILE_PREFIX}old.mp3").exists()
+        assert (cache_dir / f"{tts_cache.CACHE_FILE_PREFIX}new.mp3").exists()
+        assert (cache_dir / "other.mp3").exists()
@@ -361,6 +361,34 @@ class TestVoicePersistentData:
         # Verify removed
         removed = get_voice_by_id(voice_id)
         assert removed is None
+    
+    def test_enabled_voices_cache_invalidation(self, session):
+        """Test that the cached enabled voices list follows voice changes"""
+        from modules.persistent_data import (
+            add_voice, remove_voice, get_enabled_voices, get_enabled_voice_by_id, get_voice_display_key
+        )
+        
+        before = get_enabled_voices()
+        assert get_enabled_voices() is before  # Served from cache
+        
+        voice = Voice(
+            name="Cache Test",
+            voice_id="cache_test",
+            provider="edge",
+            enabled=True
+        )
+        add_voice(voice)
+        
+        try:
+            cached = next(v for v in get_enabled_voices() if v.voice_id == "cache_test")
+            assert get_voice_display_key(cached) == "Cache Test (edge)"
+            assert get_enabled_voice_by_id(voice.id) is cached
+            assert get_enabled_voice_by_id(str(voice.id)) is cached
+        finally:
+            remove_voice(voice.id)
+        
+        assert not any(v.voice_id == "cache_test" for v in get_enabled_voices())
+        assert get_enabled_voice_by_id(voice.id) is None
 
 
 @pytest.mark.unit
@@ -475,6 +503,18 @@ class TestVoiceProviders:
         session.commit()
         
         assert voice.provider == "polly"
+    
+    def test_random_voice_selection_avoids_last_voice(self):
+        """Test that random selection never repeats the last voice when another exists"""
+        from app import pick_random_voice
+        
+        voices = [Voice(id=i, name=f"Voice {i}", voice_id=f"v{i}", provider="edge") for i in range(1, 4)]
+        
+        picks = {pick_random_voice(voices, avoid_voice_id=2).id for _ in range(200)}
+        assert picks == {1, 3}
+        
+        single = voices[:1]
+        assert pick_random_voice(single, avoid_voice_id=1) is single[0]
 
 
 @pytest.mark.integration
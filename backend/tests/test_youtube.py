@@ -422,6 +422,31 @@ class TestYouTubeListener:
         # Note: Actual test may need more sophisticated mocking
 
 
+@pytest.mark.unit
+@pytest.mark.youtube
+class TestYouTubeTokenRefresh:
+    """Tests for refreshing YouTube tokens"""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_refreshes_share_one_request(self, monkeypatch):
+        """Test that simultaneous refreshes with the same token make a single request"""
+        import asyncio
+        from routers import auth
+        calls = []
+        
+        async def fake_request(refresh_token):
+            calls.append(refresh_token)
+            await asyncio.sleep(0.01)
+            return {"access_token": "new_token"}
+        
+        monkeypatch.setattr(auth, "_request_youtube_token_refresh", fake_request)
+        results = await asyncio.gather(*(auth.refresh_youtube_token("refresh") for _ in range(3)))
+        
+        assert calls == ["refresh"]
+        assert all(result == {"access_token": "new_token"} for result in results)
+        assert not auth._youtube_refresh_inflight
+
+
 @pytest.mark.integration
 @pytest.mark.youtube
 class TestYouTubeIntegration:
@@ -69,17 +69,21 @@ class WebSocketManager {
 
       this.ws.onmessage = (e) => {
         try {
-          const data = JSON.parse(e.data)
-          console.log('Global WebSocket broadcasting to', this.listeners.size, 'listeners:', data.type)
+          const parsed = JSON.parse(e.data)
+          // Messages queued during a burst arrive batched in a single array frame
+          const messages = Array.isArray(parsed) ? parsed : [parsed]
           
           // Create array to avoid Set modification during iteration
           const listenerArray = Array.from(this.listeners)
-          listenerArray.forEach(listener => {
-            try {
-              listener(data)
-            } catch (error) {
-              console.error('Listener error:', error)
-            }
+          messages.forEach(data => {
+            console.log('Global WebSocket broadcasting to', this.listeners.size, 'listeners:', data.type)
+            listenerArray.forEach(listener => {
+              try {
+                listener(data)
+              } catch (error) {
+                console.error('Listener error:', error)
+              }
+            })
           })
         } catch (error) {
           console.error('Failed to parse WebSocket message:', error)